@@ -2,6 +2,7 @@ from flask import Flask, render_template, request, jsonify, session, send_file,
 from flask_session import Session
 from openai import OpenAI
 import requests
+import requests.adapters
 from bs4 import BeautifulSoup
 import re
 import json
@@ -10,38 +11,174 @@ import markdown
 import base64
 import mimetypes
 import io
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote
 import threading
 import time
-from datetime import datetime
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import tempfile
 import zipfile
 import shutil
-from functools import wraps
+from functools import wraps, lru_cache
 import pickle
+import math
+from collections import Counter, OrderedDict
+import itertools
 import os.path
 import argparse
 import pandas as pd
 
-def clean_html_output(html_content):
-    """Clean HTML output to match the old app's formatting"""
+# clean_html_output passes, compiled once
+CLEAN_HTML_PATTERNS = [
     # Remove extra whitespace between tags
-    html_content = re.sub(r'>\s+<', '><', html_content)
-    
+    (re.compile(r'>\s+<'), '><'),
     # Ensure proper spacing after closing tags before opening tags
-    html_content = re.sub(r'</([^>]+)><([^/>][^>]*)>', r'</\1>\n<\2>', html_content)
-    
+    (re.compile(r'</([^>]+)><([^/>][^>]*)>'), r'</\1>\n<\2>'),
     # Clean up paragraph spacing
-    html_content = re.sub(r'</p>\s*<p>', '</p>\n<p>', html_content)
-    
+    (re.compile(r'</p>\s*<p>'), '</p>\n<p>'),
     # Clean up heading spacing
-    html_content = re.sub(r'</h([1-6])>\s*<', r'</h\1>\n<', html_content)
-    html_content = re.sub(r'</p>\s*<h([1-6])', r'</p>\n<h\1', html_content)
+    (re.compile(r'</h([1-6])>\s*<'), r'</h\1>\n<'),
+    (re.compile(r'</p>\s*<h([1-6])'), r'</p>\n<h\1')
+]
+
+def clean_html_output(html_content):
+    """Clean HTML output to match the old app's formatting"""
+    for pattern, replacement in CLEAN_HTML_PATTERNS:
+        html_content = pattern.sub(replacement, html_content)
     
     # Remove any trailing/leading whitespace from the entire content
-    html_content = html_content.strip()
-    
-    return html_content
+    return html_content.strip()
+
+MARKDOWN_EXTENSIONS = ['tables', 'nl2br']
+
+def _python_markdown_renderer():
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return lambda text: md.reset().convert(text)
+
+def _markdown_it_renderer():
+    # Optional dependency: pip install markdown-it-py
+    from markdown_it import MarkdownIt
+    md = MarkdownIt('commonmark', {'breaks': True, 'html': True, 'xhtmlOut': True}).enable('table')
+    return md.render
+
+# Markdown engines by name. Each factory returns a render(text) callable; renderers are
+# created once per thread because parser instances are not thread-safe.
+MARKDOWN_ENGINES = {
+    'python-markdown': _python_markdown_renderer,
+    'markdown-it': _markdown_it_renderer
+}
+DEFAULT_MARKDOWN_ENGINE = 'python-markdown'
+MARKDOWN_ENGINE = os.environ.get('MARKDOWN_ENGINE', DEFAULT_MARKDOWN_ENGINE)
+_markdown_local = threading.local()
+
+def register_markdown_engine(name, factory):
+    MARKDOWN_ENGINES[name] = factory
+
+def get_markdown_renderer(engine=None):
+    """Return (engine_name, render) for engine, falling back to Python-Markdown if unavailable"""
+    engine = engine or MARKDOWN_ENGINE
+    renderers = getattr(_markdown_local, 'renderers', None)
+    if renderers is None:
+        renderers = _markdown_local.renderers = {}
+
+    if engine not in renderers:
+        try:
+            renderers[engine] = MARKDOWN_ENGINES[engine]()
+        except (KeyError, ImportError) as e:
+            if engine == DEFAULT_MARKDOWN_ENGINE:
+                raise
+            print(f"⚠️ Markdown engine '{engine}' unavailable ({e}), using {DEFAULT_MARKDOWN_ENGINE}")
+            return get_markdown_renderer(DEFAULT_MARKDOWN_ENGINE)
+    return engine, renderers[engine]
+
+def render_markdown(text, engine=None):
+    """Render markdown with the app's extensions (tables, line breaks) using the selected engine"""
+    return get_markdown_renderer(engine)[1](text)
+
+# Cleaned HTML by (content hash, engine, extensions), least recently used evicted first
+MARKDOWN_RENDER_CACHE_SIZE = 512
+markdown_render_cache = OrderedDict()
+markdown_render_cache_lock = threading.Lock()
+markdown_render_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def render_markdown_html(text, engine=None):
+    """Render markdown to cleaned HTML, memoized so unchanged content is never rendered twice"""
+    engine_name, render = get_markdown_renderer(engine)
+    key = (content_hash(text), engine_name, tuple(MARKDOWN_EXTENSIONS))
+
+    with markdown_render_cache_lock:
+        html = markdown_render_cache.get(key)
+        if html is not None:
+            markdown_render_cache.move_to_end(key)
+            markdown_render_cache_stats['hits'] += 1
+            return html
+        markdown_render_cache_stats['misses'] += 1
+
+    html = clean_html_output(render(text))
+
+    with markdown_render_cache_lock:
+        markdown_render_cache[key] = html
+        markdown_render_cache.move_to_end(key)
+        while len(markdown_render_cache) > MARKDOWN_RENDER_CACHE_SIZE:
+            markdown_render_cache.popitem(last=False)
+            markdown_render_cache_stats['evictions'] += 1
+    return html
+
+# Lines the model adds around the actual content
+UNWANTED_RESPONSE_PHRASES = [
+    "Her er den reviderede tekst:",
+    "Her er teksten:",
+    "Jeg håber, at dette opfylder dine behov",
+    "Lad mig vide, hvis der er behov for yderligere ændringer",
+    "---",
+    "Her er resultatet:",
+    "Her er den omskrevne version:",
+    "Den reviderede tekst:"
+]
+UNWANTED_RESPONSE_PATTERN = re.compile('|'.join(re.escape(phrase) for phrase in UNWANTED_RESPONSE_PHRASES))
+META_LINE_PATTERN = re.compile(r'^\s*(?:\*\*)?META(?:\*\*)?\s*:\s*(.*?)\s*$', re.IGNORECASE)
+
+def process_generated_content(text, strip_unwanted=False, include_meta=False, engine=None):
+    """Turn a model response into title, meta description, markdown and HTML in one pass.
+
+    META lines are returned as meta_description and left out of the HTML. With include_meta
+    and no META line, the first long paragraph is used as meta description.
+    """
+    if strip_unwanted:
+        text = UNWANTED_RESPONSE_PATTERN.sub('', text).strip().strip('-').strip()
+
+    title = ''
+    meta_description = ''
+    fallback_meta = ''
+    body_lines = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        meta_match = META_LINE_PATTERN.match(stripped)
+        if meta_match:
+            if not meta_description:
+                meta_description = meta_match.group(1)
+            continue
+
+        if stripped.startswith('# ') and not title:
+            title = stripped[2:].strip()
+        elif not meta_description and 'meta' in stripped.lower() and 'beskrivelse' in stripped.lower() and ':' in stripped:
+            meta_description = stripped.split(':', 1)[1].strip()
+        elif (include_meta and not fallback_meta and stripped and not stripped.startswith('#')
+              and not stripped.startswith('**') and len(stripped) > 50):
+            fallback_meta = stripped[:150] + "..." if len(stripped) > 150 else stripped
+        body_lines.append(line)
+
+    return {
+        'title': title,
+        'meta_description': meta_description or fallback_meta,
+        'markdown': text,
+        'html': render_markdown_html('\n'.join(body_lines), engine)
+    }
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this in production
@@ -52,6 +189,12 @@ Session(app)
 # Global storage for user data (in production, use a proper database)
 user_data = {}
 
+# Long-running jobs (CSV translation etc.) keyed by job id.
+# Keys starting with '_' hold live state and are never serialized to the client.
+background_jobs = {}
+background_jobs_lock = threading.Lock()
+BACKGROUND_JOB_MAX_AGE = 24 * 60 * 60
+
 # File paths for persistent storage
 PROFILES_FILE = 'profiles.pkl'
 SAVED_TEXTS_FILE = 'saved_texts.pkl'
@@ -73,6 +216,16 @@ def ensure_profile_image_dir(profile_name, product_id=None):
     os.makedirs(dir_path, exist_ok=True)
     return dir_path
 
+# Mirrored files recorded on image cache entries: (path relative to the profile dir, URL)
+MIRROR_FILE_FIELDS = [('local_path', 'local_url'), ('thumbnail_path', 'thumbnail_url'), ('webp_path', 'webp_url')]
+
+def profile_image_path(profile_name, path):
+    """Absolute path of a file stored relative to the profile image directory"""
+    if os.path.isabs(path):
+        # Entries written before paths were stored relative
+        return path
+    return os.path.join(PROFILE_IMAGES_DIR, profile_name, *path.split('/'))
+
 def get_cached_images(profile_name, product_id=None):
     """Get cached images for a profile or specific product"""
     try:
@@ -91,17 +244,15 @@ def get_cached_images(profile_name, product_id=None):
             
             print(f"Found cached data with {len(cached_data)} images")
             
-            # For now, return all cached images even if they don't have local files
-            # This allows us to use the cache for image metadata even if files aren't downloaded
+            # Entries whose mirrored files are gone are still returned, without the local
+            # URLs, so the picker falls back to the Shopify src
             valid_images = []
             for img_info in cached_data:
-                local_path = img_info.get("local_path")
-                if local_path and os.path.exists(local_path):
-                    # Image file exists locally
-                    valid_images.append(img_info)
-                elif not local_path:
-                    # No local file, but we have the metadata (URL, etc.)
-                    valid_images.append(img_info)
+                for path_key, url_key in MIRROR_FILE_FIELDS:
+                    path = img_info.get(path_key)
+                    if path and not os.path.exists(profile_image_path(profile_name, path)):
+                        img_info = {key: value for key, value in img_info.items() if key not in (path_key, url_key)}
+                valid_images.append(img_info)
             
             print(f"Returning {len(valid_images)} valid cached images")
             return valid_images
@@ -128,6 +279,85 @@ def save_cached_images(profile_name, images_data, product_id=None):
         print(f"Error saving cached images: {e}")
         return False
 
+IMAGE_CACHE_TTL = int(os.environ.get('IMAGE_CACHE_TTL', 60 * 60))
+IMAGE_CACHE_FULL_SYNC_INTERVAL = 24 * 60 * 60  # incremental syncs can't see deleted products
+IMAGE_CACHE_CLOCK_SKEW = 5 * 60
+
+def load_image_cache_meta(profile_name):
+    """Sync state kept next to all_images_info.json, which stays a plain list"""
+    meta_file = os.path.join(PROFILE_IMAGES_DIR, profile_name, "all_images_meta.json")
+    try:
+        if os.path.exists(meta_file):
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error reading image cache meta: {e}")
+    return {}
+
+def save_image_cache_meta(profile_name, meta):
+    try:
+        cache_dir = ensure_profile_image_dir(profile_name)
+        with open(os.path.join(cache_dir, "all_images_meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        print(f"Error saving image cache meta: {e}")
+        return False
+
+def image_cache_is_stale(meta, ttl=IMAGE_CACHE_TTL):
+    if meta.get('invalidated') or not meta.get('synced_at'):
+        return True
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(meta['synced_at'])
+    return age.total_seconds() > ttl
+
+def read_cached_image_list(profile_name):
+    """all_images_info.json as stored, including entries whose local files are missing"""
+    info_file = os.path.join(PROFILE_IMAGES_DIR, profile_name, "all_images_info.json")
+    try:
+        if os.path.exists(info_file):
+            with open(info_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error reading cached images: {e}")
+    return []
+
+def invalidate_product_images(profile_name, product_id):
+    """Drop a product's own image cache and have the next sync refetch it.
+
+    Holds the profile's cache lock so a sync running meanwhile can't overwrite the invalidation.
+    """
+    with get_image_cache_lock(profile_name):
+        info_file = os.path.join(PROFILE_IMAGES_DIR, profile_name, str(product_id), "images_info.json")
+        if os.path.exists(info_file):
+            os.remove(info_file)
+        meta = load_image_cache_meta(profile_name)
+        invalidated = meta.setdefault('invalidated', [])
+        if str(product_id) not in invalidated:
+            invalidated.append(str(product_id))
+        save_image_cache_meta(profile_name, meta)
+
+def get_cached_products(profile_name):
+    """Get the cached Shopify product list for a profile"""
+    info_file = os.path.join(PROFILE_IMAGES_DIR, profile_name, "products_info.json")
+    try:
+        if os.path.exists(info_file):
+            with open(info_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Error reading cached products: {e}")
+    return []
+
+def save_cached_products(profile_name, products):
+    """Save the Shopify product list for a profile"""
+    try:
+        cache_dir = ensure_profile_image_dir(profile_name)
+        with open(os.path.join(cache_dir, "products_info.json"), 'w', encoding='utf-8') as f:
+            json.dump(products, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        print(f"Error saving cached products: {e}")
+        return False
+
 def save_profiles_to_file(user_session):
     """Save profiles to file"""
     try:
@@ -186,81 +416,130 @@ def load_settings_from_file():
         print(f"Error loading settings: {e}")
     return {}
 
-def filter_blocked_words(text, blocked_words):
-    """Remove blocked words from text while maintaining readability"""
+# Replacements for typical blocked words; anything else becomes the generic alternative
+BLOCKED_WORD_REPLACEMENTS = {
+    'konkurrent': 'anden leverandør',
+    'billig': 'prisvenlig',
+    'billigt': 'prismæssigt attraktivt',
+    'dårlig': 'mindre optimal',
+    'problem': 'udfordring',
+    'fejl': 'uoverensstemmelse',
+    'svindel': 'tvivlsom praksis',
+    'spam': 'uønsket indhold',
+    'scam': 'tvivlsom aktivitet',
+    'bæredygtighed': 'miljøansvar',
+    'bæredygtig': 'miljøvenlig',
+    'bæredyg': 'miljøvenlig',
+    'klima': 'miljø',
+    'klimavenlig': 'miljøvenlig',
+    'skovbrug': 'træforvaltning',
+    'statement piece': 'designelement'
+}
+BLOCKED_WORD_DEFAULT_REPLACEMENT = 'kvalitetselement'
+
+# Compiled blocked-word filters per profile: {profile_name: (words, compiled_filter)}
+blocked_word_filters = {}
+blocked_word_filters_lock = threading.Lock()
+
+# Markup that blocked-word filtering must never rewrite: script/style blocks, HTML tags,
+# markdown link/image targets, bare URLs and HTML entities
+BLOCKED_WORD_PROTECTED_PATTERN = (
+    r'(?P<protected><(?P<raw>script|style)\b.*?</(?P=raw)\s*>|<[^>]+>|\]\([^)]*\)|'
+    r'(?:https?://|www\.)[^\s<>"\')\]]+|&#?\w+;)'
+)
+
+def normalize_blocked_words(blocked_words):
+    """Flatten a blocked-word list or comma separated string into a tuple of unique words"""
+    if not blocked_words:
+        return ()
+    if isinstance(blocked_words, str):
+        blocked_words = [blocked_words]
+
+    words = []
+    seen = set()
+    for item in blocked_words:
+        for word in str(item).split(','):
+            word = word.strip()
+            if word and word.lower() not in seen:
+                seen.add(word.lower())
+                words.append(word)
+    return tuple(words)
+
+def compile_blocked_words(words):
+    """Compile words into one case-insensitive whole-word alternation.
+
+    Longer words come first so multi-word phrases win over their parts.
+    """
+    if not words:
+        return None
+    alternation = '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+    return {
+        'pattern': re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE),
+        # Same alternation, but tags, link targets, URLs and entities match first and are kept
+        'markup_pattern': re.compile(BLOCKED_WORD_PROTECTED_PATTERN + r'|\b(?:' + alternation + r')\b', re.IGNORECASE | re.DOTALL),
+        'replacements': {word.lower(): get_word_replacement(word) for word in words}
+    }
+
+def get_blocked_word_filter(blocked_words, profile_name=None):
+    """Return the compiled filter for blocked_words, cached per profile"""
+    words = normalize_blocked_words(blocked_words)
+    if profile_name is None:
+        return compile_blocked_words(words)
+
+    with blocked_word_filters_lock:
+        cached = blocked_word_filters.get(profile_name)
+        if cached and cached[0] == words:
+            return cached[1]
+
+    compiled = compile_blocked_words(words)
+    with blocked_word_filters_lock:
+        blocked_word_filters[profile_name] = (words, compiled)
+    return compiled
+
+def invalidate_blocked_word_filter(profile_name):
+    with blocked_word_filters_lock:
+        blocked_word_filters.pop(profile_name, None)
+
+def apply_blocked_word_filter(text, word_filter, markup=True):
+    """Replace all blocked words in one pass. Returns (text, stats).
+
+    With markup=True only visible text is touched; HTML tags, markdown link targets and URLs
+    are left as they are, so the result can be rendered without filtering the HTML again.
+    """
+    stats = {'total': 0, 'by_word': {}}
+    if not word_filter or not text:
+        return text, stats
+
+    replacements = word_filter['replacements']
+
+    def replace(match):
+        if markup and match.group('protected'):
+            return match.group()
+        word = match.group().lower()
+        stats['total'] += 1
+        stats['by_word'][word] = stats['by_word'].get(word, 0) + 1
+        return replacements.get(word, BLOCKED_WORD_DEFAULT_REPLACEMENT)
+
+    pattern = word_filter['markup_pattern'] if markup else word_filter['pattern']
+    return pattern.sub(replace, text), stats
+
+def filter_profile_blocked_words(text, profile, context):
+    """Filter the profile's blocked words from generated markdown or HTML.
+
+    Shared by all generation endpoints; filter before rendering and the HTML needs no second pass.
+    """
+    blocked_words = (profile or {}).get('blocked_words', [])
     if not blocked_words or not text:
         return text
-    
-    import re
-    
-    # Handle case where blocked_words might be a single string with commas
-    if isinstance(blocked_words, str):
-        blocked_words = [word.strip() for word in blocked_words.split(',')]
-    elif isinstance(blocked_words, list):
-        # Handle case where list items might contain multiple words separated by commas
-        expanded_words = []
-        for item in blocked_words:
-            if ',' in str(item):
-                expanded_words.extend([word.strip() for word in str(item).split(',')])
-            else:
-                expanded_words.append(str(item).strip())
-        blocked_words = expanded_words
-    
-    print(f"DEBUG: Processing blocked words: {blocked_words}")
-    
-    # Create case-insensitive pattern for each blocked word
-    filtered_text = text
-    words_found = []
-    
-    for blocked_word in blocked_words:
-        if not blocked_word.strip():
-            continue
-            
-        # Create pattern that matches whole words only (not parts of words)
-        pattern = r'\b' + re.escape(blocked_word.strip()) + r'\b'
-        
-        # Find matches (case-insensitive)
-        matches = re.finditer(pattern, filtered_text, re.IGNORECASE)
-        match_found = False
-        
-        for match in matches:
-            match_found = True
-            words_found.append(match.group())
-        
-        if match_found:
-            # Replace with alternative phrasing or remove
-            replacement = get_word_replacement(blocked_word.strip())
-            filtered_text = re.sub(pattern, replacement, filtered_text, flags=re.IGNORECASE)
-    
-    if words_found:
-        print(f"⚠️ Filtered blocked words: {words_found}")
-    
+
+    filtered_text, stats = apply_blocked_word_filter(text, get_blocked_word_filter(blocked_words, profile.get('name')))
+    if stats['total']:
+        print(f"✅ {context}: Filtered blocked words {stats['by_word']}")
     return filtered_text
 
 def get_word_replacement(blocked_word):
     """Get appropriate replacement for blocked words"""
-    # Common replacements for typical blocked words
-    replacements = {
-        'konkurrent': 'anden leverandør',
-        'billig': 'prisvenlig',
-        'billigt': 'prismæssigt attraktivt',
-        'dårlig': 'mindre optimal',
-        'problem': 'udfordring',
-        'fejl': 'uoverensstemmelse',
-        'svindel': 'tvivlsom praksis',
-        'spam': 'uønsket indhold',
-        'scam': 'tvivlsom aktivitet',
-        'bæredygtighed': 'miljøansvar',
-        'bæredygtig': 'miljøvenlig',
-        'bæredyg': 'miljøvenlig',
-        'klima': 'miljø',
-        'klimavenlig': 'miljøvenlig',
-        'skovbrug': 'træforvaltning',
-        'statement piece': 'designelement'
-    }
-    
-    # Return specific replacement if available, otherwise return generic alternative
-    return replacements.get(blocked_word.lower(), 'kvalitetselement')
+    return BLOCKED_WORD_REPLACEMENTS.get(blocked_word.lower(), BLOCKED_WORD_DEFAULT_REPLACEMENT)
 
 def create_image_alt_text(title):
     """Create SEO-optimized alt text from article title"""
@@ -274,6 +553,45 @@ def create_image_alt_text(title):
     # Create descriptive alt text
     return f"Guide til {short_title.lower()}"
 
+def create_background_job(kind, user_id, **fields):
+    """Register a new background job and return its state dict"""
+    now = time.time()
+    job = {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'user_id': user_id,
+        'status': 'running',
+        'created_at': datetime.now().isoformat(),
+        'finished_at': None,
+        '_created': now,
+        '_lock': threading.Lock()
+    }
+    job.update(fields)
+
+    with background_jobs_lock:
+        # Drop finished jobs older than the max age so their data can be freed
+        for job_id in [job_id for job_id, old_job in background_jobs.items()
+                       if old_job['status'] != 'running' and now - old_job['_created'] > BACKGROUND_JOB_MAX_AGE]:
+            del background_jobs[job_id]
+        background_jobs[job['id']] = job
+
+    return job
+
+def get_background_job(job_id, kind=None):
+    """Get a job owned by the current session user, or None"""
+    job = background_jobs.get(job_id)
+    if not job or job['user_id'] != session.get('user_id'):
+        return None
+    if kind and job['kind'] != kind:
+        return None
+    return job
+
+def serialize_background_job(job):
+    """JSON-safe view of a job without its live state"""
+    with job['_lock']:
+        return {key: value.copy() if isinstance(value, (dict, list)) else value
+                for key, value in job.items() if not key.startswith('_') and key != 'user_id'}
+
 def get_user_session():
     """Get or create user session data"""
     if 'user_id' not in session:
@@ -286,9 +604,14 @@ def get_user_session():
         profiles = load_profiles_from_file()
         
         # Ensure each profile has saved_texts initialized
+        backfilled = False
         for profile_name, profile_data in profiles.items():
             if 'saved_texts' not in profile_data:
                 profile_data['saved_texts'] = {}
+            # Texts saved before HTML was stored get it once, here at load time
+            for text_data in profile_data['saved_texts'].values():
+                if isinstance(text_data, dict) and ensure_saved_text_html(text_data):
+                    backfilled = True
         
         user_data[user_id] = {
             'profiles': profiles,
@@ -297,6 +620,8 @@ def get_user_session():
             'api_key': saved_settings.get('api_key'),
             'shopify_credentials': saved_settings.get('shopify_credentials', {})
         }
+        if backfilled:
+            save_profiles_to_file(user_data[user_id])
     
     return user_data[user_id]
 
@@ -374,6 +699,7 @@ def delete_profile(profile_name):
         return jsonify({'error': 'Profile not found'}), 404
     
     del profiles[profile_name]
+    invalidate_blocked_word_filter(profile_name)
     user_session['profiles'] = profiles
     save_profiles_to_file(user_session)
     
@@ -410,6 +736,7 @@ def update_profile(profile_name):
     print(f"Updated profile data: {profiles[profile_name]}")
     print(f"Shopify credentials: store_url='{profiles[profile_name]['shopify_store_url']}', api_token='{profiles[profile_name]['shopify_api_token'][:10] if profiles[profile_name]['shopify_api_token'] else 'EMPTY'}...', api_version='{profiles[profile_name]['shopify_api_version']}'")
     
+    invalidate_blocked_word_filter(profile_name)
     user_session['profiles'] = profiles
     save_profiles_to_file(user_session)
     
@@ -578,49 +905,602 @@ def delete_profile_product(profile_name, product_index):
     save_profiles_to_file(user_session)
     return jsonify({'message': 'Product deleted successfully'})
 
+# URL ingestion: shared connection pool, bounded concurrency per host and an overall deadline
+URL_FETCH_MAX_WORKERS = 8
+URL_FETCH_PER_HOST = 2
+URL_FETCH_TIMEOUT = 10
+URL_FETCH_DEADLINE = 30
+URL_FETCH_HEADERS = {'User-Agent': 'SEO Generator Web App/1.0'}
+
+url_fetch_session = None
+url_fetch_lock = threading.Lock()
+url_fetch_host_limits = {}
+
+def get_url_fetch_session():
+    """Keep-alive session shared by all URL fetches"""
+    global url_fetch_session
+    with url_fetch_lock:
+        if url_fetch_session is None:
+            http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=URL_FETCH_MAX_WORKERS * 2,
+                                                    pool_maxsize=URL_FETCH_MAX_WORKERS * 2)
+            http_session.mount('http://', adapter)
+            http_session.mount('https://', adapter)
+            http_session.headers.update(URL_FETCH_HEADERS)
+            url_fetch_session = http_session
+        return url_fetch_session
+
+def get_url_host_limit(url):
+    host = urlparse(url).netloc.lower()
+    with url_fetch_lock:
+        if host not in url_fetch_host_limits:
+            url_fetch_host_limits[host] = threading.BoundedSemaphore(URL_FETCH_PER_HOST)
+        return url_fetch_host_limits[host]
+
+URL_FETCH_MAX_BYTES = 512 * 1024
+URL_FETCH_CHUNK_SIZE = 16 * 1024
+HTML_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+# Complete closing tags only, so </header>, </pre> and </picture> don't count
+HTML_HEAD_END_PATTERN = re.compile(rb'</head\s*>')
+HTML_PARAGRAPH_END_PATTERN = re.compile(rb'</p\s*>')
+
+def read_html_head(response, max_bytes=URL_FETCH_MAX_BYTES):
+    """Read a streamed response until </head> has arrived (and the first </p> too, unless the
+    head has a meta description), or max_bytes. Returns the decoded text"""
+    buffer = bytearray()
+    head_end = -1
+    try:
+        for chunk in response.iter_content(URL_FETCH_CHUNK_SIZE):
+            # Search from a little before the new chunk in case a marker spans two chunks
+            search_from = max(0, len(buffer) - 8)
+            buffer.extend(chunk)
+            lowered = bytes(buffer[search_from:]).lower()
+            if head_end < 0:
+                match = HTML_HEAD_END_PATTERN.search(lowered)
+                if match:
+                    head_end = search_from + match.start()
+                    head = bytes(buffer[:head_end]).lower()
+                    if b'name="description"' in head or b"name='description'" in head:
+                        break
+            if head_end >= 0 and HTML_PARAGRAPH_END_PATTERN.search(lowered, max(0, head_end - search_from)):
+                break
+            if len(buffer) >= max_bytes:
+                break
+    finally:
+        response.close()
+
+    charset = None
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset=' in content_type:
+        charset = content_type.split('charset=', 1)[1].split(';')[0].strip().strip('"\'')
+    else:
+        match = HTML_CHARSET_PATTERN.search(bytes(buffer[:4096]))
+        if match:
+            charset = match.group(1).decode('ascii', 'ignore')
+    try:
+        return bytes(buffer).decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return bytes(buffer).decode('utf-8', errors='replace')
+
+def find_json_ld_product(data):
+    """Return the first schema.org Product in parsed JSON-LD (object, list or @graph)"""
+    if isinstance(data, list):
+        for item in data:
+            product = find_json_ld_product(item)
+            if product:
+                return product
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    types = data.get('@type')
+    if types == 'Product' or (isinstance(types, list) and 'Product' in types):
+        return data
+    return find_json_ld_product(data.get('@graph', []))
+
+def summarize_json_ld_product(product):
+    offers = product.get('offers') or {}
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    brand = product.get('brand')
+    image = product.get('image')
+    return {key: value for key, value in {
+        'name': product.get('name'),
+        'description': product.get('description'),
+        'sku': product.get('sku'),
+        'brand': brand.get('name') if isinstance(brand, dict) else brand,
+        'image': image[0] if isinstance(image, list) and image else image,
+        'price': offers.get('price') if isinstance(offers, dict) else None,
+        'currency': offers.get('priceCurrency') if isinstance(offers, dict) else None,
+        'availability': offers.get('availability') if isinstance(offers, dict) else None
+    }.items() if value}
+
+# lxml is optional; it parses several times faster than the stdlib parser
+try:
+    import lxml  # noqa: F401
+    FAST_HTML_PARSER = 'lxml'
+except ImportError:
+    FAST_HTML_PARSER = 'html.parser'
+
+def extract_page_info(html, url):
+    """Extract name, description, og:* tags and JSON-LD Product data from the start of a page"""
+    from bs4 import SoupStrainer
+    
+    strainer = SoupStrainer(['title', 'meta', 'script', 'p'])
+    soup = BeautifulSoup(html, FAST_HTML_PARSER, parse_only=strainer)
+    
+    og = {}
+    for tag in soup.find_all('meta', attrs={'property': re.compile(r'^og:')}):
+        if tag.get('content'):
+            og.setdefault(tag['property'][3:], tag['content'].strip())
+    
+    product_data = None
+    for script in soup.find_all('script', attrs={'type': 'application/ld+json'}):
+        try:
+            product = find_json_ld_product(json.loads(script.string or ''))
+        except ValueError:
+            continue
+        if product:
+            product_data = summarize_json_ld_product(product)
+            break
+    
+    # Extract title
+    title_tag = soup.find('title')
+    title = title_tag.text.strip() if title_tag and title_tag.text.strip() else og.get('title', 'Unknown Product')
+    
+    # Extract description
+    desc_tag = soup.find('meta', attrs={'name': 'description'})
+    description = desc_tag.get('content', '').strip() if desc_tag else ''
+    description = description or og.get('description', '') or (product_data or {}).get('description', '')
+    
+    # If no meta description, try to get first paragraph
+    if not description:
+        p_tag = soup.find('p')
+        description = p_tag.text.strip()[:200] + '...' if p_tag else ''
+    
+    info = {
+        'name': title,
+        'url': url,
+        'description': description
+    }
+    if og:
+        info['og'] = og
+    if product_data:
+        info['product_data'] = product_data
+    return info
+
+# On-disk cache of extracted page info, revalidated with ETag/Last-Modified
+URL_CACHE_DIR = os.path.join(os.path.dirname(PROFILE_IMAGES_DIR), "url_cache")
+URL_CACHE_TTL = int(os.environ.get('URL_CACHE_TTL', 6 * 60 * 60))
+url_cache_stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'bypassed': 0}
+url_cache_stats_lock = threading.Lock()
+
+def count_url_cache(stat):
+    with url_cache_stats_lock:
+        url_cache_stats[stat] += 1
+
+def url_cache_path(url):
+    return os.path.join(URL_CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+def load_url_cache_entry(url):
+    try:
+        with open(url_cache_path(url), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        return entry if entry.get('url') == url else None
+    except (OSError, ValueError):
+        return None
+
+def save_url_cache_entry(entry):
+    try:
+        os.makedirs(URL_CACHE_DIR, exist_ok=True)
+        path = url_cache_path(entry['url'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        count_url_cache('stored')
+    except OSError as e:
+        print(f"Error saving URL cache entry: {e}")
+
+def url_cache_lifetime(headers, ttl):
+    """Return (seconds the response stays fresh, whether it may be stored) from Cache-Control"""
+    directives = {}
+    for part in headers.get('Cache-Control', '').lower().split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name] = value.strip('"')
+    
+    if 'no-store' in directives:
+        return 0, False
+    if 'no-cache' in directives:
+        return 0, True
+    if 'max-age' in directives:
+        try:
+            return max(0, int(directives['max-age'])), True
+        except ValueError:
+            pass
+    return ttl, True
+
+def extract_url_info(url, timeout=URL_FETCH_TIMEOUT, use_cache=True, ttl=None, deadline_at=None):
+    """Fetch the head of a product page and return {'name', 'url', 'description', ...}.
+
+    Results are cached on disk; stale entries are revalidated with a conditional request.
+    With deadline_at (a time.time() value) the wait for a per-host slot and the request
+    itself end by then, and the URL is skipped with TimeoutError if no slot freed up.
+    """
+    ttl = URL_CACHE_TTL if ttl is None else ttl
+    entry = load_url_cache_entry(url) if use_cache else None
+    if not use_cache:
+        count_url_cache('bypassed')
+    
+    if entry and time.time() < entry.get('expires_at', 0):
+        count_url_cache('hits')
+        return {**entry['info'], 'cache': 'hit'}
+    
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    
+    host_limit = get_url_host_limit(url)
+    if deadline_at is None:
+        host_limit.acquire()
+    else:
+        remaining = deadline_at - time.time()
+        if remaining <= 0 or not host_limit.acquire(timeout=remaining):
+            raise TimeoutError('Tidsgrænsen for hentning blev overskredet')
+        timeout = min(timeout, deadline_at - time.time())
+        if timeout <= 0:
+            host_limit.release()
+            raise TimeoutError('Tidsgrænsen for hentning blev overskredet')
+    try:
+        response = get_url_fetch_session().get(url, timeout=timeout, stream=True, headers=headers)
+        if response.status_code == 304 and entry:
+            response.close()
+            lifetime, storable = url_cache_lifetime(response.headers, ttl)
+            entry['expires_at'] = time.time() + lifetime
+            entry['etag'] = response.headers.get('ETag', entry.get('etag'))
+            if storable:
+                save_url_cache_entry(entry)
+            count_url_cache('revalidated')
+            return {**entry['info'], 'cache': 'revalidated'}
+        html = read_html_head(response)
+    finally:
+        host_limit.release()
+    
+    info = extract_page_info(html, url)
+    if use_cache:
+        count_url_cache('misses')
+        lifetime, storable = url_cache_lifetime(response.headers, ttl)
+        # Error pages are returned as before but never cached
+        if storable and response.status_code == 200:
+            save_url_cache_entry({
+                'url': url,
+                'info': info,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': time.time(),
+                'expires_at': time.time() + lifetime
+            })
+    return {**info, 'cache': 'miss'}
+
+def url_fetch_error(url, error):
+    return {
+        'name': f'Error fetching: {url}',
+        'url': url,
+        'description': f'Error: {error}',
+        'error': str(error)
+    }
+
+def interleave_urls_by_host(urls):
+    """Order (index, url) pairs round-robin across hosts so one big host can't starve the rest"""
+    by_host = {}
+    for index, url in enumerate(urls):
+        by_host.setdefault(urlparse(url).netloc.lower(), []).append((index, url))
+    queues = list(by_host.values())
+    ordered = []
+    while queues:
+        ordered.extend(queue.pop(0) for queue in queues)
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+def fetch_url_infos(urls, deadline=URL_FETCH_DEADLINE, fetch=None):
+    """Fetch urls concurrently and yield (index, result) in completion order.
+
+    URLs still running when the deadline passes are reported as errors.
+    """
+    from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
+
+    fetch = fetch or extract_url_info
+    started = time.time()
+
+    def run(url):
+        remaining = deadline - (time.time() - started)
+        if remaining <= 0:
+            raise TimeoutError('Tidsgrænsen for hentning blev overskredet')
+        # Workers still queued for a host slot give up at the deadline instead of fetching
+        # results that are thrown away after shutdown(wait=False)
+        return fetch(url, timeout=min(URL_FETCH_TIMEOUT, remaining), deadline_at=started + deadline)
+
+    executor = ThreadPoolExecutor(max_workers=min(URL_FETCH_MAX_WORKERS, max(1, len(urls))))
+    futures = {executor.submit(run, url): (index, url) for index, url in interleave_urls_by_host(urls)}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            index, url = futures.pop(future)
+            try:
+                yield index, future.result()
+            except Exception as e:
+                yield index, url_fetch_error(url, e)
+    except FuturesTimeoutError:
+        for future, (index, url) in futures.items():
+            future.cancel()
+            yield index, url_fetch_error(url, 'Tidsgrænsen for hentning blev overskredet')
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 @app.route('/api/fetch-url-info', methods=['POST'])
 def fetch_url_info():
-    """Fetch product information from URLs"""
+    """Fetch product information from URLs.
+
+    With "stream": true (or Accept: application/x-ndjson) results are streamed as NDJSON
+    lines in completion order; otherwise they are returned together in input order.
+    """
     data = request.json
-    urls = data.get('urls', '').strip().split('\n')
+    urls = data.get('urls', '')
+    if isinstance(urls, str):
+        urls = urls.strip().split('\n')
+    urls = [url.strip() for url in urls if url and url.strip()]
+    
+    try:
+        deadline = min(float(data.get('deadline', URL_FETCH_DEADLINE)), URL_FETCH_DEADLINE * 4)
+    except (TypeError, ValueError):
+        deadline = URL_FETCH_DEADLINE
     
-    results = []
-    for url in urls:
-        url = url.strip()
-        if not url:
+    use_cache = data.get('cache', True) is not False
+    try:
+        ttl = int(data['cache_ttl']) if data.get('cache_ttl') is not None else None
+    except (TypeError, ValueError):
+        ttl = None
+    
+    def fetch(url, timeout, deadline_at=None):
+        return extract_url_info(url, timeout=timeout, use_cache=use_cache, ttl=ttl, deadline_at=deadline_at)
+    
+    if data.get('stream') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def generate():
+            for index, result in fetch_url_infos(urls, deadline, fetch):
+                yield json.dumps({'index': index, **result}, ensure_ascii=False) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    results = [None] * len(urls)
+    for index, result in fetch_url_infos(urls, deadline, fetch):
+        results[index] = result
+    
+    return jsonify({'products': results})
+
+# Sitemap product discovery
+SITEMAP_MAX_DEPTH = 3
+SITEMAP_MAX_BYTES = 10 * 1024 * 1024
+SITEMAP_MAX_PRODUCTS = 200
+SITEMAP_DEADLINE = 120
+SITEMAP_MIN_REQUEST_INTERVAL = 0.25
+SITEMAP_NAMESPACE_PATTERN = re.compile(r'^\{[^}]*\}')
+
+def fetch_robots_rules(base_url):
+    """Return a RobotFileParser for the site, allowing everything if robots.txt can't be read"""
+    from urllib.robotparser import RobotFileParser
+    
+    rules = RobotFileParser()
+    try:
+        response = get_url_fetch_session().get(f"{base_url}/robots.txt", timeout=URL_FETCH_TIMEOUT)
+        rules.parse(response.text.splitlines() if response.status_code == 200 else [])
+    except requests.RequestException as e:
+        print(f"Could not read robots.txt for {base_url}: {e}")
+        rules.parse([])
+    return rules
+
+SITEMAP_DTD_PATTERN = re.compile(r'<!\s*(?:DOCTYPE|ENTITY)', re.IGNORECASE)
+
+def parse_sitemap(xml_bytes):
+    """Return (child_sitemaps, [(url, image_title)]) from a sitemap index or urlset.
+
+    Sitemaps come from arbitrary sites, so documents with a DTD (entity expansion, "billion
+    laughs") are rejected before parsing. Sitemaps must be UTF-8, which also rules out
+    UTF-16/32 documents hiding a DTD from the check.
+    """
+    import xml.etree.ElementTree as ET
+    
+    text = xml_bytes.decode('utf-8')
+    if '\x00' in text or SITEMAP_DTD_PATTERN.search(text):
+        raise ValueError('Sitemap contains a DTD or is not UTF-8')
+    root = ET.fromstring(xml_bytes)
+    children = []
+    urls = []
+    for node in root:
+        tag = SITEMAP_NAMESPACE_PATTERN.sub('', node.tag)
+        fields = {}
+        for child in node.iter():
+            name = SITEMAP_NAMESPACE_PATTERN.sub('', child.tag)
+            if child.text and child.text.strip() and name not in fields:
+                fields[name] = child.text.strip()
+        if not fields.get('loc'):
             continue
-            
+        if tag == 'sitemap':
+            children.append(fields['loc'])
+        elif tag == 'url':
+            # Shopify product sitemaps carry the product title as <image:title>
+            urls.append((fields['loc'], fields.get('title')))
+    return children, urls
+
+def collect_sitemap_urls(sitemap_url, robots, deadline_at, sitemaps_read):
+    """Walk a sitemap and nested indexes. Shopify indexes are narrowed to sitemap_products_*"""
+    queue = [(sitemap_url, 0)]
+    seen = set()
+    found = []
+    while queue and time.time() < deadline_at:
+        current, depth = queue.pop(0)
+        if current in seen or depth > SITEMAP_MAX_DEPTH or not robots.can_fetch(URL_FETCH_HEADERS['User-Agent'], current):
+            continue
+        seen.add(current)
+        
         try:
-            response = requests.get(url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title_tag = soup.find('title')
-            title = title_tag.text.strip() if title_tag else 'Unknown Product'
-            
-            # Extract description
-            desc_tag = soup.find('meta', attrs={'name': 'description'})
-            description = desc_tag.get('content', '').strip() if desc_tag else ''
-            
-            # If no meta description, try to get first paragraph
-            if not description:
-                p_tag = soup.find('p')
-                description = p_tag.text.strip()[:200] + '...' if p_tag else ''
-            
-            results.append({
-                'name': title,
-                'url': url,
-                'description': description
-            })
-            
+            response = get_url_fetch_session().get(current, timeout=URL_FETCH_TIMEOUT, stream=True)
+            response.raise_for_status()
+            content = response.raw.read(SITEMAP_MAX_BYTES, decode_content=True)
+            response.close()
+            children, urls = parse_sitemap(content)
         except Exception as e:
-            results.append({
-                'name': f'Error fetching: {url}',
-                'url': url,
-                'description': f'Error: {str(e)}'
-            })
+            print(f"Error reading sitemap {current}: {e}")
+            continue
+        
+        sitemaps_read.append(current)
+        product_children = [child for child in children if 'sitemap_products_' in child]
+        queue.extend((child, depth + 1) for child in (product_children or children))
+        found.extend(urls)
+    return found
+
+def make_polite_fetch(min_interval, use_cache=True):
+    """Wrap extract_url_info so requests to a host start at least min_interval apart"""
+    next_slot = {}
+    lock = threading.Lock()
+    
+    def fetch(url, timeout, deadline_at=None):
+        host = urlparse(url).netloc.lower()
+        with lock:
+            now = time.time()
+            start = max(now, next_slot.get(host, now))
+            next_slot[host] = start + min_interval
+        if deadline_at is not None and start >= deadline_at:
+            raise TimeoutError('Tidsgrænsen for hentning blev overskredet')
+        if start > now:
+            time.sleep(start - now)
+        return extract_url_info(url, timeout=timeout, use_cache=use_cache, deadline_at=deadline_at)
+    return fetch
+
+def discovered_product_name(info, image_title=None):
+    """Prefer structured product names over the page <title>, which usually has the shop name"""
+    return ((info.get('product_data') or {}).get('name') or (info.get('og') or {}).get('title')
+            or image_title or info.get('name', '')).strip()
+
+@app.route('/api/profiles/<profile_name>/products/discover', methods=['POST'])
+def discover_profile_products(profile_name):
+    """Discover products from a store's sitemap and add the new ones to the profile in one write"""
+    data = request.json or {}
+    user_session = get_user_session()
     
-    return jsonify({'products': results})
+    if profile_name not in user_session['profiles']:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    sitemap_url = (data.get('sitemap_url') or data.get('url') or user_session['profiles'][profile_name].get('url') or '').strip()
+    if not sitemap_url:
+        return jsonify({'error': 'Sitemap URL is required'}), 400
+    if not sitemap_url.startswith(('http://', 'https://')):
+        sitemap_url = f"https://{sitemap_url}"
+    parsed = urlparse(sitemap_url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
+    if not parsed.path.lower().endswith('.xml'):
+        sitemap_url = f"{base_url}/sitemap.xml"
+    
+    try:
+        max_products = min(max(int(data.get('max_products', SITEMAP_MAX_PRODUCTS)), 1), 1000)
+        deadline = min(max(float(data.get('deadline', SITEMAP_DEADLINE)), 1), 600)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid max_products or deadline'}), 400
+    deadline_at = time.time() + deadline
+    
+    robots = fetch_robots_rules(base_url)
+    crawl_delay = robots.crawl_delay(URL_FETCH_HEADERS['User-Agent'])
+    min_interval = max(SITEMAP_MIN_REQUEST_INTERVAL, float(crawl_delay or 0))
+    
+    sitemaps_read = []
+    entries = collect_sitemap_urls(sitemap_url, robots, deadline_at, sitemaps_read)
+    if not sitemaps_read:
+        return jsonify({'error': f'Could not read sitemap: {sitemap_url}'}), 400
+    
+    # Only product pages when the sitemap has them (Shopify /products/ URLs)
+    if any('/products/' in url for url, _ in entries):
+        entries = [(url, title) for url, title in entries if '/products/' in url]
+    
+    products = user_session['profiles'][profile_name]['products']
+    known_names = {product.get('name', '').strip().lower() for product in products}
+    known_urls = {product.get('url', '').strip().rstrip('/').lower() for product in products if product.get('url')}
+    
+    candidates = []
+    image_titles = {}
+    disallowed = 0
+    skipped_duplicates = 0
+    for url, image_title in entries:
+        key = url.rstrip('/').lower()
+        if key in known_urls:
+            skipped_duplicates += 1
+            continue
+        if not robots.can_fetch(URL_FETCH_HEADERS['User-Agent'], url):
+            disallowed += 1
+            continue
+        known_urls.add(key)
+        image_titles[url] = image_title
+        candidates.append(url)
+    candidates = candidates[:max_products]
+    
+    remaining = max(1, deadline_at - time.time())
+    new_products = []
+    errors = []
+    fetch = make_polite_fetch(min_interval, use_cache=data.get('cache', True) is not False)
+    for index, info in fetch_url_infos(candidates, remaining, fetch):
+        if info.get('error'):
+            errors.append({'url': info['url'], 'error': info['error']})
+            continue
+        name = discovered_product_name(info, image_titles.get(info['url']))
+        if not name or name.lower() in known_names:
+            skipped_duplicates += 1
+            continue
+        known_names.add(name.lower())
+        new_products.append({
+            'name': name,
+            'url': info['url'],
+            'description': info.get('description', '')
+        })
+    
+    if new_products and not data.get('dry_run'):
+        products.extend(new_products)
+        save_profiles_to_file(user_session)
+    
+    return jsonify({
+        'message': f'{len(new_products)} products discovered',
+        'added': 0 if data.get('dry_run') else len(new_products),
+        'products': new_products,
+        'skipped_duplicates': skipped_duplicates,
+        'disallowed': disallowed,
+        'errors': errors,
+        'sitemaps_read': sitemaps_read,
+        'urls_in_sitemaps': len(entries),
+        'crawl_delay': min_interval
+    })
+
+@app.route('/api/url-cache', methods=['GET'])
+def get_url_cache_stats():
+    """URL cache hit/miss statistics and size on disk"""
+    entries = 0
+    size = 0
+    if os.path.isdir(URL_CACHE_DIR):
+        for entry in os.scandir(URL_CACHE_DIR):
+            if entry.name.endswith('.json'):
+                entries += 1
+                size += entry.stat().st_size
+    with url_cache_stats_lock:
+        stats = dict(url_cache_stats)
+    return jsonify({'stats': stats, 'entries': entries, 'size_bytes': size, 'ttl': URL_CACHE_TTL})
+
+@app.route('/api/url-cache', methods=['DELETE'])
+def clear_url_cache():
+    """Remove all cached URL info"""
+    removed = 0
+    if os.path.isdir(URL_CACHE_DIR):
+        for entry in os.scandir(URL_CACHE_DIR):
+            if entry.name.endswith('.json'):
+                os.remove(entry.path)
+                removed += 1
+    return jsonify({'message': f'{removed} cachede URL\'er fjernet', 'removed': removed})
 
 @app.route('/api/generate-seo', methods=['POST'])
 def generate_seo():
@@ -760,23 +1640,10 @@ def generate_seo():
         
         # CRITICAL: Filter blocked words from legacy generate_seo content
         if profile_name and profile_name in user_session.get('profiles', {}):
-            profile = user_session['profiles'][profile_name]
-            blocked_words = profile.get('blocked_words', [])
-            if blocked_words:
-                generated_text = filter_blocked_words(generated_text, blocked_words)
-                print(f"✅ Legacy SEO: Blocked words filtered from generated text")
+            generated_text = filter_profile_blocked_words(generated_text, user_session['profiles'][profile_name], 'Legacy SEO')
         
         # Convert to HTML using markdown with same extensions as old app
-        raw_html = markdown.markdown(generated_text, extensions=['tables', 'nl2br'])
-        html_content = clean_html_output(raw_html)
-        
-        # DOUBLE CHECK: Also filter blocked words from HTML content
-        if profile_name and profile_name in user_session.get('profiles', {}):
-            profile = user_session['profiles'][profile_name]
-            blocked_words = profile.get('blocked_words', [])
-            if blocked_words:
-                html_content = filter_blocked_words(html_content, blocked_words)
-                print(f"✅ Legacy SEO: Blocked words filtered from HTML content")
+        html_content = process_generated_content(generated_text)['html']
         
         # Debug: Print the generated text and HTML
         print(f"=== DEBUG: Generated Text ===")
@@ -794,6 +1661,20 @@ def generate_seo():
         print(f"Error in SEO generation: {str(e)}")  # Debug log
         return jsonify({'error': f'Error generating content: {str(e)}'}), 500
 
+HTML_CONTENT_PATTERN = re.compile(r'^\s*<[a-zA-Z!]')
+
+def ensure_saved_text_html(text_data):
+    """Store rendered HTML and the content hash on a saved text. Returns True if it changed"""
+    content = text_data.get('content') or ''
+    current_hash = content_hash(content)
+    if text_data.get('content_hash') == current_hash and 'html' in text_data:
+        return False
+
+    # Most texts are saved from the editor as HTML already; only markdown needs rendering
+    text_data['html'] = content if HTML_CONTENT_PATTERN.match(content) else render_markdown_html(content)
+    text_data['content_hash'] = current_hash
+    return True
+
 @app.route('/api/save-text', methods=['POST'])
 def save_text():
     """Save generated text with separate title, meta and body like the old code"""
@@ -834,6 +1715,7 @@ def save_text():
         'category': data.get('category', ''),
         'featured_image_url': data.get('featured_image_url', None)
     }
+    ensure_saved_text_html(user_session['profiles'][current_profile]['saved_texts'][text_name])
     
     save_profiles_to_file(user_session)
     return jsonify({'message': 'Text saved successfully'})
@@ -883,6 +1765,7 @@ def auto_save_text():
             'keywords': '',
             'category': ''
         }
+    ensure_saved_text_html(saved_texts[text_name])
     
     save_profiles_to_file(user_session)
     return jsonify({'message': 'Text auto-saved successfully'})
@@ -897,25 +1780,58 @@ def get_saved_texts():
         return jsonify({'saved_texts': {}})
     
     profile_texts = user_session['profiles'][current_profile].get('saved_texts', {})
-    return jsonify({'saved_texts': profile_texts})
+    
+    # The rendered HTML is fetched per text (GET /api/saved-texts/<name>) to keep the list small
+    listed = {
+        name: {key: value for key, value in text_data.items() if key != 'html'} if isinstance(text_data, dict) else text_data
+        for name, text_data in profile_texts.items()
+    }
+    return jsonify({'saved_texts': listed})
 
-@app.route('/api/saved-texts/<text_name>', methods=['DELETE'])
-def delete_saved_text(text_name):
-    """Delete a saved text from current profile"""
+@app.route('/api/saved-texts/<text_name>', methods=['GET'])
+def get_saved_text(text_name):
+    """Get one saved text from current profile, including its rendered HTML"""
     user_session = get_user_session()
     current_profile = user_session.get('current_profile')
     
     if not current_profile or current_profile not in user_session['profiles']:
         return jsonify({'error': 'No profile selected'}), 400
     
-    profile_texts = user_session['profiles'][current_profile].get('saved_texts', {})
-    
-    if text_name not in profile_texts:
+    text_data = user_session['profiles'][current_profile].get('saved_texts', {}).get(text_name)
+    if not isinstance(text_data, dict):
         return jsonify({'error': 'Text not found'}), 404
     
-    del user_session['profiles'][current_profile]['saved_texts'][text_name]
-    save_profiles_to_file(user_session)
-    return jsonify({'message': 'Text deleted successfully'})
+    ensure_saved_text_html(text_data)
+    return jsonify({'text': text_data})
+
+@app.route('/api/render-cache/stats', methods=['GET'])
+def get_render_cache_stats():
+    """Markdown render cache size and hit/miss counters"""
+    with markdown_render_cache_lock:
+        return jsonify({
+            'size': len(markdown_render_cache),
+            'max_size': MARKDOWN_RENDER_CACHE_SIZE,
+            'engine': MARKDOWN_ENGINE,
+            **markdown_render_cache_stats
+        })
+
+@app.route('/api/saved-texts/<text_name>', methods=['DELETE'])
+def delete_saved_text(text_name):
+    """Delete a saved text from current profile"""
+    user_session = get_user_session()
+    current_profile = user_session.get('current_profile')
+    
+    if not current_profile or current_profile not in user_session['profiles']:
+        return jsonify({'error': 'No profile selected'}), 400
+    
+    profile_texts = user_session['profiles'][current_profile].get('saved_texts', {})
+    
+    if text_name not in profile_texts:
+        return jsonify({'error': 'Text not found'}), 404
+    
+    del user_session['profiles'][current_profile]['saved_texts'][text_name]
+    save_profiles_to_file(user_session)
+    return jsonify({'message': 'Text deleted successfully'})
 
 @app.route('/api/settings', methods=['GET'])
 def get_settings():
@@ -1153,35 +2069,15 @@ def revision_request():
         user_session = get_user_session()
         current_profile = user_session.get('current_profile')
         if current_profile and current_profile in user_session.get('profiles', {}):
-            profile = user_session['profiles'][current_profile]
-            blocked_words = profile.get('blocked_words', [])
-            if blocked_words:
-                revised_text = filter_blocked_words(revised_text, blocked_words)
-                print(f"✅ Revision: Blocked words filtered from revised text")
-        
-        # Clean up any unwanted AI responses
-        # Remove common AI prefixes/suffixes
-        unwanted_phrases = [
-            "Her er den reviderede tekst:",
-            "Her er teksten:",
-            "Jeg håber, at dette opfylder dine behov",
-            "Lad mig vide, hvis der er behov for yderligere ændringer",
-            "---",
-            "Her er resultatet:",
-            "Her er den omskrevne version:",
-            "Den reviderede tekst:"
-        ]
-        
-        for phrase in unwanted_phrases:
-            revised_text = revised_text.replace(phrase, "").strip()
+            revised_text = filter_profile_blocked_words(revised_text, user_session['profiles'][current_profile], 'Revision')
         
-        # Remove multiple dashes at start/end
-        revised_text = revised_text.strip("-").strip()
+        # Clean up any unwanted AI responses (common prefixes/suffixes) and render
+        processed = process_generated_content(revised_text, strip_unwanted=True)
         
         return jsonify({
             'success': True,
-            'revised_text': revised_text,
-            'revised_html': clean_html_output(markdown.markdown(revised_text, extensions=['tables', 'nl2br']))
+            'revised_text': processed['markdown'],
+            'revised_html': processed['html']
         })
         
     except Exception as e:
@@ -1236,7 +2132,7 @@ def generate_seo_variations():
             
             variations.append({
                 'text': response.choices[0].message.content,
-                'html': clean_html_output(markdown.markdown(response.choices[0].message.content, extensions=['tables', 'nl2br']))
+                'html': process_generated_content(response.choices[0].message.content)['html']
             })
         
         return jsonify({'variations': variations})
@@ -1295,6 +2191,286 @@ def import_profiles():
     except Exception as e:
         return jsonify({'error': f'Import error: {str(e)}'}), 500
 
+# Shopify REST client: one keep-alive session per store, throttled on the leaky bucket
+SHOPIFY_DEFAULT_API_VERSION = '2023-10'
+SHOPIFY_TIMEOUT = 15
+SHOPIFY_MAX_RETRIES = 4
+SHOPIFY_BACKOFF = 1.0
+SHOPIFY_LEAK_RATE = 2.0  # calls per second drained from the bucket (standard plans)
+SHOPIFY_BUCKET_HEADROOM = 0.8  # slow down once the bucket is this full
+SHOPIFY_IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+SHOPIFY_BASE_URL = os.environ.get('SHOPIFY_BASE_URL', '')
+SHOPIFY_PUBLISH_CONCURRENCY = 2  # article uploads in flight per store
+
+shopify_clients = {}
+shopify_clients_lock = threading.Lock()
+
+@lru_cache(maxsize=256)
+def normalize_shopify_store_url(store_url):
+    """Return the bare myshopify domain, e.g. 'https://foo/' -> 'foo.myshopify.com'"""
+    domain = re.sub(r'^https?://', '', store_url.strip(), flags=re.IGNORECASE)
+    domain = domain.split('/', 1)[0].lower()
+    if not domain.endswith('.myshopify.com'):
+        domain = domain + '.myshopify.com'
+    return domain
+
+class ShopifyGraphQLError(Exception):
+    """Errors returned in a GraphQL response body (top-level errors or userErrors)"""
+    
+    def __init__(self, errors):
+        self.errors = errors
+        if isinstance(errors, list):
+            message = '; '.join(error.get('message', str(error)) if isinstance(error, dict) else str(error)
+                                for error in errors)
+        else:
+            message = str(errors)
+        super().__init__(message)
+
+class ShopifyClient:
+    """Shopify Admin API client for one store.
+
+    Requests go through a pooled session. The X-Shopify-Shop-Api-Call-Limit header is used
+    to pause before the bucket fills up, Retry-After is honoured on 429, and 429/5xx
+    responses are retried (5xx only for idempotent requests).
+    
+    api_version is fixed per client. Clients for other versions of the same store are created
+    with shared=<existing client> and reuse its session, throttling state and upload slots.
+    """
+    
+    def __init__(self, store_url, api_token, api_version=SHOPIFY_DEFAULT_API_VERSION, base_url=None, shared=None):
+        self.store_domain = normalize_shopify_store_url(store_url)
+        # base_url points the client at a local stand-in server instead of the store
+        self.base_url = (base_url or SHOPIFY_BASE_URL or f"https://{self.store_domain}").rstrip('/')
+        self.api_version = api_version
+        if shared is not None:
+            self.session = shared.session
+            self.lock = shared.lock
+            self.throttle = shared.throttle
+            self.upload_slots = shared.upload_slots
+            return
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=URL_FETCH_MAX_WORKERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'X-Shopify-Access-Token': api_token,
+            'Content-Type': 'application/json',
+            'User-Agent': 'SEO Generator Web App/1.0'
+        })
+        self.lock = threading.Lock()
+        self.throttle = {'next_request_at': 0.0, 'call_limit': None}
+        self.upload_slots = threading.BoundedSemaphore(SHOPIFY_PUBLISH_CONCURRENCY)
+    
+    @property
+    def call_limit(self):
+        return self.throttle['call_limit']
+    
+    def api_url(self, path, api_version=None):
+        """Admin API URL for path. Absolute URLs (e.g. pagination links) are returned unchanged"""
+        if path.startswith(('http://', 'https://')):
+            return path
+        version = self.api_version if api_version is None else api_version
+        if not version:
+            return f"{self.base_url}/admin/{path.lstrip('/')}"
+        return f"{self.base_url}/admin/api/{version}/{path.lstrip('/')}"
+    
+    def admin_url(self, path):
+        return f"{self.base_url}/admin/{path.lstrip('/')}"
+    
+    def wait_for_capacity(self):
+        with self.lock:
+            delay = self.throttle['next_request_at'] - time.time()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def pause(self, seconds):
+        with self.lock:
+            self.throttle['next_request_at'] = max(self.throttle['next_request_at'], time.time() + seconds)
+    
+    def record_call_limit(self, response):
+        """Track bucket usage from 'X-Shopify-Shop-Api-Call-Limit: used/size'"""
+        header = response.headers.get('X-Shopify-Shop-Api-Call-Limit', '')
+        try:
+            used, size = (int(part) for part in header.split('/', 1))
+        except ValueError:
+            return
+        self.throttle['call_limit'] = {'used': used, 'size': size}
+        if used >= size * SHOPIFY_BUCKET_HEADROOM:
+            # Near the top, pace requests at the leak rate; wait longer if the bucket is full
+            self.pause(max(1, used - size + 2) / SHOPIFY_LEAK_RATE)
+    
+    def retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        try:
+            return max(float(retry_after), 0)
+        except (TypeError, ValueError):
+            return SHOPIFY_BACKOFF * (2 ** attempt)
+    
+    def request(self, method, path, api_version=None, timeout=SHOPIFY_TIMEOUT, retry_server_errors=None,
+                max_retries=SHOPIFY_MAX_RETRIES, **kwargs):
+        method = method.upper()
+        url = self.api_url(path, api_version)
+        if retry_server_errors is None:
+            retry_server_errors = method in SHOPIFY_IDEMPOTENT_METHODS
+        
+        for attempt in range(max_retries + 1):
+            self.wait_for_capacity()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= max_retries or not retry_server_errors:
+                    raise
+                print(f"Shopify {method} {url} failed ({e}), retrying...")
+                self.pause(self.retry_delay(None, attempt))
+                continue
+            
+            self.record_call_limit(response)
+            retryable = response.status_code == 429 or (retry_server_errors and response.status_code >= 500)
+            if not retryable or attempt >= max_retries:
+                return response
+            delay = self.retry_delay(response, attempt)
+            print(f"Shopify {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            self.pause(delay)
+        return response
+    
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+    
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+    
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+    
+    def graphql(self, query, variables=None, api_version=None, mutation=False, timeout=SHOPIFY_TIMEOUT):
+        """Run a GraphQL query and return its data. Raises ShopifyGraphQLError on errors.
+
+        Queries are retried on server errors; mutations are not.
+        """
+        payload = {'query': query}
+        if variables:
+            payload['variables'] = variables
+        response = self.post('graphql.json', api_version=api_version, json=payload, timeout=timeout,
+                             retry_server_errors=not mutation)
+        response.raise_for_status()
+        result = response.json()
+        if result.get('errors'):
+            raise ShopifyGraphQLError(result['errors'])
+        return result.get('data') or {}
+    
+    def iter_pages(self, path, key, params=None, timeout=SHOPIFY_TIMEOUT):
+        """Yield (page_url, items, next_url) following Link rel="next" (page_info) cursors.
+
+        path may also be a page URL from an earlier Link header, which already carries
+        limit and fields. Raises requests.HTTPError on a failed page.
+        """
+        url = path
+        while url:
+            response = self.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            next_url = response.links.get('next', {}).get('url')
+            yield url, response.json().get(key, []), next_url
+            # page_info URLs already include limit/fields and reject other parameters
+            url, params = next_url, None
+
+def get_shopify_client(store_url, api_token, api_version=None, base_url=None):
+    """Shared client per store, token and API version. Clients of one store share
+    throttling state and connections"""
+    api_version = api_version or SHOPIFY_DEFAULT_API_VERSION
+    store = (normalize_shopify_store_url(store_url), api_token, base_url)
+    with shopify_clients_lock:
+        client = shopify_clients.get(store + (api_version,))
+        if client is None:
+            shared = next((existing for key, existing in shopify_clients.items() if key[:3] == store), None)
+            client = ShopifyClient(store_url, api_token, api_version, base_url=base_url, shared=shared)
+            shopify_clients[store + (api_version,)] = client
+        return client
+
+SHOPIFY_PAGE_LIMIT = 250
+SHOPIFY_PRODUCT_FIELDS = 'id,title,handle,vendor,product_type,status,tags,updated_at,image'
+SHOPIFY_CURSOR_TTL = 600  # page_info cursors are short-lived
+
+# {(store_domain, fields): {item_offset: (page_url, stored_at)}} so offset requests can
+# resume from the nearest known page instead of walking from the first one
+shopify_page_cursors = {}
+shopify_page_cursors_lock = threading.Lock()
+
+def remember_shopify_cursor(key, offset, page_url):
+    with shopify_page_cursors_lock:
+        shopify_page_cursors.setdefault(key, {})[offset] = (page_url, time.time())
+
+def nearest_shopify_cursor(key, offset):
+    """Return (page_offset, page_url) for the closest fresh page at or before offset"""
+    now = time.time()
+    with shopify_page_cursors_lock:
+        cursors = shopify_page_cursors.get(key, {})
+        for start in [start for start, (_, stored_at) in cursors.items() if now - stored_at > SHOPIFY_CURSOR_TTL]:
+            del cursors[start]
+        starts = [start for start in cursors if start <= offset]
+        if not starts:
+            return 0, None
+        start = max(starts)
+        return start, cursors[start][0]
+
+def iter_shopify_products(client, fields=SHOPIFY_PRODUCT_FIELDS, offset=0, limit=None, filters=None):
+    """Yield (page_offset, products) covering [offset, offset + limit) of the catalog.
+
+    filters are extra products.json parameters such as updated_at_min or ids. Filtered walks
+    are one-off (each sync has its own updated_at_min), so their cursors are not remembered.
+    """
+    filters = filters or {}
+    key = None if filters else (client.store_domain, fields)
+    page_offset, page_url = nearest_shopify_cursor(key, offset) if key else (0, None)
+    params = None
+    if page_url is None:
+        page_url = 'products.json'
+        params = {'limit': SHOPIFY_PAGE_LIMIT, **filters}
+        if fields:
+            params['fields'] = fields
+    end = offset + limit if limit is not None else None
+    
+    for url, products, next_url in client.iter_pages(page_url, 'products', params=params):
+        page_end = page_offset + len(products)
+        if next_url and key:
+            remember_shopify_cursor(key, page_end, next_url)
+        if page_end > offset:
+            yield max(page_offset, offset), products[max(0, offset - page_offset):(end - page_offset if end is not None else None)]
+        page_offset = page_end
+        if end is not None and page_offset >= end:
+            break
+
+def shopify_error_message(response, prefix="Upload failed"):
+    """Readable error from a failed Shopify response, including its 'errors' details"""
+    error_message = f"{prefix}: HTTP {response.status_code}"
+    try:
+        error_data = response.json()
+        if 'errors' in error_data:
+            if isinstance(error_data['errors'], dict):
+                error_details = []
+                for key, value in error_data['errors'].items():
+                    if isinstance(value, list):
+                        error_details.append(f"{key}: {', '.join(str(item) for item in value)}")
+                    else:
+                        error_details.append(f"{key}: {value}")
+                error_message += f" - {'; '.join(error_details)}"
+            else:
+                error_message += f" - {error_data['errors']}"
+        else:
+            error_message += f" - {error_data}"
+    except ValueError:
+        error_message += f" - {response.text}"
+    return error_message
+
+def get_profile_shopify_client(profile):
+    """Shopify client for a profile, or None if credentials are missing"""
+    store_url = profile.get('shopify_store_url', '').strip()
+    api_token = profile.get('shopify_api_token', '').strip()
+    if not store_url or not api_token:
+        return None
+    api_version = profile.get('shopify_api_version', SHOPIFY_DEFAULT_API_VERSION).strip()
+    return get_shopify_client(store_url, api_token, api_version or SHOPIFY_DEFAULT_API_VERSION)
+
 @app.route('/api/shopify/test-connection', methods=['POST'])
 def test_shopify_connection():
     """Test Shopify connection for current profile"""
@@ -1319,21 +2495,10 @@ def test_shopify_connection():
         return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
     
     try:
-        headers = {
-            'X-Shopify-Access-Token': api_token,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SEO Generator Web App/1.0'
-        }
-        
-        # Ensure store URL has proper format
+        client = get_profile_shopify_client(profile)
         original_store_url = store_url
-        if not store_url.startswith('https://'):
-            store_url = f"https://{store_url}"
-        if not store_url.endswith('.myshopify.com'):
-            if not store_url.endswith('.myshopify.com/'):
-                store_url = store_url.rstrip('/') + '.myshopify.com'
-        
-        url = f"{store_url}/admin/api/{api_version}/shop.json"
+        store_url = client.base_url
+        url = client.api_url('shop.json')
         
         print(f"Testing Shopify connection:")
         print(f"  Original URL: {original_store_url}")
@@ -1342,7 +2507,7 @@ def test_shopify_connection():
         print(f"  API Token: {api_token[:10]}...{api_token[-4:] if len(api_token) > 14 else api_token}")
         print(f"  API Version: {api_version}")
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = client.get('shop.json', timeout=10)
         
         print(f"Response status: {response.status_code}")
         print(f"Response headers: {dict(response.headers)}")
@@ -1390,7 +2555,12 @@ def test_shopify_connection():
 
 @app.route('/api/shopify/products', methods=['GET'])
 def get_shopify_products():
-    """Get products from Shopify for current profile"""
+    """Get products from Shopify for current profile.
+
+    Pages through the catalog with page_info cursors, returning only SHOPIFY_PRODUCT_FIELDS
+    unless fields= is given ("all" for every field). offset/limit select a slice (default:
+    the whole catalog); stream=1 sends each page as an NDJSON line as soon as it arrives.
+    """
     user_session = get_user_session()
     
     profile_name = request.args.get('profile_name')
@@ -1410,28 +2580,50 @@ def get_shopify_products():
         return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
     
     try:
-        headers = {
-            'X-Shopify-Access-Token': api_token,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SEO Generator Web App/1.0'
-        }
-        
-        # Ensure store URL has proper format
-        if not store_url.startswith('https://'):
-            store_url = f"https://{store_url}"
-        if not store_url.endswith('.myshopify.com'):
-            if not store_url.endswith('.myshopify.com/'):
-                store_url = store_url.rstrip('/') + '.myshopify.com'
-        
-        url = f"{store_url}/admin/api/{api_version}/products.json"
-        response = requests.get(url, headers=headers, timeout=10)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = request.args.get('limit')
+        limit = max(int(limit), 0) if limit not in (None, '') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid offset or limit'}), 400
+    
+    fields = request.args.get('fields', SHOPIFY_PRODUCT_FIELDS).strip()
+    if fields == 'all':
+        fields = ''
+    fields = ','.join(field.strip() for field in fields.split(',') if field.strip())
+    
+    client = get_profile_shopify_client(profile)
+    
+    if request.args.get('stream') in ('1', 'true') or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def generate():
+            total = 0
+            try:
+                for page_offset, products in iter_shopify_products(client, fields, offset, limit):
+                    total += len(products)
+                    yield json.dumps({'offset': page_offset, 'products': products}, ensure_ascii=False) + '\n'
+                yield json.dumps({'done': True, 'count': total}) + '\n'
+            except Exception as e:
+                yield json.dumps({'error': f'Error fetching products: {str(e)}'}, ensure_ascii=False) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    try:
+        # Fetch one extra product to know whether more remain after this slice
+        products = []
+        for _, page in iter_shopify_products(client, fields, offset, limit + 1 if limit is not None else None):
+            products.extend(page)
+        has_more = limit is not None and len(products) > limit
+        products = products[:limit] if limit is not None else products
         
-        if response.status_code == 200:
-            products_data = response.json()
-            return jsonify({'products': products_data['products']})
-        else:
-            return jsonify({'error': f'Failed to fetch products: {response.status_code}'}), 400
-            
+        return jsonify({
+            'products': products,
+            'offset': offset,
+            'limit': limit,
+            'count': len(products),
+            'has_more': has_more,
+            'next_offset': offset + len(products) if has_more else None
+        })
+    
+    except requests.exceptions.HTTPError as e:
+        return jsonify({'error': f'Failed to fetch products: {e.response.status_code}'}), 400
     except Exception as e:
         return jsonify({'error': f'Error fetching products: {str(e)}'}), 500
 
@@ -1683,55 +2875,17 @@ def enhanced_generate_seo():
             print(generated_text[:500] + "..." if len(generated_text) > 500 else generated_text)
             
             # CRITICAL: Filter blocked words from generated content
-            blocked_words = profile.get('blocked_words', [])
-            print(f"DEBUG: Blocked words for filtering: {blocked_words}")
-            if blocked_words:
-                original_length = len(generated_text)
-                generated_text = filter_blocked_words(generated_text, blocked_words)
-                print(f"✅ Blocked words filtered from generated text (length: {original_length} -> {len(generated_text)})")
-            
-            # Convert markdown to HTML with same extensions as old app
-            import markdown
-            import re
-            raw_html = markdown.markdown(generated_text, extensions=['tables', 'nl2br'])
-            
-            # Clean HTML like the old app - remove extra whitespace and format properly
-            html_content = clean_html_output(raw_html)
-            
-            # DOUBLE CHECK: Also filter blocked words from HTML content
-            if blocked_words:
-                html_content = filter_blocked_words(html_content, blocked_words)
-                print(f"✅ Blocked words filtered from HTML content")
+            generated_text = filter_profile_blocked_words(generated_text, profile, 'Enhanced SEO')
             
-            # IMPORTANT: Remove any META lines that might have leaked into the content
-            # Meta descriptions should only be metadata, not visible content
-            html_content = re.sub(r'<p>\s*META:.*?</p>\s*', '', html_content, flags=re.IGNORECASE | re.DOTALL)
-            html_content = re.sub(r'<p>.*?META:.*?</p>\s*', '', html_content, flags=re.IGNORECASE | re.DOTALL)
+            # Title, meta description and HTML in one pass. META lines are metadata
+            # only and are kept out of the visible HTML content.
+            processed = process_generated_content(generated_text, include_meta=include_meta)
+            title = processed['title']
+            meta_description = processed['meta_description']
+            html_content = processed['html']
             print("=== DEBUG: HTML Content ===")
             print(html_content[:500] + "..." if len(html_content) > 500 else html_content)
             
-            # Extract title and meta description
-            lines = generated_text.split('\n')
-            title = ""
-            meta_description = ""
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('# ') and not title:
-                    title = line[2:].strip()
-                elif 'meta' in line.lower() and 'beskrivelse' in line.lower() and not meta_description:
-                    # Try to extract meta description
-                    if ':' in line:
-                        meta_description = line.split(':', 1)[1].strip()
-            
-            # If no meta description found, create one from first paragraph
-            if not meta_description and include_meta:
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('#') and not line.startswith('**') and len(line) > 50:
-                        meta_description = line[:150] + "..." if len(line) > 150 else line
-                        break
-            
             result = {
                 'title': title,
                 'meta_description': meta_description,
@@ -1801,40 +2955,23 @@ def upload_blog_post_to_shopify():
         if not store_url or not api_token:
             return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
         
-        # Format store URL exactly like the old app
-        if store_url.startswith("https://"):
-            store_url = store_url[len("https://"):]
-        if store_url.endswith("/"):
-            store_url = store_url[:-1]
-        
-        if not store_url.endswith('.myshopify.com'):
-            store_url = store_url + '.myshopify.com'
-        
+        client = get_shopify_client(store_url, api_token)
+        store_url = client.store_domain
         print(f"Store URL (formatted): {store_url}")
         
-        headers = {
-            'X-Shopify-Access-Token': api_token,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SEO Generator Web App/1.0'
-        }
-        
-        # --- EXACTLY LIKE OLD APP: Get available blogs first ---
-        print("Fetching blogs from Shopify...")
-        
-        # Build the endpoint URL with the FORCED api_version
-        blogs_endpoint = f"https://{store_url}/admin/api/{api_version}/blogs.json"
-        upload_endpoint_base = f"https://{store_url}/admin/api/{api_version}/blogs"
-        
-        print(f"Using endpoint: {blogs_endpoint}")
+        # Re-uploading a saved text updates its article instead of creating a duplicate
+        fields = shopify_article_fields(title, body_html, data.get('featured_image_url'))
+        text_name = data.get('text_name')
+        text_data = profile.get('saved_texts', {}).get(text_name) if text_name else None
+        updated = update_recorded_article(user_session, text_data, client, fields, api_version=api_version)
+        if updated:
+            return jsonify(updated)
         
+        # --- EXACTLY LIKE OLD APP: Get available blogs first (from the directory cache) ---
         try:
-            # --- PRIMARY: REST API approach (like old app) ---
-            print("Using REST API (like old app)...")
-            response = requests.get(blogs_endpoint, headers=headers, timeout=10)
-            response.raise_for_status()
-            blogs_data = response.json()
-            available_blogs = blogs_data.get("blogs", [])
-            print(f"REST API found {len(available_blogs)} blogs")
+            available_blogs, blogs_source = get_shopify_blogs(client, refresh=bool(data.get('refresh_blogs')),
+                                                              api_version=api_version)
+            print(f"Found {len(available_blogs)} blogs ({blogs_source})")
             
             if not available_blogs:
                 return jsonify({
@@ -1853,91 +2990,14 @@ def upload_blog_post_to_shopify():
                 print(f"Only one blog found, using automatically: {target_blog_title} (ID: {target_blog_id})")
             else:
                 # Multiple blogs - return them for frontend selection
-                blog_options = []
-                for blog in available_blogs:
-                    blog_options.append({
-                        'id': blog.get('id'),
-                        'title': blog.get('title', f'Unknown Blog (ID: {blog.get("id")})')
-                    })
-                print(f"Multiple blogs found, returning for selection: {[b['title'] for b in blog_options]}")
+                print(f"Multiple blogs found, returning for selection: {[b['title'] for b in available_blogs]}")
                 return jsonify({
-                    'blogs': blog_options,
+                    'blogs': available_blogs,
                     'requires_selection': True
                 })
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching blogs: {e}")
-            # FALLBACK: If we can't read blogs (403 Forbidden, missing read_content scope), 
-            # try uploading directly to common blog IDs like the old working method
-            print("GET blogs failed, trying fallback strategy: direct upload to common blog IDs...")
-            
-            common_blog_ids = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-            
-            for test_blog_id in common_blog_ids:
-                print(f"Testing direct upload to blog ID: {test_blog_id}")
-                
-                # Try to upload directly to this blog ID
-                test_upload_url = f"{upload_endpoint_base}/{test_blog_id}/articles.json"
-                
-                # Prepare a test payload (same structure as real upload)
-                test_payload = {
-                    "article": {
-                        "title": title,
-                        "author": author,
-                        "body_html": body_html,
-                        "published": False
-                    }
-                }
-                
-                # Add featured image if provided with alt text for SEO
-                featured_image_url = data.get('featured_image_url')
-                if featured_image_url:
-                    # Create SEO-optimized alt text
-                    image_alt_text = create_image_alt_text(title)
-                    test_payload["article"]["image"] = {
-                        "src": featured_image_url,
-                        "alt": image_alt_text
-                    }
-                    print(f"Adding featured image: {featured_image_url}")
-                    print(f"With alt text: {image_alt_text}")
-                
-                print(f"Testing upload to: {test_upload_url}")
-                test_response = requests.post(test_upload_url, headers=headers, json=test_payload)
-                print(f"Test upload response status: {test_response.status_code}")
-                
-                if test_response.status_code == 201:
-                    # Success! This blog ID works
-                    target_blog_id = test_blog_id
-                    print(f"✓ Success! Found working blog ID: {target_blog_id}")
-                    
-                    # Parse the successful response
-                    created_article = test_response.json().get('article', {})
-                    article_id = created_article.get('id')
-                    admin_url = f"https://{store_url}/admin/blogs/{target_blog_id}/articles/{article_id}" if article_id else None
-                    
-                    return jsonify({
-                        'success': True,
-                        'message': f'Nyt blogindlæg "{title}" blev oprettet i Shopify!',
-                        'article_id': article_id,
-                        'admin_url': admin_url,
-                        'blog_id': target_blog_id,
-                        'blog_title': f'Blog {target_blog_id}',
-                        'status': 'Kladde'
-                    })
-                
-                elif test_response.status_code == 404:
-                    print(f"Blog ID {test_blog_id} not found, trying next...")
-                    continue
-                    
-                elif test_response.status_code == 403:
-                    print(f"Access denied for blog ID {test_blog_id} - insufficient permissions")
-                    continue
-                    
-                else:
-                    print(f"Blog ID {test_blog_id} returned {test_response.status_code}, trying next...")
-                    continue
-            
-            # If we get here, both methods failed
             return jsonify({'error': f'Could not access blogs in your Shopify store. Error: {str(e)}. Please check your API permissions include "read_content" and "write_content" scopes, or create a blog manually in Shopify admin.'}), 500
         
         # Continue with single blog upload...
@@ -1967,31 +3027,17 @@ def upload_blog_post_to_shopify():
         print(f"Upload payload created: {payload}")
         
         # Upload to Shopify
-        upload_endpoint = f"{upload_endpoint_base}/{target_blog_id}/articles.json"
+        upload_endpoint = client.api_url(f"blogs/{target_blog_id}/articles.json", api_version)
         print(f"Uploading to: {upload_endpoint}")
         
-        response = requests.post(upload_endpoint, headers=headers, json=payload, timeout=20)
+        response = client.post(upload_endpoint, json=payload, timeout=20)
         print(f"Upload response status: {response.status_code}")
+        if response.status_code == 404:
+            # The blog may have been deleted since the directory was cached
+            invalidate_shopify_blogs(client)
         
         if response.status_code != 201:  # Shopify returns 201 for successful creation
-            error_message = f"Upload failed: HTTP {response.status_code}"
-            try:
-                error_data = response.json()
-                if 'errors' in error_data:
-                    if isinstance(error_data['errors'], dict):
-                        error_details = []
-                        for key, value in error_data['errors'].items():
-                            if isinstance(value, list):
-                                error_details.append(f"{key}: {', '.join(value)}")
-                            else:
-                                error_details.append(f"{key}: {value}")
-                        error_message += f" - {'; '.join(error_details)}"
-                    else:
-                        error_message += f" - {error_data['errors']}"
-                else:
-                    error_message += f" - {error_data}"
-            except:
-                error_message += f" - {response.text}"
+            error_message = shopify_error_message(response)
             print(f"Upload error: {error_message}")
             return jsonify({'error': error_message}), 400
         
@@ -2001,6 +3047,9 @@ def upload_blog_post_to_shopify():
         article_admin_url = f"https://{store_url}/admin/blogs/{target_blog_id}/articles/{article_id}" if article_id else None
         
         print(f"✓ Upload successful! Article ID: {article_id}")
+        if text_data is not None and article_id:
+            record_shopify_article(text_data, client, target_blog_id, article_id, fields=fields)
+            save_profiles_to_file(user_session)
         print(f"Admin URL: {article_admin_url}")
         
         return jsonify({
@@ -2083,23 +3132,26 @@ def upload_blog_post_to_specific_blog():
         if not store_url or not api_token:
             return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
         
-        # Format store URL exactly like the old app
-        if store_url.startswith("https://"):
-            store_url = store_url[len("https://"):]
-        if store_url.endswith("/"):
-            store_url = store_url[:-1]
-        
-        # Add the .myshopify.com suffix if missing
-        if not store_url.endswith('.myshopify.com'):
-            store_url = store_url + '.myshopify.com'
-        
+        client = get_shopify_client(store_url, api_token)
+        store_url = client.store_domain
         print(f"Store URL (formatted): {store_url}")
         
-        headers = {
-            'X-Shopify-Access-Token': api_token,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SEO Generator Web App/1.0'
-        }
+        # Re-uploading a saved text updates its article instead of creating a duplicate
+        fields = shopify_article_fields(title, body_html, data.get('featured_image_url'))
+        text_name = data.get('text_name')
+        text_data = profile.get('saved_texts', {}).get(text_name) if text_name else None
+        updated = update_recorded_article(user_session, text_data, client, fields, blog_id=blog_id, api_version=api_version)
+        if updated:
+            return jsonify(updated)
+        
+        # Check the blog against the directory cache without making an extra request
+        blog_title = None
+        known_blogs = cached_shopify_blogs(client)
+        if known_blogs is not None:
+            blog = next((blog for blog in known_blogs if str(blog['id']) == str(blog_id)), None)
+            if not blog:
+                return jsonify({'error': f'Blog {blog_id} findes ikke i butikken. Opdater bloglisten og prøv igen.'}), 400
+            blog_title = blog['title']
         
         # Create the blog post payload following old code structure
         payload_article = {
@@ -2125,35 +3177,18 @@ def upload_blog_post_to_specific_blog():
         print(f"Upload payload created: {payload}")
         
         # Upload to Shopify
-        api_version = profile.get('shopify_api_version', '2023-10').strip()
-        if not api_version:
-            upload_endpoint = f"https://{store_url}/admin/blogs/{blog_id}/articles.json"
-        else:
-            upload_endpoint = f"https://{store_url}/admin/api/{api_version}/blogs/{blog_id}/articles.json"
+        # An empty API version in the profile means the unversioned admin endpoint
+        upload_endpoint = client.api_url(f"blogs/{blog_id}/articles.json", api_version)
         print(f"Uploading to: {upload_endpoint}")
         
-        response = requests.post(upload_endpoint, headers=headers, json=payload, timeout=20)
+        response = client.post(upload_endpoint, json=payload, timeout=20)
         print(f"Upload response status: {response.status_code}")
+        if response.status_code == 404:
+            # The blog may have been deleted since the directory was cached
+            invalidate_shopify_blogs(client)
         
         if response.status_code != 201:  # Shopify returns 201 for successful creation
-            error_message = f"Upload failed: HTTP {response.status_code}"
-            try:
-                error_data = response.json()
-                if 'errors' in error_data:
-                    if isinstance(error_data['errors'], dict):
-                        error_details = []
-                        for key, value in error_data['errors'].items():
-                            if isinstance(value, list):
-                                error_details.append(f"{key}: {', '.join(value)}")
-                            else:
-                                error_details.append(f"{key}: {value}")
-                        error_message += f" - {'; '.join(error_details)}"
-                    else:
-                        error_message += f" - {error_data['errors']}"
-                else:
-                    error_message += f" - {error_data}"
-            except:
-                error_message += f" - {response.text}"
+            error_message = shopify_error_message(response)
             print(f"Upload error: {error_message}")
             return jsonify({'error': error_message}), 400
         
@@ -2163,6 +3198,9 @@ def upload_blog_post_to_specific_blog():
         article_admin_url = f"https://{store_url}/admin/blogs/{blog_id}/articles/{article_id}" if article_id else None
         
         print(f"✓ Upload successful! Article ID: {article_id}")
+        if text_data is not None and article_id:
+            record_shopify_article(text_data, client, blog_id, article_id, fields=fields)
+            save_profiles_to_file(user_session)
         print(f"Admin URL: {article_admin_url}")
         
         return jsonify({
@@ -2170,6 +3208,8 @@ def upload_blog_post_to_specific_blog():
             'message': f'Nyt blogindlæg "{title}" blev oprettet i Shopify!',
             'article_id': article_id,
             'admin_url': article_admin_url,
+            'blog_id': blog_id,
+            'blog_title': blog_title,
             'status': 'Kladde' if not payload['article']['published'] else 'Publiceret'
         })
         
@@ -2198,6 +3238,162 @@ def upload_blog_post_to_specific_blog():
         traceback.print_exc()
         return jsonify({'error': f'Uventet fejl under Shopify upload: {str(e)}'}), 500
 
+SHOPIFY_IMAGE_FETCH_WORKERS = 4
+
+def image_cache_entry(image, product_id, product_title, product_updated_at=None):
+    """Image metadata in the cache format used by all_images_info.json"""
+    return {
+        'id': image['id'],
+        'product_id': product_id,
+        'product_title': product_title,
+        'src': image['src'],
+        'alt': image.get('alt', ''),
+        'width': image.get('width'),
+        'height': image.get('height'),
+        'updated_at': image.get('updated_at'),
+        'product_updated_at': product_updated_at
+    }
+
+def fetch_product_images_concurrently(client, products, max_workers=SHOPIFY_IMAGE_FETCH_WORKERS):
+    """Fetch /products/{id}/images.json for every product over the client's pooled session.
+
+    The client's rate limiter paces the workers. Returns (images in product order,
+    ids of products whose images could not be fetched).
+    """
+    def fetch(product):
+        response = client.get(f"products/{product['id']}/images.json", timeout=10)
+        response.raise_for_status()
+        return response.json().get('images', [])
+    
+    images = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(products)))) as executor:
+        futures = [executor.submit(fetch, product) for product in products]
+        for product, future in zip(products, futures):
+            try:
+                product_title = product.get('title', 'Unknown Product')
+                images.extend(image_cache_entry(image, product['id'], product_title) for image in future.result())
+            except Exception as e:
+                print(f"Error getting images for product {product['id']}: {e}")
+                failed.append(product['id'])
+    return images, failed
+
+def collect_product_images(client, filters=None):
+    """Images for the products matching filters.
+
+    Returns (images, {product_id: updated_at}, failed_product_ids, source). Tokens that may
+    not read images in the product listing fall back to fetching images per product.
+    """
+    images = []
+    updates = {}
+    try:
+        for _, products in iter_shopify_products(client, 'id,title,updated_at,images', filters=filters):
+            for product in products:
+                updates[str(product['id'])] = product.get('updated_at')
+                images.extend(image_cache_entry(image, product['id'], product.get('title', 'Unknown Product'),
+                                                product.get('updated_at'))
+                              for image in product.get('images', []))
+        return images, updates, [], 'api'
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code != 403:
+            raise
+        print("Listing products with images returned 403, fetching images per product...")
+    
+    products = [product for _, page in iter_shopify_products(client, 'id,title,updated_at', filters=filters)
+                for product in page]
+    images, failed = fetch_product_images_concurrently(client, products)
+    by_product = {str(product['id']): product.get('updated_at') for product in products}
+    for image in images:
+        image['product_updated_at'] = by_product.get(str(image['product_id']))
+    failed = [str(product_id) for product_id in failed]
+    updates = {product_id: updated_at for product_id, updated_at in by_product.items() if product_id not in failed}
+    return images, updates, failed, 'api_fallback'
+
+image_cache_locks = {}
+image_cache_locks_lock = threading.Lock()
+
+def get_image_cache_lock(profile_name):
+    with image_cache_locks_lock:
+        return image_cache_locks.setdefault(profile_name, threading.Lock())
+
+def refresh_image_cache(profile_name, client, full=False):
+    """Bring all_images_info.json up to date.
+
+    Incremental syncs fetch only products with updated_at >= the last sync (less a
+    clock-skew margin) plus invalidated ones, and replace just those products' images.
+    A full sync runs when forced, when nothing is cached yet, or once a day to drop
+    deleted products. Local mirror fields of unchanged images are kept.
+    """
+    with get_image_cache_lock(profile_name):
+        meta = load_image_cache_meta(profile_name)
+        cached = read_cached_image_list(profile_name)
+        now = datetime.now(timezone.utc)
+        synced_at = now.isoformat()
+        full = (full or not cached or not meta.get('synced_at') or not meta.get('full_synced_at')
+                or (now - datetime.fromisoformat(meta['full_synced_at'])).total_seconds() > IMAGE_CACHE_FULL_SYNC_INTERVAL)
+        
+        if full:
+            images, updates, failed, source = collect_product_images(client)
+            # Products whose images could not be fetched keep their cached entries until the retry
+            failed_ids = {str(product_id) for product_id in failed}
+            kept = [entry for entry in cached if str(entry.get('product_id')) in failed_ids]
+            products = {**{product_id: updated_at for product_id, updated_at in meta.get('products', {}).items()
+                           if product_id in failed_ids}, **updates}
+        else:
+            since = datetime.fromisoformat(meta['synced_at']) - timedelta(seconds=IMAGE_CACHE_CLOCK_SKEW)
+            images, updates, failed, source = collect_product_images(client, {'updated_at_min': since.isoformat()})
+            invalidated = [product_id for product_id in meta.get('invalidated', []) if product_id not in updates]
+            for start in range(0, len(invalidated), SHOPIFY_PAGE_LIMIT):
+                more_images, more_updates, more_failed, _ = collect_product_images(
+                    client, {'ids': ','.join(invalidated[start:start + SHOPIFY_PAGE_LIMIT])})
+                images.extend(more_images)
+                updates.update(more_updates)
+                failed.extend(more_failed)
+            kept = [entry for entry in cached if str(entry.get('product_id')) not in updates]
+            products = {**meta.get('products', {}), **updates}
+        
+        # Keep local mirror fields for images whose source did not change
+        previous = {(entry.get('id'), entry.get('src')): entry for entry in cached}
+        for entry in images:
+            entry['synced_at'] = synced_at
+            for key, value in previous.get((entry['id'], entry['src']), {}).items():
+                entry.setdefault(key, value)
+        
+        for product_id in updates:
+            info_file = os.path.join(PROFILE_IMAGES_DIR, profile_name, str(product_id), "images_info.json")
+            if os.path.exists(info_file):
+                os.remove(info_file)
+        
+        merged = kept + images
+        save_cached_images(profile_name, merged)
+        save_image_cache_meta(profile_name, {
+            'synced_at': synced_at,
+            'full_synced_at': synced_at if full else meta.get('full_synced_at'),
+            'source': source,
+            'products': products,
+            'invalidated': failed,
+            'image_count': len(merged)
+        })
+        
+        result = {'mode': 'full' if full else 'incremental', 'source': source, 'changed_products': len(updates),
+                  'failed_products': len(failed), 'images': len(merged), 'synced_at': synced_at}
+        print(f"Image cache for '{profile_name}' synced: {result}")
+        return result
+
+def start_image_cache_refresh(profile_name, client):
+    """Refresh the image cache in a background thread unless one is already running"""
+    if get_image_cache_lock(profile_name).locked():
+        return False
+    
+    def run():
+        try:
+            refresh_image_cache(profile_name, client)
+        except Exception as e:
+            print(f"Background image cache refresh for '{profile_name}' failed: {e}")
+    
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
 @app.route('/api/shopify/product-images', methods=['GET'])
 def get_shopify_product_images():
     """Get images from Shopify products for current profile (with local cache support)"""
@@ -2213,19 +3409,29 @@ def get_shopify_product_images():
     if not profile_name:
         return jsonify({'error': 'Profile name is required'}), 400
     
-    # First, try to get cached images
-    cached_images = get_cached_images(profile_name, product_id)
+    profiles = user_session.get('profiles', {})
+    refresh = request.args.get('refresh') in ('1', 'true')
+    full = request.args.get('full') in ('1', 'true')
+    
+    # First, try to get cached images; stale ones are served while a refresh runs in the background
+    cached_images = [] if refresh or full else get_cached_images(profile_name, product_id)
     if cached_images:
         print(f"Using cached images: {len(cached_images)} images found")
-        return jsonify({
+        result = {
             'images': cached_images,
             'total': len(cached_images),
             'source': 'cache'
-        })
+        }
+        if not product_id:
+            meta = load_image_cache_meta(profile_name)
+            result['synced_at'] = meta.get('synced_at')
+            result['stale'] = image_cache_is_stale(meta)
+            client = get_profile_shopify_client(profiles.get(profile_name, {}))
+            result['refreshing'] = bool(result['stale'] and client and start_image_cache_refresh(profile_name, client))
+        return jsonify(result)
     
     print("No cached images found, trying Shopify API...")
     
-    profiles = user_session.get('profiles', {})
     if profile_name not in profiles:
         return jsonify({'error': 'Profile not found'}), 404
     
@@ -2242,139 +3448,37 @@ def get_shopify_product_images():
         return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
     
     try:
-        headers = {
-            'X-Shopify-Access-Token': api_token,
-            'Content-Type': 'application/json',
-            'User-Agent': 'SEO Generator Web App/1.0'
-        }
-        
-        # Ensure store URL has proper format
-        if not store_url.startswith('https://'):
-            store_url = f"https://{store_url}"
-        if not store_url.endswith('.myshopify.com'):
-            if not store_url.endswith('.myshopify.com/'):
-                store_url = store_url.rstrip('/') + '.myshopify.com'
+        client = get_profile_shopify_client(profile)
         
         # Get all products if no specific product_id
         if product_id:
-            url = f"{store_url}/admin/api/{api_version}/products/{product_id}/images.json"
+            url = client.api_url(f"products/{product_id}/images.json")
             print(f"Fetching images for specific product: {url}")
         else:
-            # Try different approaches to get products and images
-            # First try: Get products with images included (like old app)
-            products_url = f"{store_url}/admin/api/{api_version}/products.json?fields=id,title,images"
-            print(f"Fetching all products with images: {products_url}")
-            
-            products_response = requests.get(products_url, headers=headers, timeout=15)
-            print(f"Products response status: {products_response.status_code}")
-            
-            if products_response.status_code != 200:
-                print(f"Failed to fetch products: {products_response.text}")
-                
-                # If 403, try a simpler approach - just get product IDs first
-                if products_response.status_code == 403:
-                    print("Trying fallback approach - getting products without images field...")
-                    simple_products_url = f"{store_url}/admin/api/{api_version}/products.json?fields=id,title"
-                    simple_response = requests.get(simple_products_url, headers=headers, timeout=15)
-                    print(f"Simple products response status: {simple_response.status_code}")
-                    
-                    if simple_response.status_code == 200:
-                        # Success with simple approach, now get images for each product individually
-                        simple_products_data = simple_response.json()
-                        products = simple_products_data.get("products", [])
-                        print(f"Found {len(products)} products with simple approach")
-                        
-                        all_images = []
-                        for product in products[:5]:  # Limit to first 5 products to avoid too many API calls
-                            product_id = product.get('id')
-                            product_title = product.get('title', 'Unknown Product')
-                            
-                            # Get images for this specific product
-                            images_url = f"{store_url}/admin/api/{api_version}/products/{product_id}/images.json"
-                            try:
-                                images_response = requests.get(images_url, headers=headers, timeout=10)
-                                if images_response.status_code == 200:
-                                    images_data = images_response.json()
-                                    product_images = images_data.get('images', [])
-                                    print(f"Product '{product_title}' has {len(product_images)} images")
-                                    
-                                    for image in product_images:
-                                        image_data = {
-                                            'id': image['id'],
-                                            'product_id': product_id,
-                                            'product_title': product_title,
-                                            'src': image['src'],
-                                            'alt': image.get('alt', ''),
-                                            'width': image.get('width'),
-                                            'height': image.get('height')
-                                        }
-                                        all_images.append(image_data)
-                                else:
-                                    print(f"Failed to get images for product {product_id}: {images_response.status_code}")
-                            except Exception as e:
-                                print(f"Error getting images for product {product_id}: {e}")
-                        
-                        print(f"Total images found with fallback approach: {len(all_images)}")
-                        
-                        # Cache the images for future use
-                        if all_images:
-                            save_cached_images(profile_name, all_images)
-                            print(f"Cached {len(all_images)} images for profile '{profile_name}' (fallback)")
-                        
-                        return jsonify({
-                            'images': all_images, 
-                            'total': len(all_images),
-                            'source': 'api_fallback'
-                        })
-                    else:
-                        # Both approaches failed, show detailed error
-                        return jsonify({
-                            'error': 'Adgang nægtet til Shopify produkter',
-                            'details': 'Din Shopify API token har ikke tilladelse til at læse produkter. Sørg for at din Shopify App har "read_products" scope/tilladelsen.',
-                            'solution': 'Gå til din Shopify Admin → Apps → Private apps → Din app → og tilføj "read_products" tilladelsen.'
-                        }), 403
-                else:
-                    return jsonify({'error': f'Failed to fetch products: {products_response.status_code}'}), 400
-            
-            products_data = products_response.json()
-            print(f"Found {len(products_data['products'])} products")
-            
-            all_images = []
-            
-            for product in products_data['products']:
-                product_title = product.get('title', 'Unknown Product')
-                product_images = product.get('images', [])
-                print(f"Product '{product_title}' has {len(product_images)} images")
-                
-                if product_images:
-                    for image in product_images:
-                        image_data = {
-                            'id': image['id'],
-                            'product_id': product['id'],
-                            'product_title': product_title,
-                            'src': image['src'],
-                            'alt': image.get('alt', ''),
-                            'width': image.get('width'),
-                            'height': image.get('height')
-                        }
-                        all_images.append(image_data)
-                        print(f"  - Image: {image['src'][:50]}...")
+            try:
+                result = refresh_image_cache(profile_name, client, full=full)
+            except requests.exceptions.HTTPError as e:
+                status_code = e.response.status_code
+                if status_code == 403:
+                    return jsonify({
+                        'error': 'Adgang nægtet til Shopify produkter',
+                        'details': 'Din Shopify API token har ikke tilladelse til at læse produkter. Sørg for at din Shopify App har "read_products" scope/tilladelsen.',
+                        'solution': 'Gå til din Shopify Admin → Apps → Private apps → Din app → og tilføj "read_products" tilladelsen.'
+                    }), 403
+                return jsonify({'error': f'Failed to fetch products: {status_code}'}), 400
             
+            all_images = read_cached_image_list(profile_name)
             print(f"Total images found: {len(all_images)}")
             
-            # Cache the images for future use
-            if all_images:
-                save_cached_images(profile_name, all_images)
-                print(f"Cached {len(all_images)} images for profile '{profile_name}'")
-            
             return jsonify({
                 'images': all_images, 
                 'total': len(all_images),
-                'source': 'api'
+                'source': result['source'],
+                'sync': result
             })
         
         # Get images for specific product
-        response = requests.get(url, headers=headers, timeout=10)
+        response = client.get(url, timeout=10)
         print(f"Specific product images response status: {response.status_code}")
         
         if response.status_code == 200:
@@ -2402,6 +3506,240 @@ def get_shopify_product_images():
         traceback.print_exc()
         return jsonify({'error': f'Error fetching images: {str(e)}'}), 500
 
+@app.route('/api/shopify/product-images/<int:product_id>', methods=['DELETE'])
+def invalidate_shopify_product_images(product_id):
+    """Invalidate one product's cached images so the next sync refetches them"""
+    user_session = get_user_session()
+    profile_name = request.args.get('profile_name')
+    if not profile_name:
+        return jsonify({'error': 'Profile name is required'}), 400
+    if profile_name not in user_session.get('profiles', {}):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    invalidate_product_images(profile_name, product_id)
+    return jsonify({'success': True, 'message': f'Billeder for produkt {product_id} opdateres ved næste synkronisering'})
+
+# Local image mirror: originals, thumbnails and WebP variants under profil_billeder/
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+IMAGE_MIRROR_WORKERS = 6
+IMAGE_MIRROR_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_MIRROR_SAVE_EVERY = 25  # manifest checkpoints, so an interrupted run can resume
+IMAGE_THUMBNAIL_SIZE = (320, 320)
+
+image_mirror_jobs = {}
+image_mirror_jobs_lock = threading.Lock()
+
+def cached_image_url(profile_name, relative_path):
+    """URL of a mirrored file, served by serve_cached_image"""
+    return f"/api/cached-image/{quote(profile_name)}/{quote(relative_path)}"
+
+def mirror_relative_paths(entry):
+    """Deterministic mirror paths for an entry: (original, {thumbnail format: path}), relative
+    to the profile image directory"""
+    product_dir = str(entry['product_id']) if entry.get('product_id') is not None else 'other'
+    base = f"{product_dir}/{entry['id']}"
+    extension = os.path.splitext(urlparse(entry['src']).path)[1].lower()
+    if extension not in ('.jpg', '.jpeg', '.png', '.gif', '.webp'):
+        extension = '.jpg'
+    return base + extension, {'png': f"{base}_thumb.png", 'jpg': f"{base}_thumb.jpg", 'webp': f"{base}_thumb.webp"}
+
+def image_is_mirrored(profile_name, entry, thumbnails=True):
+    """True if the entry's current src is already on disk (and its thumbnail, when wanted)"""
+    if entry.get('mirrored_src') != entry.get('src'):
+        return False
+    if not entry.get('local_path') or not os.path.exists(profile_image_path(profile_name, entry['local_path'])):
+        return False
+    return not (thumbnails and PIL_AVAILABLE) or bool(
+        entry.get('thumbnail_path') and os.path.exists(profile_image_path(profile_name, entry['thumbnail_path'])))
+
+def download_image_file(url, path):
+    """Stream url to path via a temp file so a broken download never looks complete"""
+    with get_url_fetch_session().get(url, stream=True, timeout=URL_FETCH_TIMEOUT) as response:
+        response.raise_for_status()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            size = 0
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > IMAGE_MIRROR_MAX_BYTES:
+                        raise ValueError(f'Image larger than {IMAGE_MIRROR_MAX_BYTES // (1024 * 1024)} MB')
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return response.headers.get('Content-Type', '')
+
+def create_image_thumbnails(path, png_path, jpg_path, webp_path):
+    """Write a resized thumbnail (PNG when transparent, otherwise JPEG) and a WebP variant.
+
+    Returns True if the thumbnail was written as PNG.
+    """
+    with Image.open(path) as image:
+        image.thumbnail(IMAGE_THUMBNAIL_SIZE)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        if has_alpha:
+            image = image.convert('RGBA')
+            image.save(png_path, 'PNG', optimize=True)
+        else:
+            image = image.convert('RGB')
+            image.save(jpg_path, 'JPEG', quality=82, optimize=True)
+        image.save(webp_path, 'WEBP', quality=80)
+    return has_alpha
+
+def mirror_image(profile_name, entry, thumbnails=True, force=False):
+    """Download one image and build its thumbnails; returns mirror fields.
+
+    Files are at deterministic paths, so an original already on disk is reused unless it was
+    recorded for another src, including files written after the last manifest checkpoint.
+    """
+    local_path, thumbnail_paths = mirror_relative_paths(entry)
+    absolute_path = profile_image_path(profile_name, local_path)
+    os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+    
+    stale = entry.get('mirrored_src') not in (None, entry['src'])
+    downloaded = force or stale or not os.path.exists(absolute_path)
+    if downloaded:
+        download_image_file(entry['src'], absolute_path)
+    
+    fields = {
+        'local_path': local_path,
+        'local_url': cached_image_url(profile_name, local_path),
+        'mirrored_src': entry['src'],
+        'mirrored_at': datetime.now().isoformat()
+    }
+    if thumbnails and PIL_AVAILABLE:
+        existing = [thumbnail_paths[kind] for kind in ('png', 'jpg')
+                    if os.path.exists(profile_image_path(profile_name, thumbnail_paths[kind]))]
+        if downloaded or not existing or not os.path.exists(profile_image_path(profile_name, thumbnail_paths['webp'])):
+            thumbnail_path = thumbnail_paths['png'] if create_image_thumbnails(
+                absolute_path, profile_image_path(profile_name, thumbnail_paths['png']),
+                profile_image_path(profile_name, thumbnail_paths['jpg']),
+                profile_image_path(profile_name, thumbnail_paths['webp'])) else thumbnail_paths['jpg']
+        else:
+            thumbnail_path = existing[0]
+        fields.update({
+            'thumbnail_path': thumbnail_path,
+            'thumbnail_url': cached_image_url(profile_name, thumbnail_path),
+            'webp_path': thumbnail_paths['webp'],
+            'webp_url': cached_image_url(profile_name, thumbnail_paths['webp'])
+        })
+    return fields
+
+def save_mirror_fields(profile_name, mirrored):
+    """Merge {(image id, src): fields} into the manifest, re-read under the cache lock so a
+    concurrent sync isn't overwritten"""
+    with get_image_cache_lock(profile_name):
+        images = read_cached_image_list(profile_name)
+        for entry in images:
+            fields = mirrored.get((entry.get('id'), entry.get('src')))
+            if fields:
+                entry.update(fields)
+        save_cached_images(profile_name, images)
+
+def run_image_mirror(job, profile_name, entries, thumbnails, force=False):
+    """Background worker: download images concurrently, checkpointing the manifest as it goes"""
+    pending = {}
+    
+    def mirror(entry):
+        return entry, mirror_image(profile_name, entry, thumbnails, force)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=IMAGE_MIRROR_WORKERS) as executor:
+            futures = [executor.submit(mirror, entry) for entry in entries]
+            for future, entry in zip(futures, entries):
+                try:
+                    _, fields = future.result()
+                    pending[(entry['id'], entry['src'])] = fields
+                    with job['_lock']:
+                        job['downloaded_count'] += 1
+                except Exception as e:
+                    print(f"Mirroring image {entry.get('id')} failed: {e}")
+                    with job['_lock']:
+                        job['failed_count'] += 1
+                        job['errors'].append({'id': entry.get('id'), 'src': entry.get('src'), 'error': str(e)})
+                with job['_lock']:
+                    job['processed_count'] += 1
+                if len(pending) >= IMAGE_MIRROR_SAVE_EVERY:
+                    save_mirror_fields(profile_name, pending)
+                    pending = {}
+        job['status'] = 'completed'
+    except Exception as e:
+        print(f"Image mirror failed: {e}")
+        job['error'] = str(e)
+        job['status'] = 'error'
+    finally:
+        if pending:
+            save_mirror_fields(profile_name, pending)
+        job['finished_at'] = datetime.now().isoformat()
+        with image_mirror_jobs_lock:
+            image_mirror_jobs.pop(profile_name, None)
+
+@app.route('/api/shopify/product-images/mirror', methods=['POST'])
+def start_image_mirror():
+    """Mirror the cached product images locally, with thumbnails when Pillow is installed.
+
+    Images already on disk for their current src are skipped, so re-running resumes an
+    interrupted mirror. force=true downloads everything again.
+    """
+    user_session = get_user_session()
+    data = request.get_json() or {}
+    profile_name = data.get('profile_name')
+    if not profile_name:
+        return jsonify({'error': 'Profile name is required'}), 400
+    if profile_name not in user_session.get('profiles', {}):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    thumbnails = data.get('thumbnails', True) is not False
+    force = bool(data.get('force'))
+    
+    # Check and register under one lock so concurrent requests can't start two mirrors
+    with image_mirror_jobs_lock:
+        running = image_mirror_jobs.get(profile_name)
+        if running and running['status'] == 'running':
+            return jsonify({'success': True, 'job_id': running['id'], 'status': running['status'], 'already_running': True})
+        
+        images = read_cached_image_list(profile_name)
+        if not images:
+            return jsonify({'error': 'Ingen billeder i cachen. Hent Shopify billeder først.'}), 404
+        
+        entries = [entry for entry in images if entry.get('src') and entry.get('id') is not None
+                   and (force or not image_is_mirrored(profile_name, entry, thumbnails))]
+        
+        job = create_background_job('image_mirror', session.get('user_id'),
+                                    profile_name=profile_name,
+                                    total_images=len(images),
+                                    queued_count=len(entries),
+                                    already_mirrored=len(images) - len(entries),
+                                    processed_count=0,
+                                    downloaded_count=0,
+                                    failed_count=0,
+                                    thumbnails=thumbnails and PIL_AVAILABLE,
+                                    error=None,
+                                    errors=[])
+        if thumbnails and not PIL_AVAILABLE:
+            job['warning'] = 'Pillow er ikke installeret; billeder hentes uden miniaturer'
+        image_mirror_jobs[profile_name] = job
+    threading.Thread(target=run_image_mirror, args=(job, profile_name, entries, thumbnails, force), daemon=True).start()
+    
+    return jsonify({'success': True, 'job_id': job['id'], 'status': job['status'], 'queued_count': len(entries),
+                    'already_mirrored': len(images) - len(entries), 'thumbnails': job['thumbnails']})
+
+@app.route('/api/shopify/product-images/mirror/<job_id>', methods=['GET'])
+def get_image_mirror_job(job_id):
+    """Get progress of an image mirror job"""
+    job = get_background_job(job_id, 'image_mirror')
+    if not job:
+        return jsonify({'error': 'Job ikke fundet'}), 404
+    return jsonify({'success': True, 'job': serialize_background_job(job)})
+
 @app.route('/api/upload-image', methods=['POST'])
 def upload_image():
     """Upload image file and return base64 data"""
@@ -2458,11 +3796,8 @@ def serve_cached_image(profile_name, image_path):
         # Determine MIME type
         mime_type = mimetypes.guess_type(full_path)[0] or 'image/jpeg'
         
-        # Read and return the image file
-        with open(full_path, 'rb') as f:
-            image_data = f.read()
-        
-        return Response(image_data, mimetype=mime_type)
+        # Mirrored files are named by image id and rewritten on change, so let browsers revalidate
+        return send_file(full_path, mimetype=mime_type, conditional=True, max_age=24 * 60 * 60)
         
     except Exception as e:
         return jsonify({'error': f'Error serving cached image: {str(e)}'}), 500
@@ -2563,17 +3898,11 @@ def test_openai_simple():
             'type': str(type(e))
         }), 500
 
-def get_blogs_graphql(store_url, api_token, api_version):
+def get_blogs_graphql(client, api_version=None):
     """
     Get blogs using Shopify GraphQL API instead of REST API
     This might have different permission requirements
     """
-    graphql_endpoint = f"https://{store_url}/admin/api/{api_version}/graphql.json"
-    
-    headers = {
-        'X-Shopify-Access-Token': api_token,
-        'Content-Type': 'application/json'
-    }
     
     # GraphQL query to get blogs (matching the official documentation)
     graphql_query = {
@@ -2595,19 +3924,11 @@ def get_blogs_graphql(store_url, api_token, api_version):
     }
     
     try:
-        response = requests.post(graphql_endpoint, headers=headers, json=graphql_query, timeout=10)
-        response.raise_for_status()
-        
-        result = response.json()
+        result = client.graphql(graphql_query['query'], api_version=api_version, timeout=10)
         print(f"GraphQL response: {result}")
         
-        # Check for GraphQL errors
-        if 'errors' in result:
-            print(f"GraphQL errors: {result['errors']}")
-            return None
-            
         # Extract blogs from GraphQL response 
-        blogs_edges = result.get('data', {}).get('blogs', {}).get('edges', [])
+        blogs_edges = result.get('blogs', {}).get('edges', [])
         blogs_data = [edge.get('node', {}) for edge in blogs_edges]
         
         # Convert GraphQL format to REST format for compatibility
@@ -2631,7 +3952,701 @@ def get_blogs_graphql(store_url, api_token, api_version):
         print(f"GraphQL request failed: {e}")
         return None
 
+# Blog directory per store, so uploads don't fetch blogs.json every time
+SHOPIFY_BLOG_CACHE_TTL = 15 * 60
 
+shopify_blog_cache = {}
+shopify_blog_cache_lock = threading.Lock()
+
+def cached_shopify_blogs(client):
+    """Cached blog list for the client's store, or None if missing or expired"""
+    with shopify_blog_cache_lock:
+        entry = shopify_blog_cache.get(client.store_domain)
+    if entry and time.time() - entry['fetched_at'] < SHOPIFY_BLOG_CACHE_TTL:
+        return entry['blogs']
+    return None
+
+def invalidate_shopify_blogs(client):
+    with shopify_blog_cache_lock:
+        shopify_blog_cache.pop(client.store_domain, None)
+
+def get_shopify_blogs(client, refresh=False, api_version=None):
+    """Return (blogs, source) with blogs as [{id, title, handle}].
+
+    Uses the cache unless refresh is set. Falls back to GraphQL when blogs.json is not
+    readable and re-raises the REST error if both fail.
+    """
+    if not refresh:
+        blogs = cached_shopify_blogs(client)
+        if blogs is not None:
+            return blogs, 'cache'
+    
+    try:
+        response = client.get('blogs.json', api_version=api_version, timeout=10)
+        response.raise_for_status()
+        blogs = response.json().get('blogs', [])
+        source = 'rest'
+    except requests.exceptions.RequestException as e:
+        print(f"blogs.json failed ({e}), trying GraphQL...")
+        blogs = get_blogs_graphql(client, api_version)
+        if blogs is None:
+            raise
+        source = 'graphql'
+    
+    blogs = [{
+        'id': blog.get('id'),
+        'title': blog.get('title') or f'Unknown Blog (ID: {blog.get("id")})',
+        'handle': blog.get('handle', '')
+    } for blog in blogs]
+    with shopify_blog_cache_lock:
+        shopify_blog_cache[client.store_domain] = {'blogs': blogs, 'fetched_at': time.time()}
+    return blogs, source
+
+@app.route('/api/shopify/blogs', methods=['GET'])
+def get_shopify_blog_directory():
+    """List the store's blogs from the directory cache; refresh=1 refetches them"""
+    user_session = get_user_session()
+    
+    profile_name = request.args.get('profile_name')
+    if not profile_name:
+        return jsonify({'error': 'Profile name is required'}), 400
+    
+    profiles = user_session.get('profiles', {})
+    if profile_name not in profiles:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    client = get_profile_shopify_client(profiles[profile_name])
+    if not client:
+        return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
+    
+    try:
+        blogs, source = get_shopify_blogs(client, refresh=request.args.get('refresh') in ('1', 'true'))
+        return jsonify({'blogs': blogs, 'source': source})
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'Could not access blogs in your Shopify store. Error: {str(e)}'}), 500
+
+
+
+# GraphQL bulk export: one bulk operation instead of paging products and their images
+SHOPIFY_BULK_PRODUCTS_QUERY = """
+{
+    products {
+        edges {
+            node {
+                id
+                legacyResourceId
+                title
+                handle
+                vendor
+                productType
+                status
+                tags
+                updatedAt
+                seo {
+                    title
+                    description
+                }
+                images {
+                    edges {
+                        node {
+                            id
+                            url
+                            altText
+                            width
+                            height
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+SHOPIFY_BULK_RUN_MUTATION = """
+mutation RunBulkQuery($query: String!) {
+    bulkOperationRunQuery(query: $query) {
+        bulkOperation {
+            id
+            status
+        }
+        userErrors {
+            field
+            message
+        }
+    }
+}
+"""
+
+SHOPIFY_BULK_STATUS_QUERY = """
+query CurrentBulkOperation {
+    currentBulkOperation {
+        id
+        status
+        errorCode
+        objectCount
+        url
+        partialDataUrl
+    }
+}
+"""
+
+SHOPIFY_BULK_POLL_INTERVAL = 2
+SHOPIFY_BULK_MAX_POLL_INTERVAL = 15
+SHOPIFY_BULK_TIMEOUT = 30 * 60
+SHOPIFY_BULK_FINISHED_STATUSES = {'COMPLETED', 'FAILED', 'CANCELED', 'EXPIRED'}
+
+def shopify_gid_to_id(gid):
+    """'gid://shopify/Product/123' -> 123"""
+    value = str(gid or '').rsplit('/', 1)[-1]
+    return int(value) if value.isdigit() else value
+
+def start_shopify_bulk_query(client, query):
+    data = client.graphql(SHOPIFY_BULK_RUN_MUTATION, {'query': query}, mutation=True)
+    result = data.get('bulkOperationRunQuery') or {}
+    if result.get('userErrors'):
+        raise ShopifyGraphQLError(result['userErrors'])
+    return result.get('bulkOperation') or {}
+
+def wait_for_shopify_bulk_operation(client, operation_id, timeout=SHOPIFY_BULK_TIMEOUT, on_poll=None):
+    """Poll currentBulkOperation until it finishes; returns the final operation"""
+    interval = SHOPIFY_BULK_POLL_INTERVAL
+    deadline = time.time() + timeout
+    while True:
+        operation = client.graphql(SHOPIFY_BULK_STATUS_QUERY).get('currentBulkOperation') or {}
+        if operation.get('id') and operation['id'] != operation_id:
+            raise RuntimeError(f"Another bulk operation is running: {operation['id']}")
+        if on_poll:
+            on_poll(operation)
+        if operation.get('status') in SHOPIFY_BULK_FINISHED_STATUSES:
+            return operation
+        if time.time() + interval > deadline:
+            raise TimeoutError('Bulk operation did not finish in time')
+        time.sleep(interval)
+        interval = min(interval * 1.5, SHOPIFY_BULK_MAX_POLL_INTERVAL)
+
+def iter_bulk_jsonl(url):
+    """Stream a bulk operation result file line by line.
+
+    The file is a signed download URL, so it goes through the plain session and the
+    store access token is never sent along.
+    """
+    with get_url_fetch_session().get(url, stream=True, timeout=SHOPIFY_TIMEOUT) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def parse_bulk_products(lines):
+    """Turn bulk JSONL objects into (products, images) in the cache formats.
+
+    Child objects (images) follow their parent and reference it through __parentId.
+    """
+    products = []
+    images = []
+    by_gid = {}
+    for item in lines:
+        parent_gid = item.get('__parentId')
+        if parent_gid is None:
+            seo = item.get('seo') or {}
+            product = {
+                'id': shopify_gid_to_id(item.get('legacyResourceId') or item.get('id')),
+                'title': item.get('title', ''),
+                'handle': item.get('handle', ''),
+                'vendor': item.get('vendor', ''),
+                'product_type': item.get('productType', ''),
+                'status': (item.get('status') or '').lower(),
+                'tags': ', '.join(item.get('tags') or []),
+                'updated_at': item.get('updatedAt'),
+                'seo_title': seo.get('title') or '',
+                'seo_description': seo.get('description') or '',
+                'image_count': 0
+            }
+            by_gid[item.get('id')] = product
+            products.append(product)
+        elif item.get('url'):
+            product = by_gid.get(parent_gid)
+            if product is None:
+                continue
+            product['image_count'] += 1
+            images.append({
+                'id': shopify_gid_to_id(item.get('id')),
+                'product_id': product['id'],
+                'product_title': product['title'],
+                'src': item['url'],
+                'alt': item.get('altText') or '',
+                'width': item.get('width'),
+                'height': item.get('height'),
+                'product_updated_at': product['updated_at']
+            })
+    return products, images
+
+def run_shopify_bulk_export(job, client, profile_name):
+    """Background worker: run the bulk query, then stream its results into the caches"""
+    def on_poll(operation):
+        with job['_lock']:
+            job['bulk_status'] = operation.get('status')
+            job['object_count'] = int(operation.get('objectCount') or 0)
+    
+    try:
+        operation = start_shopify_bulk_query(client, SHOPIFY_BULK_PRODUCTS_QUERY)
+        with job['_lock']:
+            job['bulk_operation_id'] = operation.get('id')
+            job['bulk_status'] = operation.get('status')
+        print(f"Started Shopify bulk export {operation.get('id')} for profile '{profile_name}'")
+        
+        operation = wait_for_shopify_bulk_operation(client, operation.get('id'), on_poll=on_poll)
+        if operation.get('status') != 'COMPLETED':
+            raise RuntimeError(f"Bulk operation {operation.get('status')}: {operation.get('errorCode') or 'unknown error'}")
+        
+        products, images = [], []
+        if operation.get('url'):  # No url means the store has no products
+            products, images = parse_bulk_products(iter_bulk_jsonl(operation['url']))
+        
+        synced_at = datetime.now(timezone.utc).isoformat()
+        for image in images:
+            image['synced_at'] = synced_at
+        save_cached_products(profile_name, products)
+        save_cached_images(profile_name, images)
+        save_image_cache_meta(profile_name, {
+            'synced_at': synced_at,
+            'full_synced_at': synced_at,
+            'source': 'bulk',
+            'products': {str(product['id']): product['updated_at'] for product in products},
+            'invalidated': [],
+            'image_count': len(images)
+        })
+        images_by_product = {}
+        for image in images:
+            images_by_product.setdefault(image['product_id'], []).append(image)
+        for product_id, product_images in images_by_product.items():
+            save_cached_images(profile_name, product_images, product_id)
+        
+        print(f"Bulk export cached {len(products)} products and {len(images)} images for '{profile_name}'")
+        with job['_lock']:
+            job['products_count'] = len(products)
+            job['images_count'] = len(images)
+            job['status'] = 'completed'
+    except Exception as e:
+        print(f"Shopify bulk export failed: {e}")
+        with job['_lock']:
+            job['error'] = str(e)
+            job['status'] = 'error'
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+
+@app.route('/api/shopify/bulk-export', methods=['POST'])
+def start_shopify_bulk_export():
+    """Export all products with images and SEO fields via a GraphQL bulk operation"""
+    data = request.get_json() or {}
+    user_session = get_user_session()
+    
+    profile_name = data.get('profile_name')
+    if not profile_name:
+        return jsonify({'error': 'Profile name is required'}), 400
+    
+    profiles = user_session.get('profiles', {})
+    if profile_name not in profiles:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    client = get_profile_shopify_client(profiles[profile_name])
+    if not client:
+        return jsonify({'error': 'Shopify credentials not configured for this profile'}), 400
+    
+    job = create_background_job('shopify_bulk_export', session.get('user_id'),
+                                profile_name=profile_name,
+                                bulk_operation_id=None,
+                                bulk_status=None,
+                                object_count=0,
+                                products_count=0,
+                                images_count=0,
+                                error=None)
+    threading.Thread(target=run_shopify_bulk_export, args=(job, client, profile_name), daemon=True).start()
+    
+    return jsonify({'success': True, 'job_id': job['id'], 'status': job['status']})
+
+@app.route('/api/shopify/bulk-export/<job_id>', methods=['GET'])
+def get_shopify_bulk_export(job_id):
+    """Get progress of a Shopify bulk export job"""
+    job = get_background_job(job_id, 'shopify_bulk_export')
+    if not job:
+        return jsonify({'error': 'Export job not found'}), 404
+    return jsonify({'success': True, 'job': serialize_background_job(job)})
+
+# Bulk publishing of saved texts to one or more stores
+def parse_publish_time(value):
+    """Normalize an ISO 8601 published_at value; raises ValueError if it isn't one"""
+    if not value:
+        return None
+    return datetime.fromisoformat(str(value).strip().replace('Z', '+00:00')).isoformat()
+
+def shopify_article_fields(title, body_html, featured_image_url=None, summary=None):
+    """The article fields we keep in sync with Shopify. None means 'not set'"""
+    return {
+        'title': title,
+        'body_html': body_html,
+        'image': {'src': featured_image_url, 'alt': create_image_alt_text(title)} if featured_image_url else None,
+        'summary_html': summary or None
+    }
+
+def saved_text_article_fields(text_data, text_name):
+    ensure_saved_text_html(text_data)
+    return shopify_article_fields(text_data.get('title') or text_name, text_data['html'],
+                                  text_data.get('featured_image_url'), text_data.get('meta_description'))
+
+def article_field_hashes(fields):
+    return {name: content_hash(json.dumps(value, sort_keys=True, ensure_ascii=False)) for name, value in fields.items()}
+
+def build_shopify_article(fields, author, published_at=None, publish=False):
+    """Article payload. A published_at in the future schedules the article"""
+    article = {
+        "title": fields['title'],
+        "author": author,
+        "body_html": fields['body_html'],
+        "published": bool(publish or published_at)
+    }
+    if published_at:
+        article["published_at"] = published_at
+    for name in ('image', 'summary_html'):
+        if fields.get(name) is not None:
+            article[name] = fields[name]
+    return article
+
+def record_shopify_article(text_data, client, blog_id, article_id, published_at=None, fields=None):
+    """Remember where a saved text was published, per store, with hashes of the synced fields"""
+    articles = text_data.setdefault('shopify_articles', {})
+    previous = articles.get(client.store_domain) or {}
+    if previous.get('article_id') != article_id:
+        previous = {}
+    admin_url = client.admin_url(f"blogs/{blog_id}/articles/{article_id}")
+    articles[client.store_domain] = {
+        'blog_id': blog_id,
+        'article_id': article_id,
+        'admin_url': admin_url,
+        'published_at': published_at if published_at is not None else previous.get('published_at'),
+        'content_hash': text_data.get('content_hash'),
+        'field_hashes': article_field_hashes(fields) if fields else previous.get('field_hashes'),
+        'synced_at': datetime.now().isoformat()
+    }
+    text_data['article_id'] = article_id
+    text_data['admin_url'] = admin_url
+    return admin_url
+
+def sync_shopify_article(client, record, fields, api_version=None):
+    """PUT only the fields whose hash differs from the last sync.
+
+    Returns (status, changed_fields) with status 'unchanged', 'updated' or 'missing' (the
+    article no longer exists). Records without field hashes get every field sent once.
+    Fields that are now unset are not sent, since Shopify can't clear them this way.
+    """
+    previous = record.get('field_hashes') or {}
+    changed = [name for name, value in article_field_hashes(fields).items()
+               if fields[name] is not None and previous.get(name) != value]
+    if not changed:
+        return 'unchanged', []
+    
+    article = {'id': record['article_id'], **{name: fields[name] for name in changed}}
+    response = client.put(f"blogs/{record['blog_id']}/articles/{record['article_id']}.json",
+                          api_version=api_version, json={'article': article}, timeout=20)
+    if response.status_code == 404:
+        return 'missing', changed
+    if response.status_code != 200:
+        raise RuntimeError(shopify_error_message(response, "Update failed"))
+    return 'updated', changed
+
+def update_recorded_article(user_session, text_data, client, fields, blog_id=None, api_version=None):
+    """Update the article a saved text was already uploaded as, instead of creating a duplicate.
+
+    Returns the JSON response for the upload endpoints, or None when there is nothing to
+    update (never uploaded to this store, another blog, or deleted in Shopify).
+    """
+    record = (text_data or {}).get('shopify_articles', {}).get(client.store_domain)
+    if not record or (blog_id and str(record['blog_id']) != str(blog_id)):
+        return None
+    
+    status, changed = sync_shopify_article(client, record, fields, api_version)
+    print(f"Article {record['article_id']} sync: {status} {changed}")
+    if status == 'missing':
+        return None
+    
+    admin_url = record_shopify_article(text_data, client, record['blog_id'], record['article_id'], fields=fields)
+    save_profiles_to_file(user_session)
+    return {
+        'success': True,
+        'message': f'Blogindlægget "{fields["title"]}" blev opdateret i Shopify!' if changed
+                   else f'Blogindlægget "{fields["title"]}" er uændret i Shopify',
+        'article_id': record['article_id'],
+        'admin_url': admin_url,
+        'blog_id': record['blog_id'],
+        'changed_fields': changed,
+        'status': 'Opdateret' if changed else 'Uændret'
+    }
+
+def publish_saved_text(job, item, client, text_data):
+    """Upload one saved text as a new article, within the store's upload slots"""
+    with client.upload_slots:
+        with job['_lock']:
+            item['status'] = 'uploading'
+        fields = saved_text_article_fields(text_data, item['text_name'])
+        article = build_shopify_article(fields, job['author'], item['published_at'], job['publish'])
+        response = client.post(f"blogs/{item['blog_id']}/articles.json", json={'article': article}, timeout=20)
+    
+    if response.status_code == 404:
+        invalidate_shopify_blogs(client)
+    if response.status_code != 201:
+        raise RuntimeError(shopify_error_message(response))
+    
+    article_id = response.json().get('article', {}).get('id')
+    with job['_lock']:
+        item['article_id'] = article_id
+        item['admin_url'] = record_shopify_article(text_data, client, item['blog_id'], article_id,
+                                                   item['published_at'], fields)
+        item['status'] = 'completed'
+
+def sync_saved_text(job, item, client, text_data):
+    """Push only changed fields of an already published saved text; unchanged ones cost no request"""
+    record = text_data.get('shopify_articles', {}).get(client.store_domain)
+    if not record:
+        raise RuntimeError('Teksten er ikke udgivet i denne butik')
+    item['blog_id'] = record['blog_id']
+    item['article_id'] = record['article_id']
+    
+    fields = saved_text_article_fields(text_data, item['text_name'])
+    with client.upload_slots:
+        status, changed = sync_shopify_article(client, record, fields)
+    
+    if status == 'missing':
+        if not job['recreate_missing']:
+            raise RuntimeError('Artiklen findes ikke længere i Shopify')
+        item['published_at'] = record.get('published_at')
+        publish_saved_text(job, item, client, text_data)
+        item['changed_fields'] = list(fields)
+        return
+    
+    with job['_lock']:
+        item['changed_fields'] = changed
+        if status == 'updated':
+            item['admin_url'] = record_shopify_article(text_data, client, record['blog_id'], record['article_id'],
+                                                       fields=fields)
+            item['status'] = 'completed'
+        else:
+            item['admin_url'] = record.get('admin_url')
+            item['status'] = 'skipped'
+
+def run_bulk_publish(job, tasks, user_session, worker=publish_saved_text):
+    """Background worker: run worker for all items, stores in parallel, and save profiles once at the end"""
+    stores = {client.store_domain for _, client, _ in tasks}
+    
+    # Round-robin over stores so one large store doesn't hold up the others
+    by_store = {}
+    for task in tasks:
+        by_store.setdefault(task[1].store_domain, []).append(task)
+    ordered = [task for group in itertools.zip_longest(*by_store.values()) for task in group if task]
+    
+    def run(task):
+        item, client, text_data = task
+        try:
+            worker(job, item, client, text_data)
+        except Exception as e:
+            print(f"{job['kind']} of '{item['text_name']}' to {item['store']} failed: {e}")
+            with job['_lock']:
+                item['status'] = 'error'
+                item['error'] = str(e)
+        with job['_lock']:
+            job['processed_count'] += 1
+            job[{'completed': 'completed_count', 'skipped': 'skipped_count'}.get(item['status'], 'failed_count')] += 1
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(len(stores) * SHOPIFY_PUBLISH_CONCURRENCY, 16))) as executor:
+            list(executor.map(run, ordered))
+        save_profiles_to_file(user_session)
+        job['status'] = 'completed'
+    except Exception as e:
+        print(f"Bulk publish failed: {e}")
+        job['error'] = str(e)
+        job['status'] = 'error'
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+
+@app.route('/api/shopify/bulk-publish', methods=['POST'])
+def start_bulk_publish():
+    """Publish several saved texts to the blogs of one or more stores in a background job.
+
+    Body: texts (names, or {name, published_at, blog_id}), profile_name (source of the texts,
+    default current profile), target_profiles (stores, default the source profile),
+    blog_ids ({target_profile: blog_id}, needed for stores with several blogs),
+    published_at (default schedule), publish (publish now instead of drafts) and author.
+    """
+    data = request.get_json() or {}
+    user_session = get_user_session()
+    profiles = user_session.get('profiles', {})
+    
+    profile_name = data.get('profile_name') or user_session.get('current_profile')
+    if not profile_name or profile_name not in profiles:
+        return jsonify({'error': 'Profile not found'}), 404
+    saved_texts = profiles[profile_name].get('saved_texts', {})
+    
+    texts = [text if isinstance(text, dict) else {'name': text} for text in data.get('texts') or []]
+    if not texts:
+        return jsonify({'error': 'Vælg mindst én tekst'}), 400
+    missing = [text.get('name') for text in texts if text.get('name') not in saved_texts]
+    if missing:
+        return jsonify({'error': f'Tekster ikke fundet: {", ".join(map(str, missing))}'}), 404
+    
+    try:
+        default_published_at = parse_publish_time(data.get('published_at'))
+        for text in texts:
+            text['published_at'] = parse_publish_time(text.get('published_at')) or default_published_at
+    except ValueError:
+        return jsonify({'error': 'Ugyldig published_at (brug ISO 8601, fx 2024-05-01T08:00:00+02:00)'}), 400
+    
+    # Resolve client and blog per target store up front so problems are reported right away
+    target_profiles = data.get('target_profiles') or [profile_name]
+    blog_ids = data.get('blog_ids') or {}
+    targets = {}
+    selection_needed = {}
+    for target in target_profiles:
+        if target not in profiles:
+            return jsonify({'error': f'Profile not found: {target}'}), 404
+        client = get_profile_shopify_client(profiles[target])
+        if not client:
+            return jsonify({'error': f'Shopify credentials not configured for profile: {target}'}), 400
+        blog_id = blog_ids.get(target)
+        if not blog_id and not all(text.get('blog_id') for text in texts):
+            try:
+                blogs, _ = get_shopify_blogs(client)
+            except requests.exceptions.RequestException as e:
+                return jsonify({'error': f'Could not read blogs for {target}: {str(e)}'}), 500
+            if len(blogs) == 1:
+                blog_id = blogs[0]['id']
+            else:
+                selection_needed[target] = blogs
+        targets[target] = (client, blog_id)
+    
+    if selection_needed:
+        return jsonify({'requires_selection': True, 'blogs': selection_needed}), 400
+    
+    tasks = []
+    for target, (client, blog_id) in targets.items():
+        for text in texts:
+            item = {
+                'text_name': text['name'],
+                'target_profile': target,
+                'store': client.store_domain,
+                'blog_id': text.get('blog_id') or blog_id,
+                'published_at': text['published_at'],
+                'status': 'pending',
+                'article_id': None,
+                'admin_url': None,
+                'error': None
+            }
+            tasks.append((item, client, saved_texts[text['name']]))
+    
+    job = create_background_job('shopify_bulk_publish', session.get('user_id'),
+                                profile_name=profile_name,
+                                author=(data.get('author') or 'SEO Generator App').strip(),
+                                publish=bool(data.get('publish')),
+                                total_items=len(tasks),
+                                processed_count=0,
+                                completed_count=0,
+                                skipped_count=0,
+                                failed_count=0,
+                                error=None,
+                                items=[item for item, _, _ in tasks])
+    threading.Thread(target=run_bulk_publish, args=(job, tasks, user_session), daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'total_items': len(tasks),
+        'message': f'Udgivelse startet i baggrunden ({len(tasks)} indlæg)'
+    })
+
+@app.route('/api/shopify/sync-articles', methods=['POST'])
+def start_article_sync():
+    """Re-sync published saved texts: PUT changed fields only and skip unchanged articles.
+
+    Body: profile_name (default current profile), texts (default every text published
+    anywhere), target_profiles (profiles whose store credentials to use, default the
+    source profile) and recreate_missing (create a new article if one was deleted).
+    """
+    data = request.get_json() or {}
+    user_session = get_user_session()
+    profiles = user_session.get('profiles', {})
+    
+    profile_name = data.get('profile_name') or user_session.get('current_profile')
+    if not profile_name or profile_name not in profiles:
+        return jsonify({'error': 'Profile not found'}), 404
+    saved_texts = profiles[profile_name].get('saved_texts', {})
+    
+    text_names = data.get('texts') or [name for name, text_data in saved_texts.items()
+                                       if isinstance(text_data, dict) and text_data.get('shopify_articles')]
+    missing = [name for name in text_names if name not in saved_texts]
+    if missing:
+        return jsonify({'error': f'Tekster ikke fundet: {", ".join(map(str, missing))}'}), 404
+    
+    clients = {}
+    for target in data.get('target_profiles') or [profile_name]:
+        client = get_profile_shopify_client(profiles.get(target, {}))
+        if client:
+            clients[client.store_domain] = (target, client)
+    
+    tasks = []
+    items = []
+    for name in text_names:
+        for store, record in saved_texts[name].get('shopify_articles', {}).items():
+            target, client = clients.get(store, (None, None))
+            item = {
+                'text_name': name,
+                'target_profile': target,
+                'store': store,
+                'blog_id': record.get('blog_id'),
+                'article_id': record.get('article_id'),
+                'admin_url': record.get('admin_url'),
+                'published_at': None,
+                'changed_fields': [],
+                'status': 'pending' if client else 'error',
+                'error': None if client else 'Ingen Shopify-adgang til denne butik'
+            }
+            items.append(item)
+            if client:
+                tasks.append((item, client, saved_texts[name]))
+    
+    failed = len(items) - len(tasks)
+    job = create_background_job('shopify_article_sync', session.get('user_id'),
+                                profile_name=profile_name,
+                                author='SEO Generator App',
+                                publish=False,
+                                recreate_missing=bool(data.get('recreate_missing')),
+                                total_items=len(items),
+                                processed_count=failed,
+                                completed_count=0,
+                                skipped_count=0,
+                                failed_count=failed,
+                                error=None,
+                                items=items)
+    threading.Thread(target=run_bulk_publish, args=(job, tasks, user_session, sync_saved_text), daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'total_items': len(items),
+        'message': f'Synkronisering startet i baggrunden ({len(items)} indlæg)'
+    })
+
+@app.route('/api/shopify/bulk-publish/<job_id>', methods=['GET'])
+def get_bulk_publish_job(job_id):
+    """Get progress and per-item status of a bulk publish or article sync job"""
+    job = get_background_job(job_id)
+    if not job or job['kind'] not in ('shopify_bulk_publish', 'shopify_article_sync'):
+        return jsonify({'error': 'Udgivelsesjob ikke fundet'}), 404
+    
+    status = serialize_background_job(job)
+    with job['_lock']:
+        status['items'] = [dict(item) for item in job['items']]
+    return jsonify({'success': True, 'job': status})
 
 @app.route('/api/generate-text', methods=['POST'])
 def generate_text_api():
@@ -2791,11 +4806,7 @@ def ai_edit_selection():
         user_session = get_user_session()
         current_profile = user_session.get('current_profile')
         if current_profile and current_profile in user_session.get('profiles', {}):
-            profile = user_session['profiles'][current_profile]
-            blocked_words = profile.get('blocked_words', [])
-            if blocked_words:
-                edited_text = filter_blocked_words(edited_text, blocked_words)
-                print(f"✅ AI Edit Selection: Blocked words filtered from edited text")
+            edited_text = filter_profile_blocked_words(edited_text, user_session['profiles'][current_profile], 'AI Edit Selection')
         
         # Construct the new full text with the edited selection
         new_full_text = full_text[:start_index] + edited_text + full_text[end_index:]
@@ -2956,29 +4967,12 @@ def batch_generate_seo():
                 generated_text = response.choices[0].message.content
                 
                 # CRITICAL: Filter blocked words from batch generated content
-                blocked_words = profile.get('blocked_words', [])
-                if blocked_words:
-                    generated_text = filter_blocked_words(generated_text, blocked_words)
-                    print(f"✅ Batch variation {i+1}: Blocked words filtered from generated text")
+                generated_text = filter_profile_blocked_words(generated_text, profile, f'Batch variation {i+1}')
                 
-                # Convert to HTML
-                import markdown
-                raw_html = markdown.markdown(generated_text, extensions=['tables', 'nl2br'])
-                html_content = clean_html_output(raw_html)
-                
-                # DOUBLE CHECK: Also filter blocked words from HTML content
-                if blocked_words:
-                    html_content = filter_blocked_words(html_content, blocked_words)
-                    print(f"✅ Batch variation {i+1}: Blocked words filtered from HTML content")
-                
-                # Extract title
-                lines = generated_text.split('\n')
-                title = ""
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('# '):
-                        title = line[2:].strip()
-                        break
+                # Convert to HTML and extract title
+                processed = process_generated_content(generated_text)
+                html_content = processed['html']
+                title = processed['title']
                 
                 if not title:
                     title = f"{keywords} - {variation['name']}"
@@ -3162,6 +5156,717 @@ def upload_csv():
         traceback.print_exc()
         return jsonify({'error': f'Fejl ved indlæsning af CSV-filer: {str(e)}'}), 500
 
+# Language mapping - same as desktop app
+TRANSLATION_LANGUAGES = {
+    "da": "dansk",
+    "de": "tysk", 
+    "en": "engelsk",
+    "es": "spansk",
+    "fr": "fransk",
+    "it": "italiensk",
+    "nl": "hollandsk",
+    "sv": "svensk",
+    "no": "norsk",
+    "fi": "finsk",
+    "pl": "polsk",
+    "pt": "portugisisk",
+    "ru": "russisk",
+    "zh": "kinesisk",
+    "ja": "japansk",
+    "ko": "koreansk"
+}
+
+# Seed texts for the local language identifier. They are parallel shop-style texts so the
+# character n-gram profiles differ by language rather than by topic.
+LANGUAGE_SEED_TEXTS = {
+    'da': "Denne flotte stol er lavet af massivt egetræ og har et tidløst design, som passer til alle hjem. Vi leverer hurtigt og gratis i hele Danmark, og du kan altid returnere varen inden for 30 dage. Produktet er håndlavet af dygtige håndværkere, der går op i kvalitet og detaljer. Læs mere om vores møbler og find inspiration til din stue, dit køkken og dit soveværelse. Den er nem at vedligeholde, og overfladen er behandlet med naturlig olie. Hvis du har spørgsmål, er du velkommen til at kontakte os. Fri fragt på alle ordrer. Vores butik tilbyder et bredt udvalg af produkter til hjemmet, haven og køkkenet. Vælg mellem mange farver og størrelser, og få den nye kollektion i dag. Prisen er inklusive moms. Læg i kurven og betal sikkert med kort. Bordpladen er lavet af valnøddefinér, og benene er af pulverlakeret stål. Fås i sort, hvid og grå. Hynderne er fyldt med blødt skum, og betrækket kan tages af og vaskes. Mål: højde, bredde og dybde er angivet nedenfor. Samlingen er enkel, og alle skruer medfølger.",
+    'no': "Denne flotte stolen er laget av massiv eik og har et tidløst design som passer til ethvert hjem. Vi leverer raskt og gratis i hele Norge, og du kan alltid returnere varen innen 30 dager. Produktet er håndlaget av dyktige håndverkere som bryr seg om kvalitet og detaljer. Les mer om møblene våre og finn inspirasjon til stua, kjøkkenet og soverommet. Den er enkel å vedlikeholde, og overflaten er behandlet med naturlig olje. Hvis du har spørsmål, er du velkommen til å kontakte oss. Fri frakt på alle bestillinger. Butikken vår tilbyr et bredt utvalg av produkter til hjemmet, hagen og kjøkkenet. Velg mellom mange farger og størrelser, og få den nye kolleksjonen i dag. Prisen er inkludert mva. Legg i handlekurven og betal trygt med kort. Bordplaten er laget av valnøttfiner, og beina er av pulverlakkert stål. Fås i svart, hvit og grå. Putene er fylt med myk skumplast, og trekket kan tas av og vaskes. Mål: høyde, bredde og dybde er oppgitt nedenfor. Monteringen er enkel, og alle skruer følger med.",
+    'sv': "Den här vackra stolen är tillverkad av massiv ek och har en tidlös design som passar i alla hem. Vi levererar snabbt och gratis i hela Sverige, och du kan alltid returnera varan inom 30 dagar. Produkten är handgjord av skickliga hantverkare som bryr sig om kvalitet och detaljer. Läs mer om våra möbler och hitta inspiration till ditt vardagsrum, kök och sovrum. Den är lätt att sköta, och ytan är behandlad med naturlig olja. Om du har frågor är du välkommen att kontakta oss. Fri frakt på alla beställningar. Vår butik erbjuder ett brett utbud av produkter för hemmet, trädgården och köket. Välj mellan många färger och storlekar, och få den nya kollektionen i dag. Priset är inklusive moms. Lägg i varukorgen och betala säkert med kort. Bordsskivan är gjord av valnötsfaner och benen är av pulverlackerat stål. Finns i svart, vitt och grått. Dynorna är fyllda med mjukt skum och klädseln kan tas av och tvättas. Mått: höjd, bredd och djup anges nedan. Monteringen är enkel och alla skruvar ingår.",
+    'en': "This beautiful chair is made of solid oak and has a timeless design that fits in every home. We deliver quickly and free of charge across the country, and you can always return the item within 30 days. The product is handmade by skilled craftsmen who care about quality and details. Read more about our furniture and find inspiration for your living room, kitchen and bedroom. It is easy to maintain, and the surface is treated with natural oil. If you have any questions, you are welcome to contact us. Free shipping on all orders. Our shop offers a wide range of products for the home, garden and kitchen. Choose between many colours and sizes, and get the new collection today. The price includes tax. Add to cart and pay securely with your card. The table top is made of walnut veneer and the legs are powder-coated steel. Available in black, white and grey. The cushions are filled with soft foam and the cover can be removed and washed. Dimensions: height, width and depth are listed below. Assembly is simple and all screws are included.",
+    'de': "Dieser schöne Stuhl ist aus massiver Eiche gefertigt und hat ein zeitloses Design, das in jedes Zuhause passt. Wir liefern schnell und kostenlos in ganz Deutschland, und Sie können den Artikel jederzeit innerhalb von 30 Tagen zurückgeben. Das Produkt wird von erfahrenen Handwerkern hergestellt, die Wert auf Qualität und Details legen. Lesen Sie mehr über unsere Möbel und finden Sie Inspiration für Ihr Wohnzimmer, die Küche und das Schlafzimmer. Er ist leicht zu pflegen, und die Oberfläche ist mit natürlichem Öl behandelt. Wenn Sie Fragen haben, kontaktieren Sie uns gerne. Kostenloser Versand für alle Bestellungen. Unser Shop bietet eine große Auswahl an Produkten für Haus, Garten und Küche. Wählen Sie zwischen vielen Farben und Größen und holen Sie sich noch heute die neue Kollektion. Der Preis enthält die Mehrwertsteuer. In den Warenkorb legen und sicher mit Karte bezahlen. Die Tischplatte besteht aus Walnussfurnier und die Beine aus pulverbeschichtetem Stahl. Erhältlich in Schwarz, Weiß und Grau. Die Kissen sind mit weichem Schaumstoff gefüllt und der Bezug kann abgenommen und gewaschen werden. Maße: Höhe, Breite und Tiefe sind unten angegeben. Die Montage ist einfach und alle Schrauben sind enthalten.",
+    'nl': "Deze mooie stoel is gemaakt van massief eikenhout en heeft een tijdloos ontwerp dat in elk huis past. Wij leveren snel en gratis in heel Nederland, en je kunt het artikel altijd binnen 30 dagen retourneren. Het product is met de hand gemaakt door vakkundige ambachtslieden die om kwaliteit en details geven. Lees meer over onze meubels en vind inspiratie voor je woonkamer, keuken en slaapkamer. Het is gemakkelijk te onderhouden en het oppervlak is behandeld met natuurlijke olie. Als je vragen hebt, neem dan gerust contact met ons op. Gratis verzending op alle bestellingen. Onze winkel biedt een ruim assortiment producten voor het huis, de tuin en de keuken. Kies uit vele kleuren en maten en haal vandaag nog de nieuwe collectie in huis. De prijs is inclusief btw. Voeg toe aan je winkelwagen en betaal veilig met je kaart. Het tafelblad is gemaakt van notenhoutfineer en de poten zijn van gepoedercoat staal. Verkrijgbaar in zwart, wit en grijs. De kussens zijn gevuld met zacht schuim en de hoes is afneembaar en wasbaar. Afmetingen: hoogte, breedte en diepte staan hieronder vermeld. De montage is eenvoudig en alle schroeven worden meegeleverd.",
+    'fr': "Cette belle chaise est fabriquée en chêne massif et possède un design intemporel qui s'intègre dans chaque maison. Nous livrons rapidement et gratuitement dans toute la France, et vous pouvez toujours retourner l'article dans un délai de 30 jours. Le produit est fait à la main par des artisans qualifiés qui se soucient de la qualité et des détails. Découvrez nos meubles et trouvez de l'inspiration pour votre salon, votre cuisine et votre chambre. Il est facile à entretenir et la surface est traitée avec une huile naturelle. Si vous avez des questions, n'hésitez pas à nous contacter. Livraison gratuite pour toutes les commandes. Notre boutique propose un large choix de produits pour la maison, le jardin et la cuisine. Choisissez parmi de nombreuses couleurs et tailles, et découvrez dès aujourd'hui la nouvelle collection. Le prix comprend la TVA. Ajoutez au panier et payez en toute sécurité par carte. Le plateau de la table est en placage de noyer et les pieds sont en acier thermolaqué. Disponible en noir, blanc et gris. Les coussins sont rembourrés de mousse souple et la housse est amovible et lavable. Dimensions : la hauteur, la largeur et la profondeur sont indiquées ci-dessous. Le montage est simple et toutes les vis sont incluses.",
+    'es': "Esta bonita silla está hecha de roble macizo y tiene un diseño atemporal que encaja en cualquier hogar. Enviamos de forma rápida y gratuita a toda España, y siempre puede devolver el artículo en un plazo de 30 días. El producto está hecho a mano por artesanos expertos que cuidan la calidad y los detalles. Lea más sobre nuestros muebles y encuentre inspiración para su salón, cocina y dormitorio. Es fácil de mantener y la superficie está tratada con aceite natural. Si tiene alguna pregunta, no dude en ponerse en contacto con nosotros. Envío gratuito en todos los pedidos. Nuestra tienda ofrece una amplia selección de productos para el hogar, el jardín y la cocina. Elija entre muchos colores y tallas, y consiga hoy mismo la nueva colección. El precio incluye el IVA. Añada al carrito y pague de forma segura con tarjeta. El tablero de la mesa es de chapa de nogal y las patas son de acero con recubrimiento en polvo. Disponible en negro, blanco y gris. Los cojines están rellenos de espuma suave y la funda se puede quitar y lavar. Medidas: la altura, la anchura y la profundidad se indican a continuación. El montaje es sencillo y se incluyen todos los tornillos.",
+    'it': "Questa bella sedia è realizzata in rovere massiccio e ha un design senza tempo che si adatta a ogni casa. Spediamo velocemente e gratuitamente in tutta Italia, e puoi sempre restituire l'articolo entro 30 giorni. Il prodotto è fatto a mano da artigiani esperti che curano la qualità e i dettagli. Scopri di più sui nostri mobili e trova ispirazione per il tuo soggiorno, la cucina e la camera da letto. È facile da mantenere e la superficie è trattata con olio naturale. Se hai domande, non esitare a contattarci. Spedizione gratuita su tutti gli ordini. Il nostro negozio offre un'ampia scelta di prodotti per la casa, il giardino e la cucina. Scegli tra tanti colori e taglie, e scopri oggi stesso la nuova collezione. Il prezzo include l'IVA. Aggiungi al carrello e paga in modo sicuro con la carta. Il piano del tavolo è in impiallacciatura di noce e le gambe sono in acciaio verniciato a polvere. Disponibile in nero, bianco e grigio. I cuscini sono imbottiti con schiuma morbida e il rivestimento è sfoderabile e lavabile. Dimensioni: altezza, larghezza e profondità sono indicate qui sotto. Il montaggio è semplice e tutte le viti sono incluse.",
+    'pt': "Esta linda cadeira é feita de carvalho maciço e tem um design intemporal que combina com qualquer casa. Entregamos de forma rápida e gratuita em todo o país, e você pode sempre devolver o artigo no prazo de 30 dias. O produto é feito à mão por artesãos qualificados que se preocupam com a qualidade e os detalhes. Saiba mais sobre os nossos móveis e encontre inspiração para a sua sala, cozinha e quarto. É fácil de manter e a superfície é tratada com óleo natural. Se tiver alguma dúvida, não hesite em entrar em contacto connosco. Envio grátis em todas as encomendas. A nossa loja oferece uma grande variedade de produtos para a casa, o jardim e a cozinha. Escolha entre muitas cores e tamanhos, e descubra hoje a nova coleção. O preço inclui o IVA. Adicione ao carrinho e pague com segurança com cartão. O tampo da mesa é em folheado de nogueira e as pernas são em aço com pintura eletrostática. Disponível em preto, branco e cinzento. As almofadas são cheias de espuma macia e a capa pode ser retirada e lavada. Dimensões: a altura, a largura e a profundidade estão indicadas abaixo. A montagem é simples e todos os parafusos estão incluídos.",
+    'pl': "To piękne krzesło jest wykonane z litego dębu i ma ponadczasowy design, który pasuje do każdego domu. Dostarczamy szybko i bezpłatnie na terenie całej Polski, a towar zawsze możesz zwrócić w ciągu 30 dni. Produkt jest wykonany ręcznie przez doświadczonych rzemieślników, którzy dbają o jakość i szczegóły. Przeczytaj więcej o naszych meblach i znajdź inspirację do salonu, kuchni i sypialni. Jest łatwe w pielęgnacji, a powierzchnia jest zabezpieczona naturalnym olejem. Jeśli masz pytania, skontaktuj się z nami. Darmowa dostawa dla wszystkich zamówień. Nasz sklep oferuje szeroki wybór produktów do domu, ogrodu i kuchni. Wybierz spośród wielu kolorów i rozmiarów i odbierz nową kolekcję już dziś. Cena zawiera podatek VAT. Dodaj do koszyka i zapłać bezpiecznie kartą. Blat stołu wykonany jest z forniru orzechowego, a nogi ze stali malowanej proszkowo. Dostępny w kolorze czarnym, białym i szarym. Poduszki są wypełnione miękką pianką, a pokrowiec można zdjąć i wyprać. Wymiary: wysokość, szerokość i głębokość podano poniżej. Montaż jest prosty, a wszystkie śruby są w zestawie.",
+    'fi': "Tämä kaunis tuoli on valmistettu täystammesta, ja sen ajaton muotoilu sopii jokaiseen kotiin. Toimitamme nopeasti ja ilmaiseksi koko Suomeen, ja voit aina palauttaa tuotteen 30 päivän kuluessa. Tuote on taitavien käsityöläisten käsin valmistama, ja he välittävät laadusta ja yksityiskohdista. Lue lisää huonekaluistamme ja löydä inspiraatiota olohuoneeseen, keittiöön ja makuuhuoneeseen. Se on helppo pitää kunnossa, ja pinta on käsitelty luonnonöljyllä. Jos sinulla on kysyttävää, ota rohkeasti yhteyttä. Ilmainen toimitus kaikille tilauksille. Kauppamme tarjoaa laajan valikoiman tuotteita kotiin, puutarhaan ja keittiöön. Valitse monista väreistä ja kooista ja hanki uusi mallisto jo tänään. Hinta sisältää arvonlisäveron. Lisää ostoskoriin ja maksa turvallisesti kortilla. Pöytälevy on pähkinäviilua ja jalat jauhemaalattua terästä. Saatavana mustana, valkoisena ja harmaana. Tyynyt on täytetty pehmeällä vaahtomuovilla, ja päällinen on irrotettava ja pestävä. Mitat: korkeus, leveys ja syvyys on ilmoitettu alla. Kokoaminen on helppoa, ja kaikki ruuvit sisältyvät toimitukseen."
+}
+
+# Languages identified by script instead of n-grams: (language, pattern, minimum share of letters).
+# Kana is checked first since Japanese text also uses Han characters.
+LANGUAGE_SCRIPT_PATTERNS = [
+    ('ja', r'[\u3040-\u30ff]', 0.1),
+    ('ko', r'[\uac00-\ud7af\u1100-\u11ff]', 0.5),
+    ('zh', r'[\u4e00-\u9fff]', 0.5),
+    ('ru', r'[\u0400-\u04ff]', 0.5)
+]
+
+LANGUAGE_DETECTION_MIN_LETTERS = 40
+LANGUAGE_DETECTION_MIN_MARGIN = 0.05
+
+# Danish, Norwegian and Swedish share most trigrams, so telling them apart needs a wider margin
+LANGUAGE_CLOSE_GROUPS = [{'da', 'no', 'sv'}]
+LANGUAGE_CLOSE_MIN_MARGIN = 0.12
+
+# Letters that rule languages in or out regardless of trigram scores
+LANGUAGE_MARKER_LETTERS = {
+    'æ': {'da', 'no'},
+    'ø': {'da', 'no'},
+    'ä': {'sv', 'de', 'fi'},
+    'ö': {'sv', 'de', 'fi'}
+}
+
+def _language_trigrams(text):
+    """Count character trigrams of the space-padded words in text"""
+    counts = Counter()
+    for word in re.findall(r"[^\W\d_]+", text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            counts[padded[i:i + 3]] += 1
+    return counts
+
+def _build_language_profiles():
+    profiles = {}
+    for language, seed in LANGUAGE_SEED_TEXTS.items():
+        counts = _language_trigrams(seed)
+        norm = math.sqrt(sum(value * value for value in counts.values()))
+        profiles[language] = {gram: value / norm for gram, value in counts.items()}
+    return profiles
+
+LANGUAGE_PROFILES = _build_language_profiles()
+
+def detect_language(text):
+    """Detect the language of a text locally. Returns (language_code, margin), language is None if unsure"""
+    plain = re.sub(r'<[^>]+>|https?://\S+|\{\{.*?\}\}|\{%.*?%\}', ' ', str(text))
+    letters = re.findall(r'[^\W\d_]', plain)
+    if not letters:
+        return None, 0.0
+
+    for language, pattern, min_share in LANGUAGE_SCRIPT_PATTERNS:
+        if len(re.findall(pattern, plain)) >= max(len(letters) * min_share, 4):
+            return language, 1.0
+
+    if len(letters) < LANGUAGE_DETECTION_MIN_LETTERS:
+        return None, 0.0
+
+    counts = _language_trigrams(plain)
+    norm = math.sqrt(sum(value * value for value in counts.values()))
+    if not norm:
+        return None, 0.0
+
+    candidates = set(LANGUAGE_PROFILES)
+    lowered = plain.lower()
+    for letter, languages in LANGUAGE_MARKER_LETTERS.items():
+        if letter in lowered and len(candidates & languages) >= 2:
+            candidates &= languages
+
+    scores = sorted(
+        ((sum(value * LANGUAGE_PROFILES[language].get(gram, 0.0) for gram, value in counts.items()) / norm, language)
+         for language in candidates),
+        reverse=True
+    )
+    (best_score, best_language), (second_score, second_language) = scores[0], scores[1]
+    margin = best_score - second_score
+    min_margin = LANGUAGE_DETECTION_MIN_MARGIN
+    if any(best_language in group and second_language in group for group in LANGUAGE_CLOSE_GROUPS):
+        min_margin = LANGUAGE_CLOSE_MIN_MARGIN
+    if margin < min_margin:
+        return None, margin
+    return best_language, margin
+
+def detect_language_segments(text):
+    """Detect languages per sentence/block; returns the set of confidently detected languages"""
+    segments = re.split(r'<[^>]+>|\n+|(?<=[.!?])\s+', str(text))
+    languages = set()
+    for segment in segments:
+        language, _ = detect_language(segment)
+        if language:
+            languages.add(language)
+    return languages
+
+def detect_rows_in_target_language(df, candidate_mask):
+    """Batch language detection over candidate rows.
+
+    Each distinct default content is detected once. Returns (accepted_mask, mixed_mask, stats)
+    where accepted rows are already written in their target locale and mixed rows contain
+    more than one language.
+    """
+    accepted_mask = pd.Series(False, index=df.index)
+    mixed_mask = pd.Series(False, index=df.index)
+    candidates = df[candidate_mask]
+
+    detections = {}
+    for text in candidates['default content'].unique():
+        language, margin = detect_language(text)
+        segment_languages = detect_language_segments(text) if len(text) > 80 else set()
+        detections[text] = (language, margin, segment_languages)
+
+    by_language = {}
+    undetermined = 0
+    for row_index, text, locale in zip(candidates.index, candidates['default content'], candidates['locale']):
+        language, _, segment_languages = detections[text]
+        target_language = locale.split('-')[0].lower()
+
+        if len(segment_languages) > 1:
+            mixed_mask[row_index] = True
+        elif language == target_language:
+            accepted_mask[row_index] = True
+
+        if language:
+            by_language[language] = by_language.get(language, 0) + 1
+        else:
+            undetermined += 1
+
+    checked = int(candidate_mask.sum())
+    accepted = int(accepted_mask.sum())
+    stats = {
+        'checked': checked,
+        'distinct_texts': len(detections),
+        'accepted': accepted,
+        'mixed': int(mixed_mask.sum()),
+        'undetermined': undetermined,
+        'by_language': by_language,
+        'hit_rate': round(accepted / checked, 4) if checked else 0.0
+    }
+    return accepted_mask, mixed_mask, stats
+
+# Rows matching these rules never need a round trip to OpenAI.
+# 'copy' writes the default content through as the translation, 'skip' leaves the row
+# untouched. 'types'/'fields' scope a rule to specific Shopify types/fields (empty = all).
+# Rules are applied in order and a row is claimed by the first rule that matches.
+DEFAULT_TRANSLATION_SKIP_RULES = {
+    'image_url': {'enabled': True, 'action': 'copy', 'types': [], 'fields': []},
+    'url': {'enabled': True, 'action': 'copy', 'types': [], 'fields': []},
+    'numeric': {'enabled': True, 'action': 'copy', 'types': [], 'fields': []},
+    'sku': {'enabled': True, 'action': 'copy', 'types': [], 'fields': []},
+    'json': {'enabled': True, 'action': 'skip', 'types': [], 'fields': []},
+    'identical': {'enabled': True, 'action': 'copy', 'types': [], 'fields': []}
+}
+
+TRANSLATION_SKIP_PATTERNS = {
+    'image_url': r'^\s*(?:https?:)?//\S+\.(?:png|jpe?g|gif|webp|svg|avif)(?:\?\S*)?\s*$',
+    'url': r'^\s*(?:(?:https?:)?//|/|shopify://|mailto:|tel:)\S*\s*$',
+    'numeric': r'^[\s\d.,:;%+\-/x×()]*\d[\s\d.,:;%+\-/x×()]*$',
+    # Codes with a separator (ABC-123, KS/20.1) or at least three digits (A1234); uppercase
+    # words with a digit or two (MP3, USB3, COVID19) are still translated
+    'sku': r'^\s*(?=\S*\d)(?=\S*[-._/]|(?:\S*\d){3})[A-Z0-9][A-Z0-9._/\-]{2,}\s*$',
+    'json': r'^\s*(?:\{[\s\S]*\}|\[[\s\S]*\])\s*$'
+}
+
+TRANSLATION_FRAME_COLUMNS = ['locale', 'type', 'field', 'default content', 'translated content']
+
+def build_translation_frame(csv_data):
+    """Build a string-typed DataFrame of the columns used for row selection"""
+    df = pd.DataFrame.from_records(csv_data, columns=TRANSLATION_FRAME_COLUMNS)
+    return df.fillna('').astype(str)
+
+def needs_translation_mask(df):
+    """Vectorized version of the 'translated content is empty' check used across the translator"""
+    translated = df['translated content'].str.strip()
+    return (translated == '') | (translated == 'nan')
+
+def failed_translation_mask(df):
+    """Rows marked [ERROR] by an earlier run, so a re-run only retries the failures"""
+    return df['translated content'].str.startswith('[ERROR]')
+
+def merge_skip_rules(overrides=None):
+    """Merge request-level overrides ({rule: {enabled, action, types, fields}}) over the defaults"""
+    rules = {name: dict(rule) for name, rule in DEFAULT_TRANSLATION_SKIP_RULES.items()}
+    for name, override in (overrides or {}).items():
+        if name in rules and isinstance(override, dict):
+            rules[name].update({k: v for k, v in override.items() if k in ('enabled', 'action', 'types', 'fields')})
+    return rules
+
+def apply_translation_skip_rules(df, candidate_mask, rules):
+    """Return {rule_name: mask} for the candidate rows claimed by each enabled skip rule"""
+    remaining = candidate_mask.copy()
+    content = df['default content']
+    matches = {}
+
+    for name, rule in rules.items():
+        if not rule.get('enabled') or not remaining.any():
+            continue
+
+        scope = remaining.copy()
+        if rule.get('types'):
+            scope &= df['type'].isin(rule['types'])
+        if rule.get('fields'):
+            scope &= df['field'].isin(rule['fields'])
+
+        if name == 'identical':
+            # Strings that earlier translations kept unchanged (brand names, model names, ...)
+            # per locale, since a name kept in one language may still need translating in another
+            kept_as_is = ~needs_translation_mask(df) & (df['translated content'] == content)
+            kept_pairs = set(df.loc[kept_as_is, ['locale', 'default content']].itertuples(index=False, name=None))
+            pairs = pd.MultiIndex.from_arrays([df['locale'], content])
+            mask = scope & pd.Series(pairs.isin(kept_pairs), index=df.index)
+        elif name in TRANSLATION_SKIP_PATTERNS:
+            mask = scope & content.str.match(TRANSLATION_SKIP_PATTERNS[name])
+        else:
+            continue
+
+        if mask.any():
+            matches[name] = mask
+            remaining &= ~mask
+
+    return matches
+
+# Rows are translated highest weight first. Entries match on any of type/field/locale
+# (a string or list of strings; missing = any) and a row gets the highest matching weight.
+DEFAULT_TRANSLATION_PRIORITY = [
+    {'type': 'PRODUCT', 'field': 'title', 'weight': 100},
+    {'type': 'COLLECTION', 'field': 'title', 'weight': 95},
+    {'field': ['meta_title', 'meta_description'], 'weight': 90},
+    {'field': 'handle', 'weight': 80},
+    {'field': 'body_html', 'weight': 50}
+]
+
+TRANSLATION_MODEL = "gpt-4o-mini"
+TRANSLATION_CONCURRENCY = 1
+MAX_TRANSLATION_CONCURRENCY = 8
+
+def translation_priority_weights(df, priority_rules):
+    """Return a Series with the priority weight of every row"""
+    weights = pd.Series(0, index=df.index)
+    for entry in priority_rules:
+        try:
+            weight = int(entry.get('weight', 0))
+        except (AttributeError, TypeError, ValueError):
+            continue
+
+        mask = pd.Series(True, index=df.index)
+        for key in ('type', 'field', 'locale'):
+            if entry.get(key):
+                values = entry[key] if isinstance(entry[key], list) else [entry[key]]
+                mask &= df[key].isin(values)
+
+        weights[mask] = weights[mask].clip(lower=weight)
+    return weights
+
+# Limits for the local translation validator
+TRANSLATION_MAX_RETRIES = 1
+TRANSLATION_LENGTH_RATIO_RANGE = (0.4, 2.5)
+TRANSLATION_LENGTH_RATIO_MIN_CHARS = 20
+# Han, kana and Hangul characters carry roughly a Latin word-piece each, so they count
+# as several characters when comparing lengths against the Danish source
+TRANSLATION_WIDE_CHAR_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+TRANSLATION_WIDE_CHAR_WEIGHT = 3
+
+TRANSLATION_TAG_PATTERN = re.compile(r'<\s*(/?)\s*([a-zA-Z][\w:-]*)')
+TRANSLATION_PLACEHOLDER_PATTERN = re.compile(r'\{\{.*?\}\}|\{%.*?%\}|\{[\w.]+\}|%\(?\w*\)?[sd]|\[\[.*?\]\]', re.DOTALL)
+# Preambles only count when they announce the translation, since copy itself may start with
+# "Here is", "Voici" or "Ecco"
+TRANSLATION_CHATTER_PATTERN = re.compile(
+    r'^\s*(?:sure[,!]|certainly[,!]|'
+    r'(?:here is|here\'s) (?:the |your )?translat|translation:|translated text:|'
+    r'her er (?:oversættelsen|den oversatte)|oversættelse:|'
+    r'hier ist (?:die )?übersetzung|übersetzung:|'
+    r'voici (?:la |votre )?traduction|traduction ?:|'
+    r'aquí (?:está|tienes) (?:la )?traducción|traducción:|'
+    r'ecco (?:la )?traduzione|traduzione:)',
+    re.IGNORECASE
+)
+
+# Danish descriptions of validation issues, used in retry prompts and error messages
+TRANSLATION_ISSUE_DESCRIPTIONS = {
+    'empty': 'oversættelsen var tom',
+    'truncated': 'oversættelsen blev afbrudt før den var færdig',
+    'content_filter': 'oversættelsen blev blokeret af indholdsfilteret',
+    'html_tags': 'HTML-tags matchede ikke originalen',
+    'placeholders': 'variabler/placeholders (f.eks. {{ ... }}) blev ændret eller fjernet',
+    'length_ratio': 'længden afveg for meget fra originalen',
+    'chatter': 'oversættelsen indeholdt forklarende tekst'
+}
+
+def translation_text_length(text):
+    """Length used for the length ratio check, with CJK characters weighted up"""
+    text = text.strip()
+    return len(text) + (TRANSLATION_WIDE_CHAR_WEIGHT - 1) * len(TRANSLATION_WIDE_CHAR_PATTERN.findall(text))
+
+def validate_translation(source, translated, finish_reason=None):
+    """Check a translation locally. Returns a list of issue codes, empty if the translation looks valid"""
+    if not translated or not translated.strip():
+        return ['empty']
+
+    issues = []
+    if finish_reason == 'length':
+        issues.append('truncated')
+    elif finish_reason == 'content_filter':
+        issues.append('content_filter')
+
+    # Same tags (by name and opening/closing) in the same quantities
+    if Counter(m.groups() for m in TRANSLATION_TAG_PATTERN.finditer(source)) != \
+            Counter(m.groups() for m in TRANSLATION_TAG_PATTERN.finditer(translated)):
+        issues.append('html_tags')
+
+    # Liquid variables and other placeholders must survive untouched
+    if Counter(TRANSLATION_PLACEHOLDER_PATTERN.findall(source)) != \
+            Counter(TRANSLATION_PLACEHOLDER_PATTERN.findall(translated)):
+        issues.append('placeholders')
+
+    source_length = translation_text_length(source)
+    if len(source.strip()) >= TRANSLATION_LENGTH_RATIO_MIN_CHARS:
+        ratio = translation_text_length(translated) / source_length
+        low, high = TRANSLATION_LENGTH_RATIO_RANGE
+        if ratio < low or ratio > high:
+            issues.append('length_ratio')
+
+    if TRANSLATION_CHATTER_PATTERN.match(translated) and not TRANSLATION_CHATTER_PATTERN.match(source):
+        issues.append('chatter')
+
+    return issues
+
+def describe_translation_issues(issues):
+    return ', '.join(TRANSLATION_ISSUE_DESCRIPTIONS.get(issue, issue) for issue in issues)
+
+def csv_translation_system_prompt(language_name, previous_issues=None):
+    """Same prompt as the desktop app. previous_issues tells the model why an earlier attempt was rejected"""
+    system_prompt = f"Du er en professionel oversætter. Oversæt nøjagtigt og ordret fra dansk til {language_name}. Bevar alle HTML-tags og strukturen præcis som den er. Du må ikke forklare noget. Returnér KUN den oversatte tekst."
+    if previous_issues:
+        system_prompt += f" VIGTIGT: Et tidligere forsøg blev afvist fordi {describe_translation_issues(previous_issues)}. Bevar alle HTML-tags og variabler som {{{{ ... }}}} uændret."
+    return system_prompt
+
+def request_csv_translation(client, text, language_name, previous_issues=None):
+    """Translate a single CSV value"""
+    return client.chat.completions.create(
+        model=TRANSLATION_MODEL,
+        messages=[
+            {
+                "role": "system", 
+                "content": csv_translation_system_prompt(language_name, previous_issues)
+            },
+            {
+                "role": "user", 
+                "content": str(text)
+            }
+        ],
+        max_tokens=4000,
+        temperature=0.3
+    )
+
+def run_csv_translation(job, client, rows_to_translate, supported_languages, concurrency=1, max_retries=TRANSLATION_MAX_RETRIES):
+    """Translate (row_index, row, weight) tuples in the given order, recording progress on the job.
+
+    Every result is checked with validate_translation. Rows that fail (invalid output or API
+    errors) are re-queued in up to max_retries follow-up passes before being marked [ERROR].
+    Rows listed in job['_duplicates'] share the result of the row they duplicate.
+    """
+    csv_data = job['_csv_data']
+    duplicates = job.get('_duplicates', {})
+    row_ids, _ = build_translation_row_index(csv_data)
+    total = len(rows_to_translate)
+
+    def shorten(text):
+        return text[:100] + '...' if len(text) > 100 else text
+
+    def translate_row(row_index, row, weight, previous_issues=None):
+        """Returns a list of issues, empty on success"""
+        locale = row.get('locale')
+        original_text = str(row.get('default content', ''))
+
+        try:
+            print(f"Translating row {row_index + 1} to {locale} (priority {weight}): {original_text[:50]}...")
+            rejected_issues = [issue for issue in previous_issues or [] if not issue.startswith('api_error')]
+            response = request_csv_translation(client, original_text, supported_languages[locale], rejected_issues)
+            choice = response.choices[0]
+            translated_text = (choice.message.content or '').strip()
+            issues = validate_translation(original_text, translated_text, getattr(choice, 'finish_reason', None))
+
+            # Small delay to respect API rate limits
+            time.sleep(0.5)
+
+        except Exception as e:
+            print(f"❌ API error for row {row_index + 1}: {e}")
+
+            # Check if it's a rate limit error and add longer delay
+            if "rate_limit" in str(e).lower() or "quota" in str(e).lower():
+                print("⏳ Rate limit detected, waiting 5 seconds...")
+                time.sleep(5)
+            issues = [f"api_error: {str(e)}"]
+            translated_text = ''
+
+        if issues:
+            print(f"⚠️ Row {row_index + 1} failed: {issues}")
+            with job['_lock']:
+                if previous_issues is None:
+                    job['processed_count'] += 1
+                    if max_retries > 0:
+                        job['progress_updates'].append({
+                            'row_index': row_index,
+                            'row_id': row_ids[row_index],
+                            'locale': locale,
+                            'priority': weight,
+                            'original_text': shorten(original_text),
+                            'translated_text': shorten(translated_text),
+                            'status': 'retry',
+                            'issues': issues,
+                            'progress': f"{job['processed_count']}/{total}"
+                        })
+            return issues
+
+        # Update the row (and any identical rows) in our data
+        for target_index in [row_index] + duplicates.get(row_index, []):
+            csv_data[target_index]['translated content'] = translated_text
+
+        with job['_lock']:
+            if previous_issues is None:
+                job['processed_count'] += 1
+            for target_index in [row_index] + duplicates.get(row_index, []):
+                job['translated_count'] += 1
+                job['completed_rows'][target_index] = weight
+            if previous_issues:
+                job['retried_count'] += 1
+            job['progress_updates'].append({
+                'row_index': row_index,
+                'row_id': row_ids[row_index],
+                'locale': locale,
+                'priority': weight,
+                'original_text': shorten(original_text),
+                'translated_text': shorten(translated_text),
+                'status': 'completed',
+                'progress': f"{job['processed_count']}/{total}"
+            })
+        print(f"✅ Successfully translated row {row_index + 1} to {locale}")
+        return []
+
+    def run_pass(rows, previous_issues):
+        """Run one pass over (row_index, row, weight) and return {row_index: issues} for failures"""
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            # The executor queue is FIFO, so rows start in priority order
+            futures = [(row_index, executor.submit(translate_row, row_index, row, weight, previous_issues.get(row_index) if previous_issues else None))
+                       for row_index, row, weight in rows]
+            for row_index, future in futures:
+                issues = future.result()
+                if issues:
+                    failures[row_index] = issues
+        return failures
+
+    print(f"Starting translation of {total} rows with {concurrency} worker(s)...")
+    try:
+        failures = run_pass(rows_to_translate, None)
+
+        # Follow-up passes only re-queue the rows that failed
+        for retry_pass in range(1, max_retries + 1):
+            if not failures:
+                break
+            print(f"🔁 Retry pass {retry_pass}: re-queueing {len(failures)} failed rows")
+            job['retry_passes'] = retry_pass
+            failures = run_pass([item for item in rows_to_translate if item[0] in failures], failures)
+
+        rows_by_index = {item[0]: item for item in rows_to_translate}
+
+        for row_index, issues in failures.items():
+            row_index, row, weight = rows_by_index[row_index]
+            original_text = str(row.get('default content', ''))
+            api_errors = [issue[len('api_error: '):] for issue in issues if issue.startswith('api_error: ')]
+            reason = '; '.join(api_errors) if api_errors else describe_translation_issues(issues)
+            error_msg = f"Fejl ved oversættelse af række {row_index + 1}: {reason}"
+            print(f"❌ {error_msg}")
+
+            # Set error marker in translation; the row is picked up again on the next run
+            for target_index in [row_index] + duplicates.get(row_index, []):
+                csv_data[target_index]['translated content'] = f"[ERROR] {original_text}"
+
+            with job['_lock']:
+                job['errors'].append(error_msg)
+                job['validation_failures'].append({'row_index': row_index, 'row_id': row_ids[row_index], 'issues': issues})
+                job['progress_updates'].append({
+                    'row_index': row_index,
+                    'row_id': row_ids[row_index],
+                    'locale': row.get('locale'),
+                    'priority': weight,
+                    'original_text': shorten(original_text),
+                    'translated_text': f"[ERROR] {reason}",
+                    'status': 'error',
+                    'progress': f"{job['processed_count']}/{total}"
+                })
+
+        job['status'] = 'completed'
+    except Exception as e:
+        print(f"Error in CSV translation job {job['id']}: {e}")
+        job['status'] = 'failed'
+        job['errors'].append(str(e))
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+
+def translation_memory_matches(df, candidate_mask):
+    """Return a Series of stored translations for candidate rows whose (locale, default content)
+    already has a finished translation elsewhere in the data"""
+    finished = ~needs_translation_mask(df) & ~failed_translation_mask(df)
+    memory = (df[finished & (df['default content'].str.strip() != '')]
+              .drop_duplicates(['locale', 'default content'])
+              .set_index(['locale', 'default content'])['translated content'])
+    if memory.empty or not candidate_mask.any():
+        return pd.Series(dtype=str)
+
+    candidates = df.loc[candidate_mask, ['locale', 'default content']]
+    keys = pd.MultiIndex.from_frame(candidates)
+    values = pd.Series(memory.reindex(keys).values, index=candidates.index)
+    return values.dropna()
+
+def plan_csv_translation(csv_data, selected_locales, options):
+    """Work out which rows need an API call without changing csv_data.
+
+    Returns a dict with the frame, the remaining candidate mask, fill_values (row -> text
+    for rows handled locally), skip_stats, language detection stats and mixed rows.
+    """
+    df = build_translation_frame(csv_data)
+    target_locales = [locale for locale in selected_locales if locale in TRANSLATION_LANGUAGES]
+    default_content = df['default content'].str.strip()
+    candidate_mask = (df['locale'].isin(target_locales) &
+                      (needs_translation_mask(df) | failed_translation_mask(df)) &
+                      (default_content != '') & (default_content != 'nan'))
+
+    fill_values = []
+    skip_stats = {}
+
+    # Copy through or skip rows that don't need an API call
+    skip_rules = merge_skip_rules(options.get('skip_rules'))
+    for rule_name, mask in apply_translation_skip_rules(df, candidate_mask, skip_rules).items():
+        action = skip_rules[rule_name]['action']
+        if action == 'copy':
+            fill_values.append(df.loc[mask, 'default content'])
+        skip_stats[rule_name] = {'action': action, 'rows': int(mask.sum())}
+        candidate_mask &= ~mask
+
+    # Reuse translations already made for the same text and locale
+    if options.get('translation_memory', True) and candidate_mask.any():
+        memory_hits = translation_memory_matches(df, candidate_mask)
+        if not memory_hits.empty:
+            fill_values.append(memory_hits)
+            skip_stats['translation_memory'] = {'action': 'copy', 'rows': len(memory_hits)}
+            candidate_mask &= ~df.index.isin(memory_hits.index)
+
+    # Accept rows whose default content is already in the target language
+    language_stats = None
+    mixed_rows = []
+    if options.get('language_detection', True) and candidate_mask.any():
+        accepted_mask, mixed_mask, language_stats = detect_rows_in_target_language(df, candidate_mask)
+        if accepted_mask.any():
+            fill_values.append(df.loc[accepted_mask, 'default content'])
+            skip_stats['language_detection'] = {'action': 'copy', 'rows': int(accepted_mask.sum())}
+        candidate_mask &= ~accepted_mask
+        mixed_rows = mixed_mask[mixed_mask].index.tolist()
+        print(f"Language detection: {language_stats}")
+
+    return {
+        'df': df,
+        'candidate_mask': candidate_mask,
+        'fill_values': pd.concat(fill_values) if fill_values else pd.Series(dtype=str),
+        'skip_stats': skip_stats,
+        'language_stats': language_stats,
+        'mixed_rows': mixed_rows
+    }
+
+def group_duplicate_rows(df, ordered_indices):
+    """Split ordered row indices into the rows to send and {first_row: [identical rows]}"""
+    first_by_key = {}
+    duplicates = {}
+    unique_indices = []
+    for row_index in ordered_indices:
+        key = (df.at[row_index, 'locale'], df.at[row_index, 'default content'])
+        if key in first_by_key:
+            duplicates.setdefault(first_by_key[key], []).append(row_index)
+        else:
+            first_by_key[key] = row_index
+            unique_indices.append(row_index)
+    return unique_indices, duplicates
+
+# Estimation parameters (gpt-4o-mini list prices in USD per 1M tokens)
+TRANSLATION_PRICE_PER_MILLION = {'input': 0.15, 'output': 0.60}
+TRANSLATION_OUTPUT_RATIO = 1.15
+TRANSLATION_MESSAGE_OVERHEAD_TOKENS = 11
+TRANSLATION_REQUEST_LATENCY = 0.8
+TRANSLATION_OUTPUT_TOKENS_PER_SECOND = 70
+TRANSLATION_REQUEST_DELAY = 0.5
+
+TOKEN_ESTIMATE_PATTERN = re.compile(r'[^\W\d_]+|\d+|\s+|[^\w\s]', re.UNICODE)
+
+def get_token_counter():
+    """Return (count_tokens, method). Uses tiktoken when installed, else a local approximation"""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(TRANSLATION_MODEL)
+        except KeyError:
+            encoding = tiktoken.get_encoding('o200k_base')
+        return (lambda text: len(encoding.encode(text, disallowed_special=()))), 'tiktoken'
+    except Exception:
+        return estimate_tokens, 'approximate'
+
+def estimate_tokens(text):
+    """Approximate BPE token count: words split into ~4 character pieces, digits in groups of 3,
+    punctuation one token each, whitespace folded into the following token"""
+    tokens = 0
+    for piece in TOKEN_ESTIMATE_PATTERN.findall(text):
+        if piece[0].isspace():
+            continue
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            tokens += 1
+    return tokens
+
+def estimate_csv_translation(rows, concurrency):
+    """Project requests, tokens, cost and wall-clock time for the rows that need an API call"""
+    count_tokens, token_method = get_token_counter()
+    prompt_tokens = {}
+    by_locale = {}
+    input_tokens = output_tokens = 0
+    request_seconds = 0.0
+
+    for row in rows:
+        locale = row['locale']
+        if locale not in prompt_tokens:
+            prompt_tokens[locale] = count_tokens(csv_translation_system_prompt(TRANSLATION_LANGUAGES[locale]))
+        text_tokens = count_tokens(str(row['default content']))
+        row_input = prompt_tokens[locale] + text_tokens + TRANSLATION_MESSAGE_OVERHEAD_TOKENS
+        row_output = min(math.ceil(text_tokens * TRANSLATION_OUTPUT_RATIO), 4000)
+
+        input_tokens += row_input
+        output_tokens += row_output
+        request_seconds += TRANSLATION_REQUEST_LATENCY + row_output / TRANSLATION_OUTPUT_TOKENS_PER_SECOND + TRANSLATION_REQUEST_DELAY
+
+        stats = by_locale.setdefault(locale, {'requests': 0, 'input_tokens': 0, 'output_tokens': 0})
+        stats['requests'] += 1
+        stats['input_tokens'] += row_input
+        stats['output_tokens'] += row_output
+
+    cost = (input_tokens * TRANSLATION_PRICE_PER_MILLION['input'] +
+            output_tokens * TRANSLATION_PRICE_PER_MILLION['output']) / 1_000_000
+    for stats in by_locale.values():
+        stats['cost_usd'] = round((stats['input_tokens'] * TRANSLATION_PRICE_PER_MILLION['input'] +
+                                   stats['output_tokens'] * TRANSLATION_PRICE_PER_MILLION['output']) / 1_000_000, 6)
+
+    return {
+        'model': TRANSLATION_MODEL,
+        'token_method': token_method,
+        'requests': len(rows),
+        'input_tokens': input_tokens,
+        'output_tokens': output_tokens,
+        'cost_usd': round(cost, 6),
+        'concurrency': concurrency,
+        'estimated_seconds': round(request_seconds / max(1, concurrency), 1),
+        'by_locale': by_locale
+    }
+
+def build_csv_response(rows, filename):
+    """Serialize rows to a CSV download response"""
+    df = pd.DataFrame(rows)
+    output = io.StringIO()
+    df.to_csv(output, index=False)
+    return Response(
+        output.getvalue(),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }
+    )
+
 @app.route('/api/translate-csv', methods=['POST'])
 def translate_csv():
     """Translate CSV content using OpenAI"""
@@ -3210,133 +5915,126 @@ def translate_csv():
         except Exception:
             client = OpenAI(api_key=api_key)
         
-        # Language mapping - same as desktop app
-        supported_languages = {
-            "da": "dansk",
-            "de": "tysk", 
-            "en": "engelsk",
-            "es": "spansk",
-            "fr": "fransk",
-            "it": "italiensk",
-            "nl": "hollandsk",
-            "sv": "svensk",
-            "no": "norsk",
-            "fi": "finsk",
-            "pl": "polsk",
-            "pt": "portugisisk",
-            "ru": "russisk",
-            "zh": "kinesisk",
-            "ja": "japansk",
-            "ko": "koreansk"
-        }
-        
-        # Find rows that need translation
-        rows_to_translate = []
-        for i, row in enumerate(csv_data):
-            locale = row.get('locale')
-            if locale in selected_locales and locale in supported_languages:
-                translated_content = row.get('translated content', '')
-                # Check if translation is missing or empty
-                if (not translated_content or 
-                    str(translated_content).strip() == '' or 
-                    str(translated_content) == 'nan'):
-                    rows_to_translate.append((i, row))
-        
+        supported_languages = TRANSLATION_LANGUAGES
+
+        # Find rows that need translation (vectorized over the whole data set)
+        plan = plan_csv_translation(csv_data, selected_locales, data)
+        df = plan['df']
+        candidate_mask = plan['candidate_mask']
+        skip_stats = plan['skip_stats']
+        language_stats = plan['language_stats']
+        mixed_rows = plan['mixed_rows']
+        for row_index, value in plan['fill_values'].items():
+            csv_data[row_index]['translated content'] = value
+
+        saved_api_calls = sum(stats['rows'] for stats in skip_stats.values())
+        if saved_api_calls:
+            print(f"Skip rules saved {saved_api_calls} API calls: {skip_stats}")
+
+        rows_to_translate = [(i, csv_data[i]) for i in candidate_mask[candidate_mask].index]
+
         if not rows_to_translate:
+            user_session['translator_csv_data'] = csv_data
             return jsonify({
                 'success': True,
                 'message': f'Alle valgte rækker har allerede oversættelser',
-                'translated_count': 0
+                'translated_count': 0,
+                'skipped_count': saved_api_calls,
+                'saved_api_calls': saved_api_calls,
+                'skip_stats': skip_stats,
+                'language_detection': language_stats,
+                'mixed_language_rows': mixed_rows
             })
-        
-        translated_count = 0
-        errors = []
-        progress_updates = []
-        
-        # Translate each row
-        print(f"Starting translation of {len(rows_to_translate)} rows...")
-        for i, (row_index, row) in enumerate(rows_to_translate):
-            locale = row.get('locale')
-            original_text = row.get('default content', '')
-            
-            if original_text and str(original_text).strip():
-                try:
-                    print(f"[{i+1}/{len(rows_to_translate)}] Translating to {locale}: {original_text[:50]}...")
-                    
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {
-                                "role": "system", 
-                                "content": f"Du er en professionel oversætter. Oversæt nøjagtigt og ordret fra dansk til {supported_languages[locale]}. Bevar alle HTML-tags og strukturen præcis som den er. Du må ikke forklare noget. Returnér KUN den oversatte tekst."
-                            },
-                            {
-                                "role": "user", 
-                                "content": str(original_text)
-                            }
-                        ],
-                        max_tokens=4000,
-                        temperature=0.3
-                    )
-                    
-                    translated_text = response.choices[0].message.content.strip()
-                    
-                    # Update the row in our data
-                    csv_data[row_index]['translated content'] = translated_text
-                    translated_count += 1
-                    
-                    print(f"✅ Successfully translated row {row_index + 1} to {locale}")
-                    
-                    # Add progress update
-                    progress_updates.append({
-                        'row_index': row_index,
-                        'locale': locale,
-                        'original_text': original_text[:100] + '...' if len(original_text) > 100 else original_text,
-                        'translated_text': translated_text[:100] + '...' if len(translated_text) > 100 else translated_text,
-                        'status': 'completed',
-                        'progress': f"{i + 1}/{len(rows_to_translate)}"
-                    })
-                    
-                    # Small delay to respect API rate limits
-                    import time
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    error_msg = f"Fejl ved oversættelse af række {row_index + 1}: {str(e)}"
-                    errors.append(error_msg)
-                    print(f"❌ {error_msg}")
-                    
-                    # Check if it's a rate limit error and add longer delay
-                    if "rate_limit" in str(e).lower() or "quota" in str(e).lower():
-                        print("⏳ Rate limit detected, waiting 5 seconds...")
-                        import time
-                        time.sleep(5)
-                    
-                    # Set error marker in translation
-                    csv_data[row_index]['translated content'] = f"[ERROR] {original_text}"
-                    
-                    # Add error to progress updates
-                    progress_updates.append({
-                        'row_index': row_index,
-                        'locale': locale,
-                        'original_text': original_text[:100] + '...' if len(original_text) > 100 else original_text,
-                        'translated_text': f"[ERROR] {str(e)}",
-                        'status': 'error',
-                        'progress': f"{i + 1}/{len(rows_to_translate)}"
-                    })
-        
-        # Save updated data back to session
+
+        # Process SEO-critical rows first; ties keep file order
+        weights = translation_priority_weights(df, data.get('priority') or DEFAULT_TRANSLATION_PRIORITY)
+        ordered_indices = weights[candidate_mask].sort_values(ascending=False, kind='stable').index
+        unique_indices, duplicates = group_duplicate_rows(df, ordered_indices)
+        rows_to_translate = [(i, csv_data[i], int(weights[i])) for i in unique_indices]
+        duplicate_rows = sum(len(rows) for rows in duplicates.values())
+        if duplicate_rows:
+            skip_stats['duplicates'] = {'action': 'copy', 'rows': duplicate_rows}
+            saved_api_calls += duplicate_rows
+
+        try:
+            concurrency = min(max(int(data.get('concurrency', TRANSLATION_CONCURRENCY)), 1), MAX_TRANSLATION_CONCURRENCY)
+        except (TypeError, ValueError):
+            concurrency = TRANSLATION_CONCURRENCY
+        try:
+            max_retries = min(max(int(data.get('max_retries', TRANSLATION_MAX_RETRIES)), 0), 3)
+        except (TypeError, ValueError):
+            max_retries = TRANSLATION_MAX_RETRIES
+
+        # Save data to session up front so downloads and partial exports see progress
         user_session['translator_csv_data'] = csv_data
-        
+
+        job = create_background_job('csv_translation', session.get('user_id'),
+                                    total_rows=len(rows_to_translate),
+                                    processed_count=0,
+                                    translated_count=0,
+                                    errors=[],
+                                    progress_updates=[],
+                                    completed_rows={},
+                                    priority_totals={},
+                                    skipped_count=saved_api_calls,
+                                    saved_api_calls=saved_api_calls,
+                                    skip_stats=skip_stats,
+                                    language_detection=language_stats,
+                                    mixed_language_rows=mixed_rows,
+                                    concurrency=concurrency,
+                                    max_retries=max_retries,
+                                    retry_passes=0,
+                                    retried_count=0,
+                                    validation_failures=[],
+                                    duplicate_rows=duplicate_rows,
+                                    _csv_data=csv_data,
+                                    _duplicates=duplicates)
+        for row_index, _, weight in rows_to_translate:
+            job['priority_totals'][weight] = job['priority_totals'].get(weight, 0) + 1 + len(duplicates.get(row_index, []))
+
+        if data.get('background'):
+            worker = threading.Thread(target=run_csv_translation,
+                                      args=(job, client, rows_to_translate, supported_languages, concurrency, max_retries),
+                                      daemon=True)
+            worker.start()
+            return jsonify({
+                'success': True,
+                'background': True,
+                'job_id': job['id'],
+                'status': job['status'],
+                'total_rows': len(rows_to_translate),
+                'skipped_count': saved_api_calls,
+                'saved_api_calls': saved_api_calls,
+                'skip_stats': skip_stats,
+                'language_detection': language_stats,
+                'mixed_language_rows': mixed_rows,
+                'message': f'Oversættelse startet i baggrunden ({len(rows_to_translate)} rækker)'
+            })
+
+        run_csv_translation(job, client, rows_to_translate, supported_languages, concurrency, max_retries)
+        translated_count = job['translated_count']
+        errors = job['errors']
+
         result = {
             'success': True,
+            'job_id': job['id'],
             'translated_count': translated_count,
             'total_rows': len(rows_to_translate),
+            'skipped_count': saved_api_calls,
+            'saved_api_calls': saved_api_calls,
+            'skip_stats': skip_stats,
+            'language_detection': language_stats,
+            'mixed_language_rows': mixed_rows,
             'errors': errors,
-            'progress_updates': progress_updates,
+            'retried_count': job['retried_count'],
+            'validation_failures': job['validation_failures'],
+            'progress_updates': job['progress_updates'],
             'message': f'Oversættelse fuldført! {translated_count} rækker blev oversat.'
         }
-        
+
+        if saved_api_calls:
+            result['message'] += f' {saved_api_calls} rækker krævede ingen oversættelse.'
+
         if errors:
             result['message'] += f' {len(errors)} fejl opstod.'
         
@@ -3348,6 +6046,106 @@ def translate_csv():
         traceback.print_exc()
         return jsonify({'error': f'Fejl under oversættelse: {str(e)}'}), 500
 
+@app.route('/api/translate-csv/estimate', methods=['POST'])
+def estimate_translate_csv():
+    """Estimate requests, tokens, cost and time for a translate-csv call without calling OpenAI"""
+    try:
+        data = request.get_json() or {}
+        user_session = get_user_session()
+
+        selected_locales = data.get('selected_locales', [])
+        if not selected_locales:
+            return jsonify({'error': 'Ingen sprog valgt til oversættelse'}), 400
+
+        csv_data = user_session.get('translator_csv_data')
+        if not csv_data:
+            csv_files = user_session.get('translator_csv_files', {})
+            if not csv_files:
+                return jsonify({'error': 'Ingen CSV data fundet. Upload en CSV-fil først.'}), 400
+            csv_data = []
+            for file_id, file_data in csv_files.items():
+                csv_data.extend(file_data['data'])
+
+        try:
+            concurrency = min(max(int(data.get('concurrency', TRANSLATION_CONCURRENCY)), 1), MAX_TRANSLATION_CONCURRENCY)
+        except (TypeError, ValueError):
+            concurrency = TRANSLATION_CONCURRENCY
+
+        plan = plan_csv_translation(csv_data, selected_locales, data)
+        candidate_mask = plan['candidate_mask']
+        unique_indices, duplicates = group_duplicate_rows(plan['df'], candidate_mask[candidate_mask].index)
+        estimate = estimate_csv_translation([csv_data[i] for i in unique_indices], concurrency)
+
+        skip_stats = plan['skip_stats']
+        duplicate_rows = sum(len(rows) for rows in duplicates.values())
+        if duplicate_rows:
+            skip_stats['duplicates'] = {'action': 'copy', 'rows': duplicate_rows}
+
+        estimate.update({
+            'success': True,
+            'total_rows': len(csv_data),
+            'rows_needing_translation': int(candidate_mask.sum()),
+            'saved_api_calls': sum(stats['rows'] for stats in skip_stats.values()),
+            'skip_stats': skip_stats,
+            'language_detection': plan['language_stats']
+        })
+        return jsonify(estimate)
+
+    except Exception as e:
+        print(f"Error estimating CSV translation: {e}")
+        return jsonify({'error': f'Fejl ved estimering: {str(e)}'}), 500
+
+@app.route('/api/translate-csv/jobs/<job_id>', methods=['GET'])
+def get_translation_job(job_id):
+    """Get progress of a CSV translation job; ?since=N returns only newer progress updates"""
+    job = get_background_job(job_id, 'csv_translation')
+    if not job:
+        return jsonify({'error': 'Oversættelsesjob ikke fundet'}), 404
+
+    status = serialize_background_job(job)
+    since = request.args.get('since', type=int)
+    if since:
+        status['progress_updates'] = status['progress_updates'][since:]
+
+    # Completion per priority weight, highest first
+    completed_rows = status.pop('completed_rows')
+    priority_totals = status.pop('priority_totals')
+    completed_by_weight = {}
+    for weight in completed_rows.values():
+        completed_by_weight[weight] = completed_by_weight.get(weight, 0) + 1
+    status['priority_progress'] = [
+        {'priority': weight, 'total': total, 'completed': completed_by_weight.get(weight, 0)}
+        for weight, total in sorted(priority_totals.items(), reverse=True)
+    ]
+
+    return jsonify({'success': True, 'job': status})
+
+@app.route('/api/translate-csv/jobs/<job_id>/export', methods=['GET'])
+def export_translation_job(job_id):
+    """Export the rows a job has translated so far, optionally only those with priority >= min_priority"""
+    try:
+        job = get_background_job(job_id, 'csv_translation')
+        if not job:
+            return jsonify({'error': 'Oversættelsesjob ikke fundet'}), 404
+
+        min_priority = request.args.get('min_priority', type=int)
+        with job['_lock']:
+            completed_rows = dict(job['completed_rows'])
+
+        csv_data = job['_csv_data']
+        rows = [csv_data[row_index] for row_index, weight in sorted(completed_rows.items())
+                if min_priority is None or weight >= min_priority]
+
+        if not rows:
+            return jsonify({'error': 'Ingen færdige rækker at eksportere endnu'}), 400
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return build_csv_response(rows, f"partial_translation_{timestamp}.csv")
+
+    except Exception as e:
+        print(f"Error exporting translation job: {e}")
+        return jsonify({'error': f'Fejl ved eksport: {str(e)}'}), 500
+
 @app.route('/api/download-translated-csv', methods=['GET'])
 def download_translated_csv():
     """Download the translated CSV file"""
@@ -3395,17 +6193,20 @@ def get_csv_preview():
         if not csv_files:
             return jsonify({'error': 'Ingen CSV data fundet'}), 400
         
-        # Return all files data for preview
+        # File summaries only; rows are paged through /api/csv-preview/rows.
+        # include_data=1 keeps the old full-data response for callers that need it.
+        include_data = request.args.get('include_data') == '1'
         files_data = {}
         for file_id, file_info in csv_files.items():
             files_data[file_id] = {
                 'filename': file_info['filename'],
-                'data': file_info['data'],
                 'total_rows': file_info['total_rows'],
                 'untranslated_rows': file_info['untranslated_rows'],
                 'locales': file_info['locales'],
                 'columns': list(file_info['data'][0].keys()) if file_info['data'] else []
             }
+            if include_data:
+                files_data[file_id]['data'] = file_info['data']
         
         return jsonify({
             'files': files_data,
@@ -3416,6 +6217,171 @@ def get_csv_preview():
         print(f"Error getting CSV preview: {e}")
         return jsonify({'error': f'Fejl ved hentning af preview: {str(e)}'}), 500
 
+CSV_PREVIEW_PAGE_SIZE = 100
+CSV_PREVIEW_MAX_PAGE_SIZE = 1000
+CSV_PREVIEW_SEARCH_COLUMNS = ['default content', 'translated content']
+
+def get_file_row_ids(user_session, file_id):
+    """Row IDs of one uploaded file, numbered across all files like the combined working data,
+    so they can be passed to update-translation"""
+    csv_files = user_session.get('translator_csv_files', {})
+    key = [(fid, len(file_info['data'])) for fid, file_info in csv_files.items()]
+    cache = user_session.get('translator_files_row_ids')
+    if not cache or cache['key'] != key:
+        combined = [row for file_info in csv_files.values() for row in file_info['data']]
+        row_ids = build_translation_row_index(combined)[0]
+        by_file = {}
+        start = 0
+        for fid, size in key:
+            by_file[fid] = row_ids[start:start + size]
+            start += size
+        cache = {'key': key, 'row_ids': by_file}
+        user_session['translator_files_row_ids'] = cache
+    return cache['row_ids'][file_id]
+
+def get_csv_preview_source(user_session, file_id=None):
+    """Return (rows, row_ids, cache_key) for an uploaded file, or the working data if no file_id"""
+    if file_id:
+        file_info = user_session.get('translator_csv_files', {}).get(file_id)
+        if not file_info:
+            return None, None, None
+        return file_info['data'], get_file_row_ids(user_session, file_id), f"file:{file_id}"
+
+    rows = get_translator_working_data(user_session)
+    if not rows:
+        return None, None, None
+    row_ids, _ = get_translation_row_index(user_session, rows)
+    return rows, row_ids, 'working'
+
+def get_csv_preview_frame(user_session, cache_key, rows):
+    """String DataFrame of rows. Only the source being previewed is kept, since switching
+    files is rare next to paging. Only 'translated content' changes after upload, so that
+    column is refreshed from the row dicts on every call"""
+    cached = user_session.get('translator_preview_frame')
+    if cached and cached['key'] == cache_key and cached['rows'] is rows and cached['size'] == len(rows):
+        df = cached['df']
+    else:
+        df = pd.DataFrame.from_records(rows).fillna('').astype(str)
+        user_session['translator_preview_frame'] = {'key': cache_key, 'rows': rows, 'size': len(rows), 'df': df}
+
+    if 'translated content' in df.columns:
+        df['translated content'] = [str(row.get('translated content', '')) for row in rows]
+    return df
+
+def encode_preview_cursor(signature, offset):
+    payload = json.dumps({'s': signature, 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_preview_cursor(cursor, signature):
+    """Return the offset stored in cursor, or None if it's invalid or belongs to another query"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        return None
+    if payload.get('s') != signature or not isinstance(payload.get('o'), int):
+        return None
+    return payload['o']
+
+@app.route('/api/csv-preview/rows', methods=['GET'])
+def get_csv_preview_rows():
+    """Page through CSV rows with filtering, sorting and column projection.
+
+    Query parameters: file_id (default: working data), offset/limit or cursor, columns,
+    locale/type/field (comma separated), status (translated, untranslated, error), q, sort
+    (column name, prefix with - for descending).
+    """
+    try:
+        user_session = get_user_session()
+        args = request.args
+        rows, row_ids, cache_key = get_csv_preview_source(user_session, args.get('file_id'))
+        if rows is None:
+            return jsonify({'error': 'Ingen CSV data fundet'}), 400
+
+        df = get_csv_preview_frame(user_session, cache_key, rows)
+        mask = pd.Series(True, index=df.index)
+
+        for column in ('locale', 'type', 'field'):
+            values = [value for value in args.get(column, '').split(',') if value]
+            if values and column in df.columns:
+                mask &= df[column].isin(values)
+
+        status = args.get('status')
+        if status and 'translated content' in df.columns:
+            empty = needs_translation_mask(df)
+            failed = failed_translation_mask(df)
+            if status == 'untranslated':
+                mask &= empty
+            elif status == 'translated':
+                mask &= ~empty & ~failed
+            elif status == 'error':
+                mask &= failed
+            else:
+                return jsonify({'error': f'Ukendt status: {status}'}), 400
+
+        search = args.get('q', '').strip()
+        if search:
+            search_mask = pd.Series(False, index=df.index)
+            for column in CSV_PREVIEW_SEARCH_COLUMNS:
+                if column in df.columns:
+                    search_mask |= df[column].str.contains(search, case=False, regex=False)
+            mask &= search_mask
+
+        matched = df.index[mask]
+        sort = args.get('sort', '')
+        sort_column = sort.lstrip('-')
+        if sort_column:
+            if sort_column not in df.columns:
+                return jsonify({'error': f'Ukendt kolonne: {sort_column}'}), 400
+            sort_values = df.loc[matched, sort_column]
+            numeric_values = pd.to_numeric(sort_values, errors='coerce')
+            if numeric_values.notna().all():
+                sort_values = numeric_values
+            matched = sort_values.sort_values(ascending=not sort.startswith('-'), kind='stable').index
+
+        all_columns = [column for column in df.columns if not column.startswith('_')]
+        requested_columns = [column for column in args.get('columns', '').split(',') if column]
+        columns = [column for column in requested_columns if column in df.columns] or all_columns
+
+        # The cursor is only valid for the query that produced it
+        signature = hashlib.sha1(json.dumps(
+            [cache_key, sorted((key, value) for key, value in args.items() if key not in ('offset', 'limit', 'cursor'))]
+        ).encode('utf-8')).hexdigest()[:12]
+        try:
+            limit = min(max(int(args.get('limit', CSV_PREVIEW_PAGE_SIZE)), 1), CSV_PREVIEW_MAX_PAGE_SIZE)
+            offset = max(int(args.get('offset', 0)), 0)
+        except ValueError:
+            return jsonify({'error': 'Ugyldig offset eller limit'}), 400
+        if args.get('cursor'):
+            offset = decode_preview_cursor(args['cursor'], signature)
+            if offset is None:
+                return jsonify({'error': 'Ugyldig eller udløbet cursor'}), 400
+
+        page_positions = matched[offset:offset + limit]
+        page = df.loc[page_positions, columns]
+        # row_index addresses the working data, so file-scoped rows are only identified by row_id
+        page_rows = [
+            {'row_id': row_ids[position], **({'row_index': int(position)} if cache_key == 'working' else {}), **values}
+            for position, values in zip(page_positions, page.to_dict('records'))
+        ]
+
+        total = len(matched)
+        next_offset = offset + len(page_rows)
+        return jsonify({
+            'success': True,
+            'rows': page_rows,
+            'columns': columns,
+            'available_columns': all_columns,
+            'total': total,
+            'total_unfiltered': len(df),
+            'offset': offset,
+            'limit': limit,
+            'next_cursor': encode_preview_cursor(signature, next_offset) if next_offset < total else None
+        })
+
+    except Exception as e:
+        print(f"Error getting CSV preview rows: {e}")
+        return jsonify({'error': f'Fejl ved hentning af preview: {str(e)}'}), 500
+
 @app.route('/api/filter-untranslated', methods=['POST'])
 def filter_untranslated():
     """Filter and combine only untranslated rows from all CSV files"""
@@ -3562,6 +6528,9 @@ def remove_csv_file():
         filename = csv_files[file_id]['filename']
         del csv_files[file_id]
         user_session['translator_csv_files'] = csv_files
+        # The working data (and everything derived from it) still holds the removed file's rows
+        for key in ('translator_csv_data', 'translator_row_index', 'translator_preview_frame'):
+            user_session.pop(key, None)
         
         return jsonify({
             'success': True,
@@ -3572,6 +6541,66 @@ def remove_csv_file():
         print(f"Error removing CSV file: {e}")
         return jsonify({'error': f'Fejl ved fjernelse af fil: {str(e)}'}), 500
 
+# Shopify identity columns; together they identify a translation row across exports
+TRANSLATION_ROW_ID_COLUMNS = ['type', 'identification', 'field', 'locale', 'market']
+
+def _row_identity_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ''
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+def build_translation_row_index(csv_data):
+    """Return (row_ids, {row_id: position}) for csv_data.
+
+    IDs are hashes of the identity columns, so they survive re-filtering. Rows with an
+    identical identity (e.g. the same export uploaded twice) get a #n suffix in order.
+    """
+    row_ids = []
+    positions = {}
+    for position, row in enumerate(csv_data):
+        identity = '\x1f'.join(_row_identity_value(row.get(column, '')) for column in TRANSLATION_ROW_ID_COLUMNS)
+        if not row.get('identification'):
+            identity += '\x1f' + str(row.get('default content', ''))
+        row_id = hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+        if row_id in positions:
+            suffix = 2
+            while f"{row_id}#{suffix}" in positions:
+                suffix += 1
+            row_id = f"{row_id}#{suffix}"
+        row_ids.append(row_id)
+        positions[row_id] = position
+    return row_ids, positions
+
+def get_translation_row_index(user_session, csv_data):
+    """Session-cached row index for csv_data, rebuilt when the working data set changes"""
+    cached = user_session.get('translator_row_index')
+    if cached and cached['rows'] is csv_data and cached['size'] == len(csv_data):
+        return cached['row_ids'], cached['positions']
+
+    row_ids, positions = build_translation_row_index(csv_data)
+    user_session['translator_row_index'] = {
+        'rows': csv_data,
+        'size': len(csv_data),
+        'row_ids': row_ids,
+        'positions': positions
+    }
+    return row_ids, positions
+
+def get_translator_working_data(user_session):
+    """Filtered data if present, otherwise all uploaded files combined (as translate-csv uses it)"""
+    csv_data = user_session.get('translator_csv_data')
+    if csv_data:
+        return csv_data
+    csv_data = []
+    for file_id, file_data in user_session.get('translator_csv_files', {}).items():
+        csv_data.extend(file_data['data'])
+    if csv_data:
+        user_session['translator_csv_data'] = csv_data
+    return csv_data
+
 @app.route('/api/update-translation', methods=['POST'])
 def update_translation():
     """Update a specific translation in the CSV data"""
@@ -3583,7 +6612,8 @@ def update_translation():
         if not csv_data:
             return jsonify({'error': 'Ingen CSV data fundet'}), 400
         
-        row_index = data.get('row_index')
+        row_ids, positions = get_translation_row_index(user_session, csv_data)
+        row_index = positions.get(data['row_id']) if data.get('row_id') else data.get('row_index')
         new_translation = data.get('translated_content', '').strip()
         
         if row_index is None or row_index >= len(csv_data):
@@ -3596,6 +6626,7 @@ def update_translation():
         return jsonify({
             'success': True,
             'message': 'Oversættelse opdateret',
+            'row_id': row_ids[row_index],
             'updated_row': csv_data[row_index]
         })
         
@@ -3603,6 +6634,61 @@ def update_translation():
         print(f"Error updating translation: {e}")
         return jsonify({'error': f'Fejl ved opdatering: {str(e)}'}), 500
 
+@app.route('/api/translations', methods=['PATCH'])
+def bulk_update_translations():
+    """Apply many translation edits by row_id in one request. Either all edits apply or none do"""
+    try:
+        data = request.get_json() or {}
+        user_session = get_user_session()
+        csv_data = get_translator_working_data(user_session)
+
+        if not csv_data:
+            return jsonify({'error': 'Ingen CSV data fundet'}), 400
+
+        updates = data.get('updates')
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'error': 'Ingen opdateringer angivet'}), 400
+
+        row_ids, positions = get_translation_row_index(user_session, csv_data)
+
+        # Validate everything before touching the data
+        changes = {}
+        invalid = []
+        for update in updates:
+            if not isinstance(update, dict):
+                invalid.append({'update': update, 'error': 'Ugyldigt format'})
+                continue
+            row_id = update.get('row_id')
+            if row_id not in positions:
+                invalid.append({'row_id': row_id, 'error': 'Række ikke fundet'})
+                continue
+            translated_content = update.get('translated_content')
+            if not isinstance(translated_content, str):
+                invalid.append({'row_id': row_id, 'error': 'translated_content skal være tekst'})
+                continue
+            changes[positions[row_id]] = translated_content.strip()
+
+        if invalid:
+            return jsonify({
+                'error': f'{len(invalid)} af {len(updates)} opdateringer er ugyldige - ingen ændringer gemt',
+                'invalid': invalid
+            }), 400
+
+        for position, translated_content in changes.items():
+            csv_data[position]['translated content'] = translated_content
+        user_session['translator_csv_data'] = csv_data
+
+        return jsonify({
+            'success': True,
+            'updated_count': len(changes),
+            'updated_rows': [{'row_id': row_ids[position], **csv_data[position]} for position in sorted(changes)],
+            'message': f'{len(changes)} oversættelser opdateret'
+        })
+
+    except Exception as e:
+        print(f"Error bulk updating translations: {e}")
+        return jsonify({'error': f'Fejl ved opdatering: {str(e)}'}), 500
+
 @app.route('/api/quick-translate', methods=['POST'])
 def quick_translate():
     """Quick text translation using OpenAI - same logic as CSV translator"""
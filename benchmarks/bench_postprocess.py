@@ -0,0 +1,99 @@
+"""Micro-benchmark: generated-content post-processing, old per-call path vs process_generated_content.
+
+Run from the repository root:
+
+    python benchmarks/bench_postprocess.py [--paragraphs 60] [--repeat 200]
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+import markdown
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import markdown_render_cache, process_generated_content  # noqa: E402
+
+
+def build_article(paragraphs):
+    """A long generated article in the shape the SEO endpoints return"""
+    parts = [
+        "# Sådan vælger du den rigtige spisebordsstol",
+        "META: Find den perfekte spisebordsstol til dit hjem med vores guide til materialer, komfort og design.",
+        ""
+    ]
+    for i in range(paragraphs):
+        if i % 6 == 0:
+            parts.append(f"## Afsnit {i // 6 + 1}: Materialer og komfort")
+            parts.append("")
+        parts.append(
+            f"Stol nummer {i} er lavet af **massivt egetræ** og har et [polstret sæde](https://example.com/stole/{i}) "
+            "der gør lange middage behagelige. Vælg en model der passer til bordets højde, og tænk på "
+            "hvor meget plads der er omkring bordet, før du bestiller."
+        )
+        parts.append("")
+        if i % 10 == 5:
+            parts.append("| Materiale | Pris | Holdbarhed |")
+            parts.append("|---|---|---|")
+            parts.append("| Eg | 2.499 kr | Høj |")
+            parts.append("| Bøg | 1.899 kr | Middel |")
+            parts.append("")
+    return "\n".join(parts)
+
+
+def legacy_postprocess(text):
+    """The previous code path: module-level markdown.markdown, uncompiled regexes, line scans"""
+    raw_html = markdown.markdown(text, extensions=['tables', 'nl2br'])
+    html = re.sub(r'>\s+<', '><', raw_html)
+    html = re.sub(r'</([^>]+)><([^/>][^>]*)>', r'</\1>\n<\2>', html)
+    html = re.sub(r'</p>\s*<p>', '</p>\n<p>', html)
+    html = re.sub(r'</h([1-6])>\s*<', r'</h\1>\n<', html)
+    html = re.sub(r'</p>\s*<h([1-6])', r'</p>\n<h\1', html)
+    html = html.strip()
+    html = re.sub(r'<p>\s*META:.*?</p>\s*', '', html, flags=re.IGNORECASE | re.DOTALL)
+    html = re.sub(r'<p>.*?META:.*?</p>\s*', '', html, flags=re.IGNORECASE | re.DOTALL)
+
+    title = ""
+    meta_description = ""
+    for line in text.split('\n'):
+        line = line.strip()
+        if line.startswith('# ') and not title:
+            title = line[2:].strip()
+        elif 'meta' in line.lower() and 'beskrivelse' in line.lower() and not meta_description:
+            if ':' in line:
+                meta_description = line.split(':', 1)[1].strip()
+    return title, meta_description, html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    article = build_article(args.paragraphs)
+    print(f"Article: {len(article)} characters, {args.repeat} runs each")
+
+    # Warm up both paths (extension loading, regex cache)
+    legacy_postprocess(article)
+    process_generated_content(article)
+
+    def pipeline_uncached():
+        # The render cache would turn every timed call into a hit; measure real rendering
+        markdown_render_cache.clear()
+        process_generated_content(article)
+
+    legacy = timeit.timeit(lambda: legacy_postprocess(article), number=args.repeat)
+    pipeline = timeit.timeit(pipeline_uncached, number=args.repeat)
+    cached = timeit.timeit(lambda: process_generated_content(article), number=args.repeat)
+
+    print(f"legacy:          {legacy / args.repeat * 1000:8.3f} ms/article")
+    print(f"pipeline:        {pipeline / args.repeat * 1000:8.3f} ms/article")
+    print(f"pipeline cached: {cached / args.repeat * 1000:8.3f} ms/article")
+    print(f"speedup:         {legacy / pipeline:8.2f}x (uncached)")
+
+
+if __name__ == '__main__':
+    main()
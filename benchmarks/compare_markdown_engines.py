@@ -0,0 +1,103 @@
+"""Check that Markdown engines render the article corpus identically, then compare throughput.
+
+Run from the repository root:
+
+    python benchmarks/compare_markdown_engines.py [--repeat 200] [--profiles profiles.pkl]
+
+--profiles adds the saved texts of every profile in a profiles.pkl to the corpus, so the
+comparison can be run against real generated articles before switching MARKDOWN_ENGINE.
+Exits with status 1 if any engine's HTML differs from the default engine. The corpus includes
+lists directly after a paragraph with no blank line, which generated texts use a lot and which
+python-markdown keeps as text while markdown-it renders a list.
+"""
+import argparse
+import difflib
+import glob
+import os
+import pickle
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import DEFAULT_MARKDOWN_ENGINE, MARKDOWN_ENGINES, get_markdown_renderer, process_generated_content  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'markdown_corpus')
+
+
+def load_corpus(profiles_file=None):
+    corpus = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.md'))):
+        with open(path, encoding='utf-8') as f:
+            corpus[os.path.basename(path)] = f.read()
+
+    if profiles_file:
+        with open(profiles_file, 'rb') as f:
+            profiles = pickle.load(f)
+        for profile_name, profile in profiles.items():
+            for text_name, text in (profile.get('saved_texts') or {}).items():
+                content = text.get('content') if isinstance(text, dict) else text
+                if content:
+                    corpus[f"{profile_name}/{text_name}"] = content
+    return corpus
+
+
+def normalize(html):
+    """Ignore differences that render identically: whitespace and escaped quotes in text"""
+    return re.sub(r'\s+', ' ', html).replace('&quot;', '"').strip()
+
+
+def available_engines():
+    engines = []
+    for name in MARKDOWN_ENGINES:
+        try:
+            if get_markdown_renderer(name)[0] == name:
+                engines.append(name)
+        except Exception as e:
+            print(f"skipping {name}: {e}")
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--profiles', help='profiles.pkl with saved texts to add to the corpus')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.profiles)
+    engines = available_engines()
+    print(f"Corpus: {len(corpus)} articles, engines: {', '.join(engines)}")
+
+    # Equivalence against the default engine
+    mismatches = 0
+    for name, text in corpus.items():
+        expected = process_generated_content(text, engine=DEFAULT_MARKDOWN_ENGINE)['html']
+        for engine in engines:
+            if engine == DEFAULT_MARKDOWN_ENGINE:
+                continue
+            actual = process_generated_content(text, engine=engine)['html']
+            if normalize(actual) != normalize(expected):
+                mismatches += 1
+                print(f"\nMISMATCH {engine}: {name}")
+                for line in difflib.unified_diff(expected.splitlines(), actual.splitlines(),
+                                                 DEFAULT_MARKDOWN_ENGINE, engine, lineterm='', n=1):
+                    print(f"  {line}")
+
+    # Throughput over the whole corpus
+    print()
+    texts = list(corpus.values())
+    total_chars = sum(len(text) for text in texts)
+    for engine in engines:
+        render = get_markdown_renderer(engine)[1]
+        seconds = timeit.timeit(lambda: [render(text) for text in texts], number=args.repeat)
+        print(f"{engine:16} {args.repeat * len(texts) / seconds:10.0f} articles/s "
+              f"{args.repeat * total_chars / seconds / 1e6:8.2f} MB/s")
+
+    print(f"\n{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
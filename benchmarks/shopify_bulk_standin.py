@@ -0,0 +1,200 @@
+"""Drive a full Shopify bulk export against a local stand-in server and check the caches.
+
+Run from the repository root:
+
+    python benchmarks/shopify_bulk_standin.py [--products 500] [--images 3] [--polls 3] [--status COMPLETED]
+
+The stand-in answers the bulkOperationRunQuery mutation and currentBulkOperation polls on
+/admin/api/<version>/graphql.json and serves the result file as JSONL (children after their
+parent, linked by __parentId), the way Shopify does. run_shopify_bulk_export is pointed at it
+through base_url and writes into a temporary profile image directory, which is then compared
+with the generated store. Exits with status 1 if the export fails or the caches don't match.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+STORE_URL = 'standin-store.myshopify.com'
+ACCESS_TOKEN = 'shpat_standin'
+OPERATION_ID = 'gid://shopify/BulkOperation/1'
+
+
+def build_store(product_count, images_per_product):
+    """Bulk JSONL objects for a generated store; every third product has no images"""
+    lines = []
+    for i in range(1, product_count + 1):
+        product_gid = f'gid://shopify/Product/{1000 + i}'
+        lines.append({
+            'id': product_gid,
+            'legacyResourceId': str(1000 + i),
+            'title': f'Spisebordsstol {i}',
+            'handle': f'spisebordsstol-{i}',
+            'vendor': 'Stand-in',
+            'productType': 'Stole',
+            'status': 'ACTIVE',
+            'tags': ['eg', 'stol'],
+            'updatedAt': '2026-01-01T00:00:00Z',
+            'seo': {'title': f'Stol {i}', 'description': None}
+        })
+        for j in range(images_per_product if i % 3 else 0):
+            lines.append({
+                'id': f'gid://shopify/ProductImage/{(1000 + i) * 100 + j}',
+                'url': f'https://cdn.example.com/stol-{i}-{j}.jpg',
+                'altText': None,
+                'width': 800,
+                'height': 600,
+                '__parentId': product_gid
+            })
+    return lines
+
+
+def make_handler(state):
+    class StandinHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, payload, status=200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.endswith('/graphql.json'):
+                return self.send_json({'errors': 'Not Found'}, 404)
+            if self.headers.get('X-Shopify-Access-Token') != ACCESS_TOKEN:
+                return self.send_json({'errors': '[API] Invalid API key or access token'}, 401)
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+            query = payload.get('query', '')
+
+            with state['lock']:
+                if 'bulkOperationRunQuery' in query:
+                    state['polls'] = 0
+                    state['started'] = True
+                    return self.send_json({'data': {'bulkOperationRunQuery': {
+                        'bulkOperation': {'id': OPERATION_ID, 'status': 'CREATED'},
+                        'userErrors': []
+                    }}})
+                if 'currentBulkOperation' in query:
+                    if not state['started']:
+                        return self.send_json({'data': {'currentBulkOperation': None}})
+                    state['polls'] += 1
+                    done = state['polls'] > state['running_polls']
+                    status = state['final_status'] if done else 'RUNNING'
+                    completed = status == 'COMPLETED'
+                    return self.send_json({'data': {'currentBulkOperation': {
+                        'id': OPERATION_ID,
+                        'status': status,
+                        'errorCode': None if completed or not done else 'INTERNAL_SERVER_ERROR',
+                        'objectCount': str(len(state['lines']) if done else state['polls'] * 10),
+                        'url': f"{state['base_url']}/bulk/result.jsonl" if completed and state['lines'] else None,
+                        'partialDataUrl': None
+                    }}})
+            self.send_json({'errors': [{'message': 'Unsupported query'}]})
+
+        def do_GET(self):
+            if self.path != '/bulk/result.jsonl':
+                return self.send_json({'errors': 'Not Found'}, 404)
+            if self.headers.get('X-Shopify-Access-Token'):
+                # The signed download URL must not receive the store token
+                return self.send_json({'errors': 'Token sent to download URL'}, 400)
+            body = ''.join(json.dumps(line) + '\n' for line in state['lines']).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/jsonl')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StandinHandler
+
+
+def check_caches(profile_name, lines):
+    """Compare the cached products and images with the generated store; returns a list of problems"""
+    expected_products = [line for line in lines if '__parentId' not in line]
+    expected_images = [line for line in lines if '__parentId' in line]
+    problems = []
+
+    products = app.get_cached_products(profile_name) or []
+    images = app.get_cached_images(profile_name)
+    meta = app.load_image_cache_meta(profile_name)
+    if len(products) != len(expected_products):
+        problems.append(f"{len(products)} cached products, expected {len(expected_products)}")
+    if len(images) != len(expected_images):
+        problems.append(f"{len(images)} cached images, expected {len(expected_images)}")
+    if len(meta.get('products') or {}) != len(expected_products) or meta.get('source') != 'bulk':
+        problems.append(f"image cache meta does not cover the export: {meta.get('source')}")
+
+    for product in products:
+        product_images = app.get_cached_images(profile_name, product['id'])
+        if len(product_images) != product['image_count']:
+            problems.append(f"product {product['id']}: {len(product_images)} cached images, "
+                            f"expected {product['image_count']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--images', type=int, default=3, help='images per product')
+    parser.add_argument('--polls', type=int, default=3, help='polls that report RUNNING before the operation finishes')
+    parser.add_argument('--status', default='COMPLETED', choices=sorted(app.SHOPIFY_BULK_FINISHED_STATUSES))
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    state = {
+        'lock': threading.Lock(),
+        'lines': build_store(args.products, args.images),
+        'running_polls': args.polls,
+        'final_status': args.status,
+        'started': False,
+        'polls': 0
+    }
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    state['base_url'] = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Keep the export out of the real profile image directory and don't wait seconds per poll
+    app.PROFILE_IMAGES_DIR = tempfile.mkdtemp(prefix='bulk_standin_')
+    app.SHOPIFY_BULK_POLL_INTERVAL = args.poll_interval
+    profile_name = 'standin'
+
+    client = app.get_shopify_client(STORE_URL, ACCESS_TOKEN, base_url=state['base_url'])
+    job = app.create_background_job('shopify_bulk_export', None, profile_name=profile_name,
+                                    bulk_operation_id=None, bulk_status=None, object_count=0,
+                                    products_count=0, images_count=0, error=None)
+    started = time.perf_counter()
+    app.run_shopify_bulk_export(job, client, profile_name)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    if args.status != 'COMPLETED':
+        # A failed operation must surface as a job error and leave no caches behind
+        problems = [] if job['status'] == 'error' and not app.get_cached_products(profile_name) \
+            else ['failed operation was not reported']
+    elif job['status'] != 'completed':
+        problems = [job['error']]
+    else:
+        problems = check_caches(profile_name, state['lines'])
+
+    print(f"job: status={job['status']} bulk_status={job['bulk_status']} polls={state['polls']} "
+          f"products={job['products_count']} images={job['images_count']} error={job['error']} "
+          f"({elapsed:.2f}s)")
+    print(f"caches written to {app.PROFILE_IMAGES_DIR}")
+    for problem in problems:
+        print(f"MISMATCH: {problem}")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
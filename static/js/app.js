@@ -1578,6 +1578,23 @@ class SEOGenerator {
         }
     }
 
+    async loadSavedTextHtml(textName) {
+        // The saved texts list leaves out the rendered HTML; fetch it once per text
+        const text = this.savedTexts[textName];
+        if (text.html === undefined) {
+            try {
+                const response = await fetch(`/api/saved-texts/${encodeURIComponent(textName)}`);
+                if (response.ok) {
+                    const data = await response.json();
+                    text.html = data.text.html;
+                }
+            } catch (error) {
+                console.error('Error loading saved text:', error);
+            }
+        }
+        return text;
+    }
+
     showTab(tabName) {
         // Hide all tabs
         document.querySelectorAll('.tab-content').forEach(tab => {
@@ -1772,6 +1789,9 @@ class SEOGenerator {
             return;
         }
 
+        // A new generation is not the saved text that was open before
+        this.currentTextName = null;
+
         const formData = {
             keywords: keywords,
             secondary_keywords: document.getElementById('secondary-keywords').value.trim(),
@@ -1832,6 +1852,7 @@ class SEOGenerator {
             return;
         }
 
+        this.currentTextName = null;
         this.showLoading();
 
         try {
@@ -2014,6 +2035,8 @@ class SEOGenerator {
     }
 
     async autoSaveGeneratedContent(data) {
+        // New content no longer belongs to the previously loaded/saved text
+        this.currentTextName = null;
         try {
             // Generate a unique name based on title or timestamp
             const title = data.title || 'Genereret tekst';
@@ -2739,10 +2762,10 @@ class SEOGenerator {
         }
     }
 
-    showTextPreview(textName) {
+    async showTextPreview(textName) {
         if (!this.savedTexts || !this.savedTexts[textName]) return;
         
-        const text = this.savedTexts[textName];
+        const text = await this.loadSavedTextHtml(textName);
         
         // Remove selection from all items
         document.querySelectorAll('.saved-text-item').forEach(item => {
@@ -2769,7 +2792,7 @@ class SEOGenerator {
                     </small>
                 </div>
                 <hr>
-                <div class="text-content">${text.content}</div>
+                <div class="text-content">${text.html || text.content}</div>
             </div>
         `;
         
@@ -2816,10 +2839,10 @@ class SEOGenerator {
         this.deleteSavedText(this.selectedTextName);
     }
 
-    previewSavedText(textName) {
+    async previewSavedText(textName) {
         if (!this.savedTexts || !this.savedTexts[textName]) return;
         
-        const text = this.savedTexts[textName];
+        const text = await this.loadSavedTextHtml(textName);
         
         // Set current text name for auto-save
         this.currentTextName = textName;
@@ -2828,14 +2851,14 @@ class SEOGenerator {
         document.getElementById('meta-title').value = text.title || '';
         document.getElementById('meta-description').value = text.meta_description || '';
         document.getElementById('preview-title').textContent = text.title || 'Redigeret tekst';
-        document.getElementById('preview-content').innerHTML = text.content;
+        document.getElementById('preview-content').innerHTML = text.html || text.content;
         
         // Update stored content for HTML display
         this.lastGeneratedContent = {
             title: text.title || '',
             meta_description: text.meta_description || '',
             content: text.content || '',
-            html_content: text.content || '',
+            html_content: text.html || text.content || '',
             keywords: text.keywords || '',
             profile: text.profile || ''
         };
@@ -2855,10 +2878,10 @@ class SEOGenerator {
         this.updateHTMLDisplay();
     }
 
-    editSavedText(textName) {
+    async editSavedText(textName) {
         if (!this.savedTexts || !this.savedTexts[textName]) return;
         
-        const text = this.savedTexts[textName];
+        const text = await this.loadSavedTextHtml(textName);
         
         // Set current text name for auto-save
         this.currentTextName = textName;
@@ -2867,14 +2890,14 @@ class SEOGenerator {
         document.getElementById('meta-title').value = text.title || '';
         document.getElementById('meta-description').value = text.meta_description || '';
         document.getElementById('preview-title').textContent = text.title || 'Redigeret tekst';
-        document.getElementById('preview-content').innerHTML = text.content;
+        document.getElementById('preview-content').innerHTML = text.html || text.content;
         
         // Update stored content for HTML display
         this.lastGeneratedContent = {
             title: text.title || '',
             meta_description: text.meta_description || '',
             content: text.content || '',
-            html_content: text.content || '',
+            html_content: text.html || text.content || '',
             keywords: text.keywords || '',
             profile: text.profile || ''
         };
@@ -2939,10 +2962,10 @@ class SEOGenerator {
         }
     }
 
-    loadToPreview(textName) {
+    async loadToPreview(textName) {
         if (!this.savedTexts || !this.savedTexts[textName]) return;
         
-        const text = this.savedTexts[textName];
+        const text = await this.loadSavedTextHtml(textName);
         
         // Set current text name for auto-save
         this.currentTextName = textName;
@@ -2951,14 +2974,14 @@ class SEOGenerator {
         document.getElementById('meta-title').value = text.title || '';
         document.getElementById('meta-description').value = text.meta_description || '';
         document.getElementById('preview-title').textContent = text.title || 'Indlæst tekst';
-        document.getElementById('preview-content').innerHTML = text.content;
+        document.getElementById('preview-content').innerHTML = text.html || text.content;
         
         // Update stored content for HTML display
         this.lastGeneratedContent = {
             title: text.title || '',
             meta_description: text.meta_description || '',
             content: text.content || '',
-            html_content: text.content || '',
+            html_content: text.html || text.content || '',
             keywords: text.keywords || '',
             profile: text.profile || ''
         };
@@ -4172,61 +4195,199 @@ class SEOGenerator {
             }
         });
 
-        // Create table
-        if (file.data && file.data.length > 0) {
-            const table = document.createElement('table');
-            table.className = 'csv-preview-table';
-
-            // Create header
-            const thead = document.createElement('thead');
-            const headerRow = document.createElement('tr');
-            file.columns.forEach(column => {
-                const th = document.createElement('th');
-                th.textContent = column;
-                headerRow.appendChild(th);
+        // Rows are fetched page by page from the server and only the visible ones are in the DOM
+        this.csvPreviewState = {
+            fileId: fileId,
+            columns: file.columns,
+            total: file.total_rows,
+            pages: new Map(),
+            pending: new Set(),
+            filters: { locale: '', status: '', q: '' },
+            sort: '',
+            rowHeight: 36,
+            pageSize: 200,
+            generation: ((this.csvPreviewState && this.csvPreviewState.generation) || 0) + 1
+        };
+
+        csvPreviewContent.innerHTML = `
+            <div class="csv-preview-toolbar">
+                <select class="csv-preview-locale">
+                    <option value="">Alle sprog</option>
+                    ${(file.locales || []).map(locale => `<option value="${locale}">${locale}</option>`).join('')}
+                </select>
+                <select class="csv-preview-status">
+                    <option value="">Alle rækker</option>
+                    <option value="untranslated">Mangler oversættelse</option>
+                    <option value="translated">Oversat</option>
+                    <option value="error">Fejl</option>
+                </select>
+                <input type="search" class="csv-preview-search" placeholder="Søg i indhold...">
+            </div>
+            <div class="csv-virtual-viewport">
+                <table class="csv-preview-table">
+                    <thead><tr></tr></thead>
+                    <tbody></tbody>
+                </table>
+            </div>
+            <div class="csv-preview-summary"></div>
+        `;
+
+        const headerRow = csvPreviewContent.querySelector('thead tr');
+        file.columns.forEach(column => {
+            const th = document.createElement('th');
+            th.textContent = column;
+            th.style.cursor = 'pointer';
+            th.onclick = () => {
+                const state = this.csvPreviewState;
+                state.sort = state.sort === column ? `-${column}` : column;
+                headerRow.querySelectorAll('th').forEach(cell => {
+                    cell.textContent = cell.dataset.column;
+                });
+                th.textContent = `${column} ${state.sort.startsWith('-') ? '▼' : '▲'}`;
+                this.resetCSVPreviewRows();
+            };
+            th.dataset.column = column;
+            headerRow.appendChild(th);
+        });
+
+        const viewport = csvPreviewContent.querySelector('.csv-virtual-viewport');
+        let scheduled = false;
+        viewport.addEventListener('scroll', () => {
+            if (scheduled) return;
+            scheduled = true;
+            requestAnimationFrame(() => {
+                scheduled = false;
+                this.renderCSVPreviewRows();
             });
-            thead.appendChild(headerRow);
-            table.appendChild(thead);
+        });
 
-            // Create body
-            const tbody = document.createElement('tbody');
-            file.data.forEach(row => { // Show all rows
-                const tr = document.createElement('tr');
-                
-                // Check if row needs translation
-                const needsTranslation = !row['translated content'] || 
-                                       row['translated content'].toString().trim() === '' ||
-                                       row['translated content'] === 'nan';
-                
-                if (needsTranslation) {
-                    tr.classList.add('needs-translation');
-                } else {
-                    tr.classList.add('has-translation');
-                }
+        csvPreviewContent.querySelector('.csv-preview-locale').onchange = (e) => {
+            this.csvPreviewState.filters.locale = e.target.value;
+            this.resetCSVPreviewRows();
+        };
+        csvPreviewContent.querySelector('.csv-preview-status').onchange = (e) => {
+            this.csvPreviewState.filters.status = e.target.value;
+            this.resetCSVPreviewRows();
+        };
+        let searchTimer = null;
+        csvPreviewContent.querySelector('.csv-preview-search').oninput = (e) => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                this.csvPreviewState.filters.q = e.target.value.trim();
+                this.resetCSVPreviewRows();
+            }, 300);
+        };
 
-                file.columns.forEach(column => {
+        this.resetCSVPreviewRows();
+    }
+
+    resetCSVPreviewRows() {
+        const state = this.csvPreviewState;
+        state.generation += 1;
+        state.pages = new Map();
+        state.pending = new Set();
+
+        const viewport = document.querySelector('#csv-preview-content .csv-virtual-viewport');
+        if (viewport) viewport.scrollTop = 0;
+        this.loadCSVPreviewPage(0);
+    }
+
+    async loadCSVPreviewPage(pageIndex) {
+        const state = this.csvPreviewState;
+        if (state.pages.has(pageIndex) || state.pending.has(pageIndex)) return;
+
+        const generation = state.generation;
+        state.pending.add(pageIndex);
+
+        const params = new URLSearchParams({
+            file_id: state.fileId,
+            offset: pageIndex * state.pageSize,
+            limit: state.pageSize,
+            columns: state.columns.join(',')
+        });
+        Object.entries(state.filters).forEach(([key, value]) => {
+            if (value) params.set(key, value);
+        });
+        if (state.sort) params.set('sort', state.sort);
+
+        try {
+            const response = await fetch(`/api/csv-preview/rows?${params.toString()}`);
+            const data = await response.json();
+
+            // Ignore responses for an older filter/sort
+            if (generation !== state.generation) return;
+            if (!data.success) {
+                this.showToast(data.error || 'Fejl ved indlæsning af preview', 'error');
+                return;
+            }
+
+            state.total = data.total;
+            state.totalUnfiltered = data.total_unfiltered;
+            state.pages.set(pageIndex, data.rows);
+            this.renderCSVPreviewRows();
+        } catch (error) {
+            console.error('Error loading CSV preview page:', error);
+        } finally {
+            if (generation === state.generation) state.pending.delete(pageIndex);
+        }
+    }
+
+    renderCSVPreviewRows() {
+        const state = this.csvPreviewState;
+        const csvPreviewContent = document.getElementById('csv-preview-content');
+        const viewport = csvPreviewContent && csvPreviewContent.querySelector('.csv-virtual-viewport');
+        if (!state || !viewport) return;
+
+        const tbody = viewport.querySelector('tbody');
+        const overscan = 10;
+        const first = Math.max(0, Math.floor(viewport.scrollTop / state.rowHeight) - overscan);
+        const visibleCount = Math.ceil(viewport.clientHeight / state.rowHeight) + overscan * 2;
+        const last = Math.min(state.total, first + visibleCount);
+
+        const fragment = document.createDocumentFragment();
+        const addSpacer = (height) => {
+            const spacer = document.createElement('tr');
+            spacer.style.height = `${height}px`;
+            fragment.appendChild(spacer);
+        };
+
+        addSpacer(first * state.rowHeight);
+        for (let index = first; index < last; index++) {
+            const pageIndex = Math.floor(index / state.pageSize);
+            const page = state.pages.get(pageIndex);
+            const tr = document.createElement('tr');
+            tr.style.height = `${state.rowHeight}px`;
+
+            // Rows missing from a loaded page (the data shrank) keep their height so the
+            // spacers stay aligned with scrollTop
+            const row = page && page[index % state.pageSize];
+            if (!row) {
+                if (!page) this.loadCSVPreviewPage(pageIndex);
+                const td = document.createElement('td');
+                td.colSpan = state.columns.length;
+                td.textContent = page ? '' : 'Indlæser...';
+                tr.appendChild(td);
+            } else {
+                const translated = (row['translated content'] || '').toString().trim();
+                tr.classList.add(!translated || translated === 'nan' ? 'needs-translation' : 'has-translation');
+
+                state.columns.forEach(column => {
                     const td = document.createElement('td');
                     td.textContent = row[column] || '';
                     td.title = row[column] || '';
                     tr.appendChild(td);
                 });
-                tbody.appendChild(tr);
-            });
-            table.appendChild(tbody);
-
-            csvPreviewContent.innerHTML = '';
-            csvPreviewContent.appendChild(table);
-
-            // Add summary
-            const summary = document.createElement('div');
-            summary.style.padding = '1rem';
-            summary.style.background = '#f8f9fa';
-            summary.style.borderTop = '1px solid #dee2e6';
-            summary.innerHTML = `
-                <strong>Oversigt:</strong> ${file.total_rows} rækker i alt, 
-                ${file.untranslated_rows} mangler oversættelse
-            `;
-            csvPreviewContent.appendChild(summary);
+            }
+            fragment.appendChild(tr);
+        }
+        addSpacer(Math.max(0, state.total - last) * state.rowHeight);
+
+        tbody.innerHTML = '';
+        tbody.appendChild(fragment);
+
+        const summary = csvPreviewContent.querySelector('.csv-preview-summary');
+        if (summary) {
+            summary.innerHTML = `<strong>Oversigt:</strong> ${state.total} af ${state.totalUnfiltered ?? state.total} rækker vist`;
         }
     }
 
@@ -4482,6 +4643,7 @@ class SEOGenerator {
                             <div style="color: #155724;">
                                 📝 <strong>${result.translated_count} rækker blev oversat</strong><br>
                                 🌍 Sprog: ${selectedLanguages.join(', ')}<br>
+                                ${result.saved_api_calls ? `⏭️ ${result.saved_api_calls} rækker krævede ingen oversættelse<br>` : ''}
                                 ${result.errors && result.errors.length > 0 ? 
                                     `⚠️ ${result.errors.length} fejl opstod` : 
                                     '🎉 Ingen fejl opstod'}
@@ -5840,6 +6002,7 @@ class SEOGenerator {
                         body_html: content,  // Body content only like old code
                         author: author,
                         profile_name: this.currentProfile,  // Include current profile
+                        text_name: this.currentTextName || null,  // Lets a re-upload update the existing article
                         featured_image_url: this.featuredImageUrl || null  // Send featured image if selected
                     })
                 });
@@ -5879,6 +6042,7 @@ class SEOGenerator {
                                 author: author,
                                 blog_id: selectedBlog.id,
                                 profile_name: this.currentProfile,  // Include current profile
+                                text_name: this.currentTextName || null,
                                 featured_image_url: this.featuredImageUrl || null
                             })
                         });
@@ -6141,8 +6305,10 @@ class SEOGenerator {
             imageItem.className = 'image-item';
             imageItem.dataset.imageId = image.id;
             
+            // Prefer the locally mirrored thumbnail (WebP when the browser supports it)
+            const thumbnail = `<img src="${image.thumbnail_url || image.src}" alt="${image.alt || ''}" loading="lazy">`;
             imageItem.innerHTML = `
-                <img src="${image.src}" alt="${image.alt || ''}" loading="lazy">
+                ${image.webp_url ? `<picture><source srcset="${image.webp_url}" type="image/webp">${thumbnail}</picture>` : thumbnail}
                 <div class="image-item-info">
                     <div class="image-item-title">${image.product_title || 'Ukendt produkt'}</div>
                     <div class="image-item-alt">${image.alt || 'Ingen alt tekst'}</div>
@@ -6389,6 +6555,7 @@ class SEOGenerator {
             return;
         }
 
+        this.currentTextName = null;
         this.setBatchGenerateLoading(true);
 
         try {